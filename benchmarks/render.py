@@ -0,0 +1,87 @@
+"""Microbenchmark of the rendering hot path.
+
+Run it from the repository root, with the package on the path:
+
+    $ PYTHONPATH=. python benchmarks/render.py -n 20000
+
+It times building the result fragments of every kind of expression, and
+processing a page with that many results.
+"""
+import sys
+import timeit
+import argparse
+from unittest import mock
+
+from livedoc.theme import Theme
+from livedoc.expressions import Assignment, Call, Comparison, Print
+from livedoc.processors.html import HtmlProcessor
+
+
+def expressions(theme):
+    report = mock.Mock()
+    assignment = Assignment('a', '1', theme=theme, report=report)
+    assignment.evaluate({}, {})
+    success = Comparison('1', '1', '==', theme=theme, report=report)
+    success.evaluate({'TEXT': '1'}, {})
+    failure = Comparison('1', '2', '==', theme=theme, report=report)
+    failure.evaluate({'TEXT': '1'}, {})
+    call = Call('1 + 1', theme=theme, report=report)
+    call.evaluate({}, {})
+    out = Print('1 + 1', theme=theme, report=report)
+    out.evaluate({}, {})
+    return dict(
+        assignment=assignment,
+        success=success,
+        failure=failure,
+        call=call,
+        print=out,
+    )
+
+
+def page(count):
+    return '\n'.join(
+        '<p><a href="-" title="a = TEXT">%d</a>'
+        ' <a href="-" title="a == TEXT">%d</a>'
+        ' <a href="-" title="a == TEXT">0</a>'
+        ' <a href="-" title="OUT = a"></a></p>' % (i, i)
+        for i in range(count // 4)
+    )
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument(
+        '-n', '--number',
+        type=int,
+        default=20000,
+        help="Results to render in each measure"
+    )
+    parser.add_argument(
+        '-r', '--repeat',
+        type=int,
+        default=5,
+        help="Measures taken; the best one is shown"
+    )
+    args = parser.parse_args(args)
+
+    theme = Theme()
+    for name, expression in sorted(expressions(theme).items()):
+        best = min(timeit.repeat(
+            expression.as_xml,
+            number=args.number,
+            repeat=args.repeat,
+        ))
+        print('as_xml %-10s %8.2f us' % (name, best / args.number * 1e6))
+
+    processor = HtmlProcessor(report=mock.Mock(), theme=theme)
+    content = page(args.number)
+    best = min(timeit.repeat(
+        lambda: processor.process_stream(content, {}),
+        number=1,
+        repeat=args.repeat,
+    ))
+    print('page of %d results %8.2f ms' % (args.number, best * 1000))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
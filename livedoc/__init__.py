@@ -1,18 +1,24 @@
 import os
+import sys
+import json
 import time
 import logging
-import copy
+import threading
 
 from .exceptions import LiveDocException
-from .processors import (
-    MarkdownProcessor,
-    HtmlProcessor,
-    CopyProcessor,
-)
-from livedoc.reports import Report
+from .discovery import discover
+from .documents import Document, RenderedDocument
+from .context import Context
+from .fixtures import FixtureLoader
+from . import loops
+from .output import write_if_changed
+from .pipeline import prefetch, Writer
+from .processors import CopyProcessor, LazyProcessor
+from livedoc.reports import Report, MemoryReporter
 from livedoc.theme import Theme
+from livedoc.tracing import span
 
-__ALL__ = ['LiveDoc']
+__ALL__ = ['LiveDoc', 'Document', 'RenderedDocument']
 
 
 logger = logging.getLogger(__name__)
@@ -21,60 +27,279 @@ logger = logging.getLogger(__name__)
 class LiveDoc(object):
     STATUS_SUCCESS, STATUS_FAILURE, STATUS_ERROR = range(3)
 
-    def __init__(self, processors=None, theme_name=None, report=None):
+    def __init__(self, processors=None, theme_name=None, report=None,
+                 deterministic=False, exceptions=None,
+                 exception_sidecar=False, parallel_sections=False,
+                 section_workers=None, baseline=None, max_regression=None,
+                 warn_budgets=False, pipeline=0, check_only=False,
+                 threads=None):
         self.report = report or Report()
         self.status = self.STATUS_SUCCESS
         self.theme = Theme()
         self.theme.load(theme_name)
+        self.fixtures = FixtureLoader()
+        self._fixture_code = {}
+        self.baseline = baseline or {}
+        self.timings = {}
+        self.pipeline = pipeline
+        self.check_only = check_only
+        self.threads = threads
+        self._lock = threading.Lock()
+        options = dict(
+            theme=self.theme,
+            report=self.report,
+            deterministic=deterministic,
+            exceptions=exceptions,
+            exception_sidecar=exception_sidecar,
+            parallel_sections=parallel_sections,
+            section_workers=section_workers,
+            max_regression=max_regression,
+            warn_budgets=warn_budgets,
+            check_only=check_only,
+        )
         self.processors = processors or [
-            MarkdownProcessor(theme=self.theme, report=self.report),
-            HtmlProcessor(theme=self.theme, report=self.report),
+            LazyProcessor(
+                'livedoc.processors.markdown:MarkdownProcessor',
+                ('md', 'markdown'),
+                **options
+            ),
+            LazyProcessor(
+                'livedoc.processors.html:HtmlProcessor',
+                ('html', 'htm'),
+                **options
+            ),
             CopyProcessor(report=self.report),
         ]
 
     def process(self, source, target):
         logger.info('Starting to process %s into %s', source, target)
         start = time.time()
-        if os.path.isdir(source):
-            self.process_directory(source, target)
+        self.fixtures.root = (
+            source if os.path.isdir(source) else os.path.dirname(source)
+        )
+        items = _traced_discovery(source, target)
+        if self.check_only:
+            # there is nothing to check in files that are only copied
+            items = (x for x in items if self.is_document(x.source))
+        if self.report.needs_sources():
+            items = list(items)
+            self.report.run_start([item.source for item in items])
         else:
-            self.process_file(source, target)
-        self.theme.copy_assets(target)
+            # files are processed as they are found
+            self.report.run_start(None)
+        try:
+            if self.threads:
+                self._process_threaded(items)
+            elif self.pipeline:
+                self._process_pipelined(items)
+            else:
+                for item in items:
+                    self.process_file(item.source, item.target)
+        finally:
+            self.fixtures.teardown()
+            self.close()
+        if not self.check_only:
+            with span('assets'):
+                self.theme.copy_assets(target)
         logger.info('Finished in %.4f seconds' % (time.time() - start))
+        self.log_statistics()
+
+    def close(self):
+        """Release the workers and event loops kept between documents.
+
+        They are created again if more documents are processed.
+        """
+        for processor in self.processors:
+            processor.close()
+        loops.close_event_loop()
+
+    def log_statistics(self):
+        # only fixtures use livedoc.memoize, do not import it otherwise
+        memoize = sys.modules.get('livedoc.memoize')
+        if memoize is not None:
+            memoize.log_statistics()
+
+    def dependencies(self):
+        """Return the files each processed document depends on.
+
+        Files that are only copied are left out.
+        """
+        return {
+            source: files
+            for source, files in self.fixtures.dependencies.items()
+            if self.is_document(source)
+        }
+
+    def is_document(self, path):
+        return not isinstance(self.choose_processor(path), CopyProcessor)
 
     def process_directory(self, source, target):
-        for filename in os.listdir(source):
-            name, ext = os.path.splitext(filename)
-            fullsource = os.path.join(source, filename)
-            fulltarget = os.path.join(target, "%s.html" % name)
-            if os.path.isdir(fullsource):
-                self.process_directory(fullsource, fulltarget)
-                continue
-            if os.path.isfile(fullsource):
-                self.process_file(fullsource, fulltarget)
-                continue
-            logger.info('Ignoring file %s', fullsource)
+        for item in discover(source, target):
+            self.process_file(item.source, item.target)
 
     def process_file(self, source, target):
-        if source.endswith(('~', '.py')):
-            return
         logger.info('Processing file %s into %s', source, target)
         self.report.test_file(source)
+        content, read = self._read(source)
+        html, status, context = self._process(source, content)
+        context.timings['read'] = read
+        if not self.check_only:
+            context.timings['write'] = self._write(
+                source, target, html, context
+            )
+        self.report.add_timings(context.timings)
+        self.report.file_finish()
+
+    def _process_threaded(self, items):
+        # documents share the fixtures of their directories, loaded once
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(self.threads, 'livedoc') as executor:
+            futures = [
+                executor.submit(self.process_file, item.source, item.target)
+                for item in items
+            ]
+            try:
+                for future in futures:
+                    future.result()
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+    def _process_pipelined(self, items):
+        # files are read ahead and written behind on their own threads,
+        # while documents are evaluated and reported here, one at a time
+        depth = self.pipeline
+        with Writer(depth) as writer:
+            for item, (content, read) in prefetch(
+                    items, lambda x: self._read(x.source), depth):
+                logger.info(
+                    'Processing file %s into %s', item.source, item.target
+                )
+                self.report.test_file(item.source)
+                html, status, context = self._process(item.source, content)
+                context.timings['read'] = read
+                # the write finishes later, so it is not among the timings
+                # reported for the document
+                self.report.add_timings(dict(context.timings))
+                self.report.file_finish()
+                if self.check_only:
+                    continue
+                writer.submit(
+                    self._write_behind, item.source, item.target, html,
+                    context,
+                )
+
+    def _write_behind(self, source, target, html, context):
+        context.timings['write'] = self._write(source, target, html, context)
+
+    def _read(self, source):
+        start = time.perf_counter()
+        with span('read', document=source):
+            with open(source) as fd:
+                content = fd.read()
+        return content, time.perf_counter() - start
+
+    def _write(self, source, target, html, context):
+        start = time.perf_counter()
+        with span('write', document=source):
+            write_if_changed(target, html)
+            self._write_sidecar(context.sidecar, target)
+        return time.perf_counter() - start
+
+    def _write_sidecar(self, sidecar, target):
+        filename = '%s.exceptions.js' % os.path.splitext(target)[0]
+        if not sidecar:
+            # a sidecar left by a previous run would no longer match the page
+            if os.path.exists(filename):
+                os.remove(filename)
+            return
+        write_if_changed(
+            filename,
+            'livedoc_exceptions(%s);\n'
+            % json.dumps(sidecar, sort_keys=True),
+        )
+
+    def process_stream(self, source, content):
+        """Process ``content`` as if it were read from ``source``.
+
+        ``source`` chooses the processor and locates the fixtures, but the
+        file itself is never read. With ``check_only`` the HTML is None.
+        """
+        html, status, context = self._process(source, content)
+        return html, status
+
+    def _process(self, source, content):
         processor = self.choose_processor(source)
-        fixtures = self._load_fixtures(source)
-        directory = os.path.dirname(target)
-        if not os.path.exists(directory):
-            os.makedirs(directory)
-        with open(source) as fd:
-            content, status = processor.process_stream(
-                fd.read(),
-                copy.deepcopy(fixtures)
+        start = time.perf_counter()
+        with span('document', document=source), \
+                self.fixtures.document(source) as fixtures:
+            context = Context(fixtures)
+            context.timings['fixtures'] = time.perf_counter() - start
+            context.baseline = self.baseline.get(source)
+            html, status = processor.process_stream(
+                content,
+                fixtures,
+                context=context,
             )
+        self.timings[source] = context.timings
+        with self._lock:
             self.status = max(self.status, status)
+        return html, status, context
 
-        with open(target, 'w+') as fd:
-            fd.write(content)
-        self.report.file_finish()
+    def render(self, documents):
+        """Process documents held in memory and return their results.
+
+        ``documents`` is an iterable of ``Document`` objects or of
+        ``(name, content, fixtures)`` tuples. A ``RenderedDocument`` is
+        returned for each one, in the same order. Nothing is read from or
+        written to disk: with ``exception_sidecar`` the caller gets the
+        tracebacks in the ``sidecar`` of each result. Processors are reused
+        between calls, which may come from several threads at once.
+        """
+        return [self._render(Document.from_item(x)) for x in documents]
+
+    def _render(self, document):
+        # events are held for this thread only, so the results of calls
+        # running at the same time do not mix
+        collector = MemoryReporter()
+        try:
+            with self.report.buffered() as events:
+                self.report.test_file(document.name)
+                try:
+                    processor = self.choose_processor(document.name)
+                    fixtures = self._document_fixtures(document.fixtures)
+                    context = Context(fixtures)
+                    html, status = processor.process_stream(
+                        document.content,
+                        fixtures,
+                        context=context,
+                    )
+                finally:
+                    self.report.file_finish()
+        finally:
+            self.report.replay(events)
+        report = Report()
+        report.register(collector)
+        report.replay(events)
+        with self._lock:
+            self.status = max(self.status, status)
+        return RenderedDocument(
+            document.name, html, status, collector.results, context.sidecar,
+        )
+
+    def _document_fixtures(self, fixtures):
+        if fixtures is None:
+            return {}
+        if isinstance(fixtures, dict):
+            return dict(fixtures)
+        if fixtures not in self._fixture_code:
+            self._fixture_code[fixtures] = compile(
+                fixtures, '<fixtures>', 'exec'
+            )
+        variables = {}
+        exec(self._fixture_code[fixtures], variables)
+        return variables
 
     def choose_processor(self, path):
         for processor in self.processors:
@@ -85,12 +310,23 @@ class LiveDoc(object):
             path
         )
 
-    def _load_fixtures(self, source):
-        filename, ext = os.path.splitext(source)
-        filename += '.py'
-        if not os.path.exists(filename):
-            return {}
-        variables = {}
-        with open(filename) as fd:
-            exec(fd.read(), variables)
-        return variables
+
+def _traced_discovery(source, target):
+    # the walk may go on between documents, each step of it is its own span
+    items = discover(source, target)
+    while True:
+        with span('discover', source=source):
+            item = next(items, None)
+        if item is None:
+            return
+        yield item
+
+
+def __getattr__(name):
+    # processors are imported on demand, as they pull heavy dependencies
+    if name in ('MarkdownProcessor', 'HtmlProcessor'):
+        from livedoc import processors
+        return getattr(processors, name)
+    raise AttributeError(
+        "module %r has no attribute %r" % (__name__, name)
+    )
@@ -1,8 +1,13 @@
+import os
 import sys
 import argparse
 import logging
 from livedoc import LiveDoc
-from livedoc.reports import Report, ConsoleReporter, JunitReporter
+from livedoc.reports import (
+    Report, ConsoleReporter, JunitReporter, StoreReporter, ProgressReporter
+)
+from livedoc.tracebacks import ExceptionFormatter
+from livedoc.dependencies import DEFAULT_PATH as DEPENDENCIES
 
 
 logger = logging.getLogger(__name__)
@@ -19,9 +24,21 @@ def configure_logging(level):
 
 
 def main(args=None):
+    args = sys.argv[1:] if args is None else args
+    if args and args[0] in COMMANDS:
+        return COMMANDS[args[0]](args[1:])
+    return run(args)
+
+
+def run(args):
     parser = argparse.ArgumentParser(
         prog='livedoc',
         description='Generate Live Documentation',
+        epilog=(
+            'Other commands: %s. Use "livedoc run SOURCE" to process a '
+            'source named like one of them.'
+            % ', '.join(sorted(x for x in COMMANDS if x != 'run'))
+        ),
     )
     parser.add_argument(
         'source',
@@ -42,23 +59,610 @@ def main(args=None):
         default=None,
         help="path to junit report output"
     )
+    parser.add_argument(
+        '--max-context-value',
+        dest='max_context_value',
+        type=int,
+        default=200,
+        help="Characters shown of each variable when an expression fails"
+    )
+    parser.add_argument(
+        '--exception-sidecar',
+        dest='exception_sidecar',
+        action='store_true',
+        help="Write the full context of failures to a file loaded on demand"
+    )
+    parser.add_argument(
+        '--deterministic',
+        action='store_true',
+        help="Leave out volatile content, like render times, from outputs"
+    )
+    parser.add_argument(
+        '--precheck',
+        action='store_true',
+        help="Lint every anchor first, and do not run if anything is wrong"
+    )
+    parser.add_argument(
+        '--check-only',
+        dest='check_only',
+        action='store_true',
+        help="Only evaluate the documents, without writing any output"
+    )
+    parser.add_argument(
+        '--progress',
+        action='store_true',
+        help="Show the files done, throughput and time left while running"
+    )
+    parser.add_argument(
+        '--metrics-file',
+        dest='metrics_file',
+        default=None,
+        help="Path to write OpenMetrics text with the metrics of the run to"
+    )
+    parser.add_argument(
+        '--metrics-interval',
+        dest='metrics_interval',
+        type=float,
+        default=None,
+        help="Also write the metrics file every this many seconds"
+    )
+    parser.add_argument(
+        '--trace',
+        default=None,
+        help="Path to write a Chrome trace of where the run spends its time"
+    )
+    parser.add_argument(
+        '--history',
+        default=None,
+        help="SQLite database to record the outcomes and durations in"
+    )
+    parser.add_argument(
+        '--dependencies',
+        nargs='?',
+        const=DEPENDENCIES,
+        default=None,
+        help="Record the files each document uses, for `livedoc affected`"
+    )
+    parser.add_argument(
+        '--parallel-sections',
+        dest='parallel_sections',
+        action='store_true',
+        help="Evaluate the heading sections of every document concurrently"
+    )
+    parser.add_argument(
+        '--section-workers',
+        dest='section_workers',
+        type=int,
+        default=None,
+        help="Number of workers evaluating the sections of a document"
+    )
+    parser.add_argument(
+        '--threads',
+        type=int,
+        default=None,
+        metavar='N',
+        help="Process N documents at once on threads sharing the fixtures; "
+             "--pipeline is ignored"
+    )
+    parser.add_argument(
+        '--pipeline',
+        type=int,
+        default=0,
+        metavar='DEPTH',
+        help="Read and write files on their own threads, keeping at most "
+             "DEPTH files waiting between stages"
+    )
+    parser.add_argument(
+        '--baseline',
+        default=None,
+        help="Timings of a previous run, to report documents that got slower"
+    )
+    parser.add_argument(
+        '--save-baseline',
+        dest='save_baseline',
+        default=None,
+        help="Path to write the timings of this run to"
+    )
+    parser.add_argument(
+        '--max-regression',
+        dest='max_regression',
+        type=float,
+        default=20,
+        help="Percentage over the baseline a timing may grow"
+    )
+    parser.add_argument(
+        '--warn-budgets',
+        dest='warn_budgets',
+        action='store_true',
+        help="Warn about exceeded time budgets instead of failing"
+    )
     parser.add_argument(
         '-v', '--verbose',
         action='count',
         default=0,
         help="Increase verbosity."
     )
-    args = parser.parse_args(args or sys.argv[1:])
+    args = parser.parse_args(args)
     configure_logging(args.verbose)
 
+    if args.precheck:
+        from livedoc.lint import lint
+        problems = lint(args.source)
+        for problem in problems:
+            logger.error('%s', problem)
+        if problems:
+            logger.error('%d problems found, nothing was run', len(problems))
+            return LiveDoc.STATUS_ERROR
+
+    baseline = None
+    if args.baseline:
+        from livedoc.budgets import load_baseline
+        baseline = load_baseline(args.baseline)
+
+    results = StoreReporter()
     report = Report()
     report.register(ConsoleReporter())
+    report.register(results)
     if args.junit_report:
         report.register(JunitReporter(args.junit_report))
+    progress = None
+    if args.progress:
+        progress = ProgressReporter()
+        report.register(progress)
+    metrics = metrics_reporter(args, report)
+    tracer = start_tracing(args)
+    history = None
+    if args.history:
+        from livedoc.history import History, HistoryReporter
+        history = History(args.history)
+        if progress is not None:
+            progress.estimates = history.durations()
+        history_run = history.start_run(args.source)
+        report.register(HistoryReporter(history, history_run))
 
-    livedoc = LiveDoc(report=report, theme_name=args.theme)
-    livedoc.process(args.source, args.output)
+    livedoc = LiveDoc(
+        report=report,
+        theme_name=args.theme,
+        deterministic=args.deterministic,
+        exceptions=ExceptionFormatter(max_value=args.max_context_value),
+        exception_sidecar=args.exception_sidecar,
+        parallel_sections=args.parallel_sections,
+        section_workers=args.section_workers,
+        baseline=baseline,
+        max_regression=args.max_regression if args.baseline else None,
+        warn_budgets=args.warn_budgets,
+        pipeline=args.pipeline,
+        check_only=args.check_only,
+        threads=args.threads,
+    )
+    if metrics is not None:
+        metrics.kind = processor_kind(livedoc)
+    try:
+        livedoc.process(args.source, args.output)
+    finally:
+        if history is not None:
+            history.finish_run(history_run, livedoc.status)
+            history.close()
+        if metrics is not None:
+            metrics.write()
+        stop_tracing(tracer, args)
+    if args.save_baseline:
+        from livedoc.budgets import save_baseline
+        save_baseline(args.save_baseline, livedoc.timings)
+    if args.dependencies:
+        from livedoc.dependencies import DependencyGraph
+        graph = DependencyGraph.load(args.dependencies)
+        graph.update(livedoc.dependencies())
+        graph.save(args.dependencies)
+    logger.info(
+        '%(total)d results: %(passed)d passed, %(failed)d failed,'
+        ' %(errors)d errors',
+        results.store.summary(),
+    )
     return livedoc.status
 
+
+def serve(args):
+    from livedoc.client import default_socket
+    parser = argparse.ArgumentParser(
+        prog='livedoc serve',
+        description='Keep LiveDoc warm and serve requests on a Unix socket',
+    )
+    parser.add_argument(
+        '-s', '--socket',
+        default=default_socket(),
+        help="Path of the Unix socket to listen on"
+    )
+    parser.add_argument(
+        '-t', '--theme',
+        default="livedoc",
+        help="Theme to be used."
+    )
+    parser.add_argument(
+        '--root',
+        default=None,
+        help="Topmost directory to look for shared fixtures"
+    )
+    parser.add_argument(
+        '-v', '--verbose',
+        action='count',
+        default=0,
+        help="Increase verbosity."
+    )
+    args = parser.parse_args(args)
+    configure_logging(args.verbose)
+
+    from livedoc.server import serve
+    serve(args.socket, theme_name=args.theme, root=args.root)
+    return 0
+
+
+def client(args):
+    from livedoc.client import Client, default_socket
+    parser = argparse.ArgumentParser(
+        prog='livedoc client',
+        description='Send a request to a running `livedoc serve`',
+    )
+    parser.add_argument(
+        'command',
+        choices=['render', 'check', 'ping', 'shutdown'],
+    )
+    parser.add_argument(
+        'path',
+        nargs='?',
+        help='Document to process'
+    )
+    parser.add_argument(
+        '-s', '--socket',
+        default=default_socket(),
+        help="Path of the server Unix socket"
+    )
+    parser.add_argument(
+        '-o', '--output',
+        default=None,
+        help="Path to leave the rendered document instead of printing it"
+    )
+    parser.add_argument(
+        '--stdin',
+        action='store_true',
+        help="Read the document content from stdin instead of from path"
+    )
+    args = parser.parse_args(args)
+    if args.command in ('render', 'check') and not args.path:
+        parser.error('path is required for %s' % args.command)
+
+    connection = Client(args.socket)
+    content = sys.stdin.read() if args.stdin else None
+    if args.command == 'render':
+        response = connection.render(args.path, content, args.output)
+    elif args.command == 'check':
+        response = connection.check(args.path, content)
+    else:
+        response = connection.request(args.command)
+
+    if 'error' in response:
+        sys.stderr.write('%s\n' % response['error'])
+        return LiveDoc.STATUS_ERROR
+    for result in response.get('results', []):
+        sys.stderr.write('%s - %s: %s... %s\n' % (
+            result['file'],
+            result['test'],
+            result['expression'],
+            'OK' if result['success'] else
+            'ERROR' if 'error' in result else 'FAIL',
+        ))
+    if response.get('html') and not args.output:
+        sys.stdout.write(response['html'])
+    return response['status']
+
+
+def coordinator(args):
+    parser = argparse.ArgumentParser(
+        prog='livedoc coordinator',
+        description='Hand documents out to `livedoc worker` processes',
+    )
+    parser.add_argument(
+        'source',
+        help='Path to be processed')
+    parser.add_argument(
+        '-o', '--output',
+        default="output",
+        help="Path to leave results"
+    )
+    parser.add_argument(
+        '-l', '--listen',
+        default='localhost:8765',
+        help="host:port or Unix socket path to wait for workers on"
+    )
+    parser.add_argument(
+        '--token',
+        default=None,
+        help="Secret workers must send, LIVEDOC_TOKEN by default; one is "
+             "made up and shown when not set"
+    )
+    parser.add_argument(
+        '-t', '--theme',
+        default="livedoc",
+        help="Theme to be used."
+    )
+    parser.add_argument(
+        '--junit-report',
+        dest='junit_report',
+        default=None,
+        help="path to junit report output"
+    )
+    parser.add_argument(
+        '--exception-sidecar',
+        dest='exception_sidecar',
+        action='store_true',
+        help="Write the full context of failures to a file loaded on demand"
+    )
+    parser.add_argument(
+        '--deterministic',
+        action='store_true',
+        help="Leave out volatile content, like render times, from outputs"
+    )
+    parser.add_argument(
+        '--progress',
+        action='store_true',
+        help="Show the files done, throughput and time left while running"
+    )
+    parser.add_argument(
+        '--metrics-file',
+        dest='metrics_file',
+        default=None,
+        help="Path to write OpenMetrics text with the metrics of the run to"
+    )
+    parser.add_argument(
+        '--metrics-interval',
+        dest='metrics_interval',
+        type=float,
+        default=None,
+        help="Also write the metrics file every this many seconds"
+    )
+    parser.add_argument(
+        '--trace',
+        default=None,
+        help="Path to write a Chrome trace of where the run spends its time"
+    )
+    parser.add_argument(
+        '-v', '--verbose',
+        action='count',
+        default=0,
+        help="Increase verbosity."
+    )
+    args = parser.parse_args(args)
+    configure_logging(args.verbose)
+
+    report = Report()
+    report.register(ConsoleReporter())
+    if args.junit_report:
+        report.register(JunitReporter(args.junit_report))
+
+    from livedoc.distributed import Coordinator
+    tracer = start_tracing(args)
+    coordinator = Coordinator(
+        args.listen,
+        args.source,
+        args.output,
+        report=report,
+        theme_name=args.theme,
+        deterministic=args.deterministic,
+        exception_sidecar=args.exception_sidecar,
+        trace=tracer is not None,
+        token=args.token,
+    )
+    if not args.token and not os.environ.get('LIVEDOC_TOKEN'):
+        logger.warning(
+            'Start workers with LIVEDOC_TOKEN=%s', coordinator.token
+        )
+    if args.progress:
+        report.register(ProgressReporter(
+            workers=lambda: coordinator.active_workers,
+        ))
+    metrics = metrics_reporter(args, report)
+    if metrics is not None:
+        metrics.kind = processor_kind(coordinator.livedoc)
+    try:
+        return coordinator.run()
+    finally:
+        if metrics is not None:
+            metrics.write()
+        stop_tracing(tracer, args)
+
+
+def metrics_reporter(args, report):
+    if not args.metrics_file:
+        return None
+    from livedoc.metrics import MetricsReporter
+    metrics = MetricsReporter(
+        args.metrics_file,
+        interval=args.metrics_interval,
+    )
+    report.register(metrics)
+    return metrics
+
+
+def start_tracing(args):
+    if not args.trace:
+        return None
+    from livedoc.tracing import ChromeTracer, set_tracer
+    tracer = ChromeTracer()
+    set_tracer(tracer)
+    return tracer
+
+
+def stop_tracing(tracer, args):
+    if tracer is None:
+        return
+    from livedoc.tracing import set_tracer
+    set_tracer(None)
+    tracer.write(args.trace)
+
+
+def processor_kind(livedoc):
+    def kind(path):
+        return livedoc.choose_processor(path).kind
+    return kind
+
+
+def worker(args):
+    parser = argparse.ArgumentParser(
+        prog='livedoc worker',
+        description='Process documents handed out by `livedoc coordinator`',
+    )
+    parser.add_argument(
+        'address',
+        help="host:port or Unix socket path of the coordinator"
+    )
+    parser.add_argument(
+        '--token',
+        default=None,
+        help="Secret of the coordinator, LIVEDOC_TOKEN by default"
+    )
+    parser.add_argument(
+        '-v', '--verbose',
+        action='count',
+        default=0,
+        help="Increase verbosity."
+    )
+    args = parser.parse_args(args)
+    configure_logging(args.verbose)
+
+    from livedoc.distributed import Worker
+    processed = Worker(args.address, token=args.token).run()
+    logger.info('Processed %d documents', processed)
+    return 0
+
+
+def history(args):
+    parser = argparse.ArgumentParser(
+        prog='livedoc history',
+        description='Query the database written with `livedoc --history`',
+    )
+    parser.add_argument(
+        'database',
+        help='Path of the history database'
+    )
+    queries = parser.add_subparsers(dest='query')
+    queries.required = True
+    runs = queries.add_parser('runs', help='List the last runs')
+    runs.add_argument('-n', '--limit', type=int, default=10)
+    slowest = queries.add_parser('slowest', help='Slowest tests of a run')
+    slowest.add_argument('-n', '--limit', type=int, default=10)
+    slowest.add_argument('--run', type=int, default=None,
+                         help='Run to look at; the last one by default')
+    trend = queries.add_parser(
+        'trend', help='Durations of a document or test along the runs')
+    trend.add_argument('path', help='Document, as given to livedoc')
+    trend.add_argument('--test', default=None, help='Test of the document')
+    trend.add_argument('-n', '--limit', type=int, default=20)
+    flaky = queries.add_parser(
+        'flaky', help='Results that both passed and failed lately')
+    flaky.add_argument('--runs', type=int, default=10,
+                       help='Number of runs to look at')
+    regressions = queries.add_parser(
+        'regressions', help='What got broken or slower between two runs')
+    regressions.add_argument('base', type=int)
+    regressions.add_argument('head', type=int)
+    regressions.add_argument('--slowdown', type=float, default=1.5,
+                             help='Ratio of durations counted as slower')
+    args = parser.parse_args(args)
+
+    from livedoc.history import History
+    db = History(args.database)
+    try:
+        if args.query == 'runs':
+            rows = db.runs(args.limit)
+        elif args.query == 'slowest':
+            rows = db.slowest(args.limit, args.run)
+        elif args.query == 'trend':
+            rows = db.trend(args.path, args.test, args.limit)
+        elif args.query == 'flaky':
+            rows = db.flaky(args.runs)
+        else:
+            failures, slower = db.regressions(
+                args.base, args.head, args.slowdown
+            )
+            rows = [('FAIL',) + tuple(x) for x in failures]
+            rows += [('SLOWER',) + tuple(x) for x in slower]
+    finally:
+        db.close()
+    for row in rows:
+        sys.stdout.write('\t'.join(
+            '%.4f' % x if isinstance(x, float) else str(x) for x in row
+        ) + '\n')
+    return 0
+
+
+def affected(args):
+    from livedoc.dependencies import DependencyGraph
+    parser = argparse.ArgumentParser(
+        prog='livedoc affected',
+        description='List the documents using any of the given files',
+        epilog='Example: git diff --name-only main | livedoc affected',
+    )
+    parser.add_argument(
+        'paths',
+        nargs='*',
+        help="Changed files; read from the standard input when not given"
+    )
+    parser.add_argument(
+        '-d', '--dependencies',
+        default=DEPENDENCIES,
+        help="File written by `livedoc --dependencies`"
+    )
+    args = parser.parse_args(args)
+    paths = args.paths or [x.strip() for x in sys.stdin if x.strip()]
+
+    documents = set(DependencyGraph.load(args.dependencies).affected(paths))
+    # documents that are new or were never processed affect themselves
+    livedoc = LiveDoc()
+    documents.update(
+        x for x in paths if os.path.isfile(x) and livedoc.is_document(x)
+    )
+    for document in sorted(documents):
+        sys.stdout.write(document + '\n')
+    return 0
+
+
+def lint(args):
+    from livedoc.lint import lint
+    parser = argparse.ArgumentParser(
+        prog='livedoc lint',
+        description='Check the anchors of every document without running '
+                    'them: syntax errors, unknown names and operators taken '
+                    'as comparisons',
+    )
+    parser.add_argument(
+        'source',
+        help='Path to be checked'
+    )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=None,
+        help="Number of processes checking documents; one per CPU by default"
+    )
+    args = parser.parse_args(args)
+
+    problems = lint(args.source, jobs=args.jobs)
+    for problem in problems:
+        sys.stdout.write(str(problem) + '\n')
+    # the same status as a run stopped by --precheck
+    return LiveDoc.STATUS_ERROR if problems else LiveDoc.STATUS_SUCCESS
+
+
+COMMANDS = {
+    'run': run,
+    'serve': serve,
+    'client': client,
+    'coordinator': coordinator,
+    'worker': worker,
+    'history': history,
+    'affected': affected,
+    'lint': lint,
+}
+
 if __name__ == '__main__':  # NOQA
     sys.exit(main())
@@ -1,7 +1,37 @@
+var livedoc_sidecar_loaded = false;
+var livedoc_sidecar_callbacks = [];
+
 function toggle_visibility(id) {
   var e = document.getElementById(id);
+  if(e.hasAttribute('data-sidecar') && !livedoc_sidecar_loaded) {
+    load_exceptions(function() { toggle_visibility(id); });
+    return;
+  }
   if(e.style.display == 'block')
     e.style.display = 'none';
   else
     e.style.display = 'block';
 }
+
+function load_exceptions(callback) {
+  livedoc_sidecar_callbacks.push(callback);
+  if(livedoc_sidecar_callbacks.length > 1)
+    return;
+  var page = window.location.pathname.split('/').pop() || 'index.html';
+  var script = document.createElement('script');
+  script.src = page.replace(/\.[^.]*$/, '') + '.exceptions.js';
+  document.head.appendChild(script);
+}
+
+function livedoc_exceptions(data) {
+  for(var id in data) {
+    var e = document.getElementById(id);
+    if(e)
+      e.firstChild.textContent = data[id];
+  }
+  livedoc_sidecar_loaded = true;
+  var callbacks = livedoc_sidecar_callbacks;
+  livedoc_sidecar_callbacks = [];
+  for(var i = 0; i < callbacks.length; i++)
+    callbacks[i]();
+}
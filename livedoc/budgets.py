@@ -0,0 +1,95 @@
+import re
+import json
+
+from livedoc.exceptions import LiveDocException
+from livedoc.output import write_if_changed
+
+DOCUMENT, SECTION, FIXTURES = 'document', 'section', 'fixtures'
+
+# option giving the budget of each kind, as a meta tag or in front matter
+OPTIONS = {
+    DOCUMENT: 'budget',
+    SECTION: 'section-budget',
+    FIXTURES: 'fixtures-budget',
+}
+
+# slowdowns smaller than this are noise, whatever the percentage
+NOISE = 0.001
+
+UNITS = {'ms': 0.001, 's': 1, 'm': 60}
+
+
+def parse_duration(text):
+    """Return the seconds in ``text``, like ``500ms``, ``2s`` or ``1.5``."""
+    match = re.match(r'^\s*([0-9.]+)\s*(ms|s|m)?\s*$', str(text))
+    if match is None:
+        raise LiveDocException('Invalid duration %r' % text)
+    return float(match.group(1)) * UNITS[match.group(2) or 's']
+
+
+class Budgets(object):
+    """Time budgets of a document, and its timings in a previous run.
+
+    ``limits`` maps each kind (document, section or fixtures) to its budget
+    in seconds. ``baseline`` holds the timings of the document in a
+    previous run, as collected in ``Context.timings``; taking more than
+    ``max_regression`` percent longer than them is reported too.
+    """
+    def __init__(self, limits=None, baseline=None, max_regression=None):
+        self.limits = limits or {}
+        self.baseline = baseline or {}
+        self.max_regression = max_regression
+
+    @classmethod
+    def from_options(cls, options, baseline=None, max_regression=None):
+        limits = {
+            kind: parse_duration(options[name])
+            for kind, name in OPTIONS.items()
+            if options.get(name)
+        }
+        return cls(limits, baseline, max_regression)
+
+    def __bool__(self):
+        return bool(self.limits) or (
+            bool(self.baseline) and self.max_regression is not None
+        )
+
+    def check(self, kind, elapsed, name=None):
+        """Return why ``elapsed`` is over budget, or None if it is not."""
+        limit = self.limits.get(kind)
+        if limit is not None and elapsed > limit:
+            return 'took %.1f ms, over its budget of %.1f ms' % (
+                elapsed * 1000, limit * 1000,
+            )
+        base = self._baseline(kind, name)
+        if base is None or self.max_regression is None:
+            return None
+        if elapsed - base > max(NOISE, base * self.max_regression / 100):
+            return 'took %.1f ms, %.0f%% over the baseline of %.1f ms' % (
+                elapsed * 1000,
+                (elapsed - base) * 100 / base if base else 100,
+                base * 1000,
+            )
+        return None
+
+    def _baseline(self, kind, name):
+        if kind == SECTION:
+            return self.baseline.get('sections', {}).get(name)
+        return self.baseline.get(kind)
+
+
+def describe(kind, name=None):
+    """Return what a budget of ``kind`` is about, like ``Section "Intro"``."""
+    if kind == SECTION:
+        return 'Section "%s"' % name
+    return kind.capitalize()
+
+
+def load_baseline(path):
+    """Return the timings of every document saved by ``save_baseline``."""
+    with open(path) as fd:
+        return json.load(fd)
+
+
+def save_baseline(path, timings):
+    write_if_changed(path, json.dumps(timings, indent=2, sort_keys=True))
@@ -0,0 +1,56 @@
+import os
+import json
+import socket
+import tempfile
+
+
+def default_socket():
+    directory = os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+    return os.path.join(directory, 'livedoc-%d.sock' % os.getuid())
+
+
+class Client(object):
+    """Talks to a ``livedoc serve`` process over its Unix socket.
+
+    It only depends on the standard library, so it starts fast enough to be
+    run on every save from an editor.
+    """
+    def __init__(self, path=None, timeout=None):
+        self.path = path or default_socket()
+        self.timeout = timeout
+
+    def request(self, command, **kwargs):
+        kwargs['command'] = command
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.path)
+            sock.sendall(json.dumps(kwargs).encode() + b'\n')
+            with sock.makefile('rb') as fd:
+                line = fd.readline()
+        finally:
+            sock.close()
+        if not line:
+            raise ConnectionError('No response from %s' % self.path)
+        return json.loads(line.decode())
+
+    def ping(self):
+        return self.request('ping')
+
+    def render(self, path, content=None, output=None):
+        return self.request(
+            'render',
+            path=os.path.abspath(path),
+            content=content,
+            output=output and os.path.abspath(output),
+        )
+
+    def check(self, path, content=None):
+        return self.request(
+            'check',
+            path=os.path.abspath(path),
+            content=content,
+        )
+
+    def shutdown(self):
+        return self.request('shutdown')
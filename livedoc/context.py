@@ -0,0 +1,40 @@
+import copy
+import itertools
+
+
+class Context(object):
+    """Evaluation state of a single document.
+
+    Holds the variables read and written by the expressions, and what is
+    collected while rendering the document, so processors keep no state
+    between documents and can be shared between threads. ``timings`` gets
+    how long the document, its fixtures and each of its sections took, and
+    ``baseline`` may hold the same timings from a previous run.
+    """
+    def __init__(self, fixtures=None):
+        self.fixtures = {} if fixtures is None else fixtures
+        self.variables = {}
+        self.tracebacks = {}
+        self.sidecar = {}
+        self.timings = {}
+        self.baseline = None
+        self.reset()
+
+    def reset(self):
+        """Forget every variable and result, keeping the fixtures."""
+        self.variables.clear()
+        self.variables['__builtins__'] = {}
+        self.tracebacks.clear()
+        self.sidecar.clear()
+        self.timings.clear()
+        self.ids = itertools.count()
+
+    def child(self):
+        """Return the context of a nested scope, like a table row.
+
+        It starts with a copy of the current variables, so assignments done
+        inside it are not seen outside, and shares everything else.
+        """
+        child = copy.copy(self)
+        child.variables = dict(self.variables)
+        return child
@@ -0,0 +1,131 @@
+import os
+import sys
+import json
+import types
+import builtins
+
+from livedoc.output import write_if_changed
+
+DEFAULT_PATH = '.livedoc-dependencies.json'
+
+_installed = None
+_files = {}
+
+
+def recording_builtins(modules):
+    """Return builtins whose ``__import__`` adds every module it imports,
+    including the submodules named in ``from ... import``, to ``modules``.
+    """
+    def __import__(name, globals=None, locals=None, fromlist=(), level=0):
+        module = builtins.__import__(name, globals, locals, fromlist, level)
+        if level == 0:
+            modules.add(sys.modules.get(name, module))
+        else:
+            modules.add(module)
+        for item in fromlist or ():
+            value = getattr(module, item, None)
+            if isinstance(value, types.ModuleType):
+                modules.add(value)
+        return module
+    return dict(vars(builtins), __import__=__import__)
+
+
+def module_files(modules):
+    """Return the source files of ``modules`` and of the project modules
+    they use, found through the modules and objects in their globals.
+    """
+    result = set()
+    for module in modules:
+        result.update(_module_files(module))
+    return result
+
+
+def _module_files(root):
+    name = getattr(root, '__name__', None)
+    cached = _files.get(name)
+    if cached is not None and cached[0] is root:
+        return cached[1]
+    files = set()
+    seen = set()
+    pending = [root]
+    while pending:
+        module = pending.pop()
+        if id(module) in seen:
+            continue
+        seen.add(id(module))
+        filename = _local_file(module)
+        if filename is None:
+            continue
+        files.add(filename)
+        for value in list(vars(module).values()):
+            if not isinstance(value, types.ModuleType):
+                try:
+                    value = sys.modules.get(value.__module__)
+                except Exception:
+                    continue
+            if value is not None:
+                pending.append(value)
+    _files[name] = (root, files)
+    return files
+
+
+def _local_file(module):
+    filename = getattr(module, '__file__', None)
+    if not filename:
+        return None
+    filename = os.path.abspath(filename)
+    if filename.startswith(_installed_paths()):
+        return None
+    if filename.endswith(('.pyc', '.pyo')):
+        filename = filename[:-1]
+    return filename
+
+
+def _installed_paths():
+    # installed code does not change between runs, so it is not followed
+    global _installed
+    if _installed is None:
+        import sysconfig
+        paths = sysconfig.get_paths()
+        _installed = tuple(
+            os.path.join(os.path.abspath(paths[name]), '')
+            for name in ('stdlib', 'platstdlib', 'purelib', 'platlib')
+        )
+    return _installed
+
+
+class DependencyGraph(object):
+    """The files each document used the last time it was processed.
+
+    Documents are kept as they were given, and files as absolute paths.
+    """
+    def __init__(self, documents=None):
+        self.documents = documents or {}
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls()
+        with open(path) as fd:
+            return cls(json.load(fd))
+
+    def save(self, path):
+        write_if_changed(
+            path,
+            json.dumps(self.documents, indent=2, sort_keys=True),
+        )
+
+    def update(self, dependencies):
+        """Replace the files of the documents in ``dependencies``."""
+        for document, files in dependencies.items():
+            self.documents[document] = sorted(
+                os.path.abspath(x) for x in files
+            )
+
+    def affected(self, paths):
+        """Return the documents using any of ``paths``, sorted."""
+        changed = set(os.path.abspath(x) for x in paths)
+        return sorted(
+            document for document, files in self.documents.items()
+            if changed.intersection(files)
+        )
@@ -0,0 +1,187 @@
+import os
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+IGNORE_FILENAME = '.livedocignore'
+DEFAULT_IGNORE = ['*~', '*.py', IGNORE_FILENAME]
+
+
+class WorkItem(object):
+    def __init__(self, source, target):
+        self.source = source
+        self.target = target
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, WorkItem) and
+            (self.source, self.target) == (other.source, other.target)
+        )
+
+    def __repr__(self):
+        return 'WorkItem(%r, %r)' % (self.source, self.target)
+
+
+class IgnorePattern(object):
+    """A single gitignore-style pattern.
+
+    Supports comments, ``!`` negation, trailing ``/`` for directories only,
+    anchoring with a leading or middle ``/``, and the ``*``, ``?``, ``[]``
+    and ``**`` wildcards.
+    """
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.negated = pattern.startswith('!')
+        if self.negated:
+            pattern = pattern[1:]
+        if pattern.startswith('\\'):
+            pattern = pattern[1:]
+        self.dir_only = pattern.endswith('/')
+        pattern = pattern.rstrip('/')
+        anchored = '/' in pattern
+        pattern = pattern.lstrip('/')
+        regex = self._translate(pattern)
+        if not anchored:
+            regex = '(?:.*/)?' + regex
+        self._regex = re.compile(regex + '$')
+
+    def match(self, path, is_dir):
+        if self.dir_only and not is_dir:
+            return False
+        return self._regex.match(path) is not None
+
+    def _translate(self, pattern):
+        result = []
+        i, n = 0, len(pattern)
+        while i < n:
+            if pattern.startswith('**/', i):
+                result.append('(?:.*/)?')
+                i += 3
+            elif pattern.startswith('**', i):
+                result.append('.*')
+                i += 2
+            elif pattern[i] == '*':
+                result.append('[^/]*')
+                i += 1
+            elif pattern[i] == '?':
+                result.append('[^/]')
+                i += 1
+            elif pattern[i] == '[' and self._bracket_end(pattern, i) > 0:
+                end = self._bracket_end(pattern, i)
+                chars = pattern[i + 1:end]
+                if chars.startswith('!'):
+                    chars = '^' + chars[1:]
+                result.append('[%s]' % chars.replace('\\', '\\\\'))
+                i = end + 1
+            else:
+                result.append(re.escape(pattern[i]))
+                i += 1
+        return ''.join(result)
+
+    def _bracket_end(self, pattern, start):
+        i = start + 1
+        if pattern[i:i + 1] in ('!', '^'):
+            i += 1
+        if pattern[i:i + 1] == ']':
+            i += 1
+        return pattern.find(']', i)
+
+    def __repr__(self):
+        return 'IgnorePattern(%r)' % self.pattern
+
+
+class IgnoreRules(object):
+    """Chain of ignore patterns, one link per ``.livedocignore`` file.
+
+    ``base`` is the path of the directory owning the patterns, relative to
+    the discovery root and using ``/`` as separator. Patterns in deeper
+    files, and later patterns in the same file, take precedence.
+    """
+    def __init__(self, patterns=(), base='', parent=None):
+        self.patterns = [
+            IgnorePattern(p) for p in patterns
+            if p.strip() and not p.startswith('#')
+        ]
+        self.base = base
+        self.parent = parent
+
+    @classmethod
+    def from_file(cls, filename, base='', parent=None):
+        with open(filename) as fd:
+            lines = [line.rstrip('\n').rstrip() for line in fd]
+        return cls(lines, base=base, parent=parent)
+
+    def ignored(self, path, is_dir=False):
+        result = self._match(path, is_dir)
+        return bool(result)
+
+    def _match(self, path, is_dir):
+        result = None
+        if self.parent is not None:
+            result = self.parent._match(path, is_dir)
+        relpath = path
+        if self.base:
+            if not path.startswith(self.base + '/'):
+                return result
+            relpath = path[len(self.base) + 1:]
+        for pattern in self.patterns:
+            if pattern.match(relpath, is_dir):
+                result = not pattern.negated
+        return result
+
+
+def discover(source, target, ignore=None):
+    """Yield a ``WorkItem`` for every document found under ``source``.
+
+    The tree is walked with ``os.scandir`` and an explicit stack, so no
+    extra ``stat`` call is done per entry and items are produced while the
+    walk is still running. Ignored directories are never entered, and
+    neither is a directory already walked through another symbolic link, so
+    links pointing up the tree do not loop.
+    """
+    rules = IgnoreRules(DEFAULT_IGNORE if ignore is None else ignore)
+    if not os.path.isdir(source):
+        if not rules.ignored(os.path.basename(source)):
+            yield WorkItem(source, target)
+        return
+
+    stack = [(source, target, '', rules)]
+    visited = set()
+    while stack:
+        directory, target_dir, relpath, rules = stack.pop()
+        stat = os.stat(directory)
+        if (stat.st_dev, stat.st_ino) in visited:
+            logger.info('Ignoring %s, already discovered', directory)
+            continue
+        visited.add((stat.st_dev, stat.st_ino))
+        entries = sorted(os.scandir(directory), key=lambda x: x.name)
+        if any(x.name == IGNORE_FILENAME for x in entries):
+            rules = IgnoreRules.from_file(
+                os.path.join(directory, IGNORE_FILENAME),
+                base=relpath,
+                parent=rules,
+            )
+        subdirectories = []
+        for entry in entries:
+            path = '%s/%s' % (relpath, entry.name) if relpath else entry.name
+            is_dir = entry.is_dir()
+            if rules.ignored(path, is_dir):
+                logger.debug('Ignoring %s', entry.path)
+                continue
+            if is_dir:
+                subdirectories.append((
+                    entry.path,
+                    os.path.join(target_dir, entry.name),
+                    path,
+                    rules,
+                ))
+            elif entry.is_file():
+                name, ext = os.path.splitext(entry.name)
+                yield WorkItem(
+                    entry.path,
+                    os.path.join(target_dir, '%s.html' % name),
+                )
+            else:
+                logger.info('Ignoring file %s', entry.path)
+        stack.extend(reversed(subdirectories))
@@ -0,0 +1,481 @@
+import os
+import hmac
+import json
+import time
+import shutil
+import socket
+import logging
+import secrets
+import tempfile
+import threading
+import traceback
+import collections
+import socketserver
+
+from livedoc import LiveDoc, tracing
+from livedoc.discovery import discover
+from livedoc.exceptions import LiveDocException
+from livedoc.fixtures import FixtureLoader
+from livedoc.output import write_if_changed
+from livedoc.processors import CopyProcessor
+from livedoc.reports import Report, Reporter, MemoryReporter
+
+logger = logging.getLogger(__name__)
+
+WAIT = 0.1
+# where workers, and coordinators not given one, take the token from
+TOKEN_VARIABLE = 'LIVEDOC_TOKEN'
+
+
+def parse_address(address):
+    """Return the socket family and address of ``host:port`` or a path."""
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit() and os.sep not in address:
+        return socket.AF_INET, (host or 'localhost', int(port))
+    return socket.AF_UNIX, address
+
+
+def inside(root, name):
+    """Return ``name``, a relative path received from the other side, joined
+    to ``root``. Paths leading out of ``root`` are refused.
+    """
+    path = os.path.normpath(os.path.join(root, name))
+    if not path.startswith(os.path.join(root, '')):
+        raise LiveDocException(
+            'Refusing path outside of %s: %s' % (root, name)
+        )
+    return path
+
+
+def format_address(family, address):
+    if family == socket.AF_UNIX:
+        return address
+    return '%s:%d' % address[:2]
+
+
+class CoordinatorHandler(socketserver.StreamRequestHandler):
+    """Serves the requests of one worker, one JSON object per line."""
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                response = self.server.dispatch(
+                    json.loads(line.decode()),
+                    self,
+                )
+            except Exception as e:
+                logger.exception('Worker request failed')
+                response = {'error': str(e)}
+            self.wfile.write(json.dumps(response).encode() + b'\n')
+            self.wfile.flush()
+
+    def finish(self):
+        super().finish()
+        self.server.release(self)
+
+
+class Coordinator(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    """Hands the documents under ``source`` out to connected workers.
+
+    Workers first receive the options of the run and every fixtures file
+    below ``source``, then ask for documents one at a time and send back
+    the rendered HTML and results. Outputs are written by the coordinator,
+    and results reported, in discovery order. Documents a worker was busy
+    with when it disconnected are handed to another one, and files that
+    are only copied never leave the coordinator. A document whose workers
+    went away ``MAX_ATTEMPTS`` times is reported as an error instead.
+
+    Every request must carry ``token``. When none is given, it is taken
+    from the ``LIVEDOC_TOKEN`` environment variable, or made up.
+    """
+    MAX_ATTEMPTS = 3
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, source, target, report=None, theme_name=None,
+                 deterministic=False, exception_sidecar=False, trace=False,
+                 token=None):
+        self.address_family, address = parse_address(address)
+        self.token = (
+            token or os.environ.get(TOKEN_VARIABLE) or
+            secrets.token_urlsafe(16)
+        )
+        self.source = source
+        self.target = target
+        self.livedoc = LiveDoc(
+            report=report,
+            theme_name=theme_name,
+            deterministic=deterministic,
+            exception_sidecar=exception_sidecar,
+        )
+        self.options = dict(
+            theme_name=theme_name,
+            deterministic=deterministic,
+            exception_sidecar=exception_sidecar,
+            trace=trace,
+        )
+        self.items = list(discover(source, target))
+        self.root = source
+        if not os.path.isdir(source):
+            self.root = os.path.dirname(source)
+        self._queue = collections.deque()
+        self._busy = {}
+        self._done = {}
+        self._attempts = collections.Counter()
+        self._fixtures = set()
+        loader = FixtureLoader(self.root)
+        for index, item in enumerate(self.items):
+            processor = self.livedoc.choose_processor(item.source)
+            if isinstance(processor, CopyProcessor):
+                self._done[index] = None
+            else:
+                self._queue.append(index)
+                self._fixtures.update(loader.scope(item.source))
+        self._reported = 0
+        self._flushed = 0
+        self._lock = threading.Condition()
+        self._writing = threading.Lock()
+        if self.address_family == socket.AF_UNIX and os.path.exists(address):
+            os.unlink(address)
+        super().__init__(address, CoordinatorHandler)
+
+    @property
+    def address(self):
+        return format_address(self.address_family, self.server_address)
+
+    @property
+    def active_workers(self):
+        """Number of workers processing a document."""
+        with self._lock:
+            return len(set(self._busy.values()))
+
+    def dispatch(self, request, handler):
+        token = str(request.get('token') or '')
+        if not hmac.compare_digest(token.encode(), self.token.encode()):
+            raise LiveDocException('Invalid token')
+        command = request.get('command')
+        if command == 'hello':
+            return dict(self.options, fixtures=self.bundle())
+        if command == 'next':
+            return self.next_item(handler)
+        if command == 'result':
+            return self.add_result(request)
+        raise LiveDocException('Unknown command %s' % command)
+
+    def bundle(self):
+        """Return the content of the fixtures files of the documents to
+        process, by relative path.
+        """
+        result = {}
+        for filename in sorted(self._fixtures):
+            if not os.path.exists(filename):
+                continue
+            with open(filename) as fd:
+                result[os.path.relpath(filename, self.root)] = fd.read()
+        return result
+
+    def next_item(self, handler):
+        with self._lock:
+            if not self._queue:
+                return {'wait': WAIT} if self._busy else {'item': None}
+            index = self._queue.popleft()
+            self._busy[index] = handler
+        item = self.items[index]
+        with open(item.source) as fd:
+            content = fd.read()
+        return {'item': dict(
+            id=index,
+            name=self._relative(item.source),
+            content=content,
+        )}
+
+    def add_result(self, request):
+        with self._lock:
+            index = request['id']
+            if request.get('trace'):
+                tracing.get_tracer().extend(request['trace'])
+            if index not in self._busy:
+                # already done by a worker it was handed to again
+                return {'status': LiveDoc.STATUS_SUCCESS}
+            self._finish(index, request)
+        self._flush()
+        return {'status': LiveDoc.STATUS_SUCCESS}
+
+    def release(self, handler):
+        """Queue again the documents of a worker that went away."""
+        with self._lock:
+            for index, owner in list(self._busy.items()):
+                if owner is not handler:
+                    continue
+                source = self.items[index].source
+                self._attempts[index] += 1
+                if self._attempts[index] >= self.MAX_ATTEMPTS:
+                    logger.error(
+                        'Worker left, giving up on %s after %d attempts',
+                        source,
+                        self._attempts[index],
+                    )
+                    self._finish(index, self._abandoned(index))
+                    continue
+                logger.warning('Worker left, queueing %s again', source)
+                del self._busy[index]
+                self._queue.appendleft(index)
+            self._lock.notify_all()
+        self._flush()
+
+    def _abandoned(self, index):
+        return dict(
+            status=LiveDoc.STATUS_ERROR,
+            html=None,
+            results=[dict(
+                test=Reporter.DEFAULT_TESTNAME,
+                expression=self._relative(self.items[index].source),
+                error='Abandoned after %d workers went away processing it'
+                      % self._attempts[index],
+            )],
+        )
+
+    def wait(self, timeout=None):
+        """Block until every document is done; return False on timeout."""
+        deadline = None if timeout is None else time.time() + timeout
+        self._flush()
+        with self._lock:
+            while self._reported < len(self.items):
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        return False
+                self._lock.wait(remaining)
+        return True
+
+    def run(self, timeout=None):
+        """Serve workers until every document is done; return the status."""
+        self.livedoc.report.run_start([item.source for item in self.items])
+        thread = threading.Thread(target=self.serve_forever)
+        thread.start()
+        try:
+            logger.info(
+                'Waiting for workers on %s to process %d files',
+                self.address,
+                len(self.items),
+            )
+            if not self.wait(timeout):
+                raise LiveDocException('Timed out waiting for workers')
+            self.livedoc.theme.copy_assets(self.target)
+        finally:
+            self.shutdown()
+            thread.join()
+            self.server_close()
+        return self.livedoc.status
+
+    def server_close(self):
+        super().server_close()
+        if self.address_family == socket.AF_UNIX:
+            try:
+                os.unlink(self.server_address)
+            except OSError:
+                pass
+
+    def _finish(self, index, response):
+        del self._busy[index]
+        self._done[index] = response
+
+    def _flush(self):
+        """Write and report the documents done, in order.
+
+        Called without holding the lock, so workers are not kept waiting
+        while outputs are written. One thread writes at a time; the others
+        leave what they finished to it.
+        """
+        while self._writing.acquire(blocking=False):
+            try:
+                with self._lock:
+                    ready = []
+                    while self._flushed in self._done:
+                        ready.append((
+                            self.items[self._flushed],
+                            self._done.pop(self._flushed),
+                        ))
+                        self._flushed += 1
+                for item, response in ready:
+                    if response is None:
+                        self.livedoc.process_file(item.source, item.target)
+                    else:
+                        self._write(item, response)
+                with self._lock:
+                    self._reported += len(ready)
+                    self._lock.notify_all()
+            finally:
+                self._writing.release()
+            with self._lock:
+                # finished while this thread was writing
+                if self._flushed not in self._done:
+                    return
+
+    def _write(self, item, response):
+        report = self.livedoc.report
+        report.test_file(item.source)
+        test = Reporter.DEFAULT_TESTNAME
+        for result in response['results']:
+            if result['test'] != test:
+                test = result['test']
+                report.test_name(test)
+            if 'error' in result:
+                report.add_exception(result['expression'], result['error'])
+            else:
+                report.add_comparison(
+                    result['expression'],
+                    result['resolved'],
+                    result['success'],
+                )
+        start = time.perf_counter()
+        if response['html'] is not None:
+            write_if_changed(item.target, response['html'])
+            self.livedoc._write_sidecar(response.get('sidecar'), item.target)
+        timings = dict(response.get('timings', {}))
+        timings['write'] = time.perf_counter() - start
+        report.add_timings(timings)
+        report.file_finish()
+        self.livedoc.status = max(self.livedoc.status, response['status'])
+
+    def _relative(self, path):
+        if os.path.isdir(self.source):
+            return os.path.relpath(path, self.source)
+        return os.path.basename(path)
+
+
+class Connection(object):
+    """A persistent JSON lines connection to a coordinator, sending
+    ``token`` with every request.
+    """
+    def __init__(self, address, timeout=None, token=None):
+        self.token = token
+        family, address = parse_address(address)
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(address)
+        self.rfile = self.sock.makefile('rb')
+
+    def request(self, command, **kwargs):
+        kwargs['command'] = command
+        if self.token is not None:
+            kwargs['token'] = self.token
+        self.sock.sendall(json.dumps(kwargs).encode() + b'\n')
+        line = self.rfile.readline()
+        if not line:
+            raise ConnectionError('The coordinator closed the connection')
+        response = json.loads(line.decode())
+        if 'error' in response:
+            raise LiveDocException(response['error'])
+        return response
+
+    def close(self):
+        self.rfile.close()
+        self.sock.close()
+
+
+class Worker(object):
+    """Evaluates documents handed out by a coordinator until none are left.
+
+    The fixtures files are written to a temporary directory, laid out as in
+    the source tree, so they are loaded the same way as in a local run.
+    ``token`` is the one of the coordinator, taken from the
+    ``LIVEDOC_TOKEN`` environment variable when not given.
+    """
+    def __init__(self, address, timeout=None, token=None):
+        self.address = address
+        self.timeout = timeout
+        self.token = token or os.environ.get(TOKEN_VARIABLE)
+        self.processed = 0
+
+    def run(self):
+        connection = Connection(self.address, self.timeout, self.token)
+        root = tempfile.mkdtemp(prefix='livedoc-worker-')
+        previous = None
+        try:
+            options = connection.request('hello')
+            if options.get('trace'):
+                previous = tracing.set_tracer(tracing.ChromeTracer(
+                    'livedoc worker %d' % os.getpid(),
+                ))
+            livedoc = self._livedoc(root, options)
+            try:
+                self._loop(connection, livedoc, root)
+            finally:
+                livedoc.fixtures.teardown()
+                livedoc.log_statistics()
+        finally:
+            if previous is not None:
+                tracing.set_tracer(previous)
+            connection.close()
+            shutil.rmtree(root, ignore_errors=True)
+        return self.processed
+
+    def _livedoc(self, root, options):
+        for name, content in options['fixtures'].items():
+            filename = inside(root, name)
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+            with open(filename, 'w') as fd:
+                fd.write(content)
+        self.results = MemoryReporter()
+        report = Report()
+        report.register(self.results)
+        livedoc = LiveDoc(
+            report=report,
+            theme_name=options['theme_name'],
+            deterministic=options['deterministic'],
+            exception_sidecar=options['exception_sidecar'],
+        )
+        livedoc.fixtures.root = root
+        return livedoc
+
+    def _loop(self, connection, livedoc, root):
+        while True:
+            response = connection.request('next')
+            if 'wait' in response:
+                time.sleep(response['wait'])
+                continue
+            item = response['item']
+            if item is None:
+                return
+            logger.info('Processing %s', item['name'])
+            path = inside(root, item['name'])
+            self.results.clear()
+            livedoc.report.test_file(path)
+            try:
+                html, status, context = livedoc._process(
+                    path,
+                    item['content'],
+                )
+                sidecar, timings = context.sidecar, context.timings
+            except Exception:
+                # like fixtures failing to load; the next worker would fail
+                # the same way, so it is reported instead of handed out again
+                logger.exception('Processing %s failed', item['name'])
+                livedoc.report.add_exception(
+                    item['name'],
+                    traceback.format_exc(),
+                )
+                html, status = None, LiveDoc.STATUS_ERROR
+                sidecar, timings = None, {}
+            finally:
+                livedoc.report.file_finish()
+            connection.request(
+                'result',
+                id=item['id'],
+                status=status,
+                html=html,
+                results=self.results.results,
+                sidecar=sidecar,
+                timings=timings,
+                trace=self._trace(),
+            )
+            self.processed += 1
+
+    def _trace(self):
+        tracer = tracing.get_tracer()
+        if isinstance(tracer, tracing.ChromeTracer):
+            return tracer.drain()
+        return None
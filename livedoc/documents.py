@@ -0,0 +1,45 @@
+class Document(object):
+    """A document to be processed in memory.
+
+    ``name`` is used to choose the processor and to identify the results.
+    ``fixtures`` may be a dict with the fixtures themselves, a string with
+    the Python code defining them, or None.
+    """
+    def __init__(self, name, content, fixtures=None):
+        self.name = name
+        self.content = content
+        self.fixtures = fixtures
+
+    @classmethod
+    def from_item(cls, item):
+        if isinstance(item, cls):
+            return item
+        return cls(*item)
+
+    def __repr__(self):
+        return 'Document(%r)' % self.name
+
+
+class RenderedDocument(object):
+    """Output of processing a ``Document``.
+
+    ``results`` holds one dict per comparison or exception, as produced by
+    ``livedoc.reports.MemoryReporter``. ``sidecar`` maps the ids of the
+    exceptions moved out of the page to their tracebacks, and is empty unless
+    ``exception_sidecar`` is set.
+    """
+    SUCCESS, FAILURE, ERROR = range(3)
+
+    def __init__(self, name, html, status, results, sidecar=None):
+        self.name = name
+        self.html = html
+        self.status = status
+        self.results = results
+        self.sidecar = {} if sidecar is None else sidecar
+
+    @property
+    def success(self):
+        return self.status == self.SUCCESS
+
+    def __repr__(self):
+        return 'RenderedDocument(%r, status=%d)' % (self.name, self.status)
@@ -1,8 +1,8 @@
 import tokenize
 import logging
 from io import BytesIO
-from lxml import etree
 
+from livedoc import loops
 from livedoc.reports import Report
 from livedoc.theme import Theme
 
@@ -16,6 +16,15 @@ class Expression(object):
         self.theme = theme or Theme()
 
     def evaluate(self, variables, fixtures):
+        values = loops.resolve(self.prepare(variables, fixtures))
+        self.complete(values, variables)
+
+    def prepare(self, variables, fixtures):
+        """Evaluate the raw values, which may still be awaitable."""
+        raise NotImplementedError()
+
+    def complete(self, values, variables):
+        """Finish the evaluation once every value has been resolved."""
         raise NotImplementedError()
 
     @property
@@ -48,9 +57,11 @@ class Assignment(Expression):
         self.right = right
         self.result = None
 
-    def evaluate(self, variables, fixtures):
-        r = eval(self.right, fixtures, variables)
-        self.result = self.autotype(r)
+    def prepare(self, variables, fixtures):
+        return [eval(self.right, fixtures, variables)]
+
+    def complete(self, values, variables):
+        self.result = self.autotype(values[0])
         variables[self.left] = self.result
         if self._setting_testname:
             self.report.test_name(self.result)
@@ -59,9 +70,9 @@ class Assignment(Expression):
         return self.right
 
     def as_xml(self):
-        span = etree.Element('span')
-        if not self._setting_testname:
-            span.attrib['class'] = self.theme.get_classes('info')
+        span = self.theme.fragment(
+            'plain' if self._setting_testname else 'info'
+        )
         span.text = str(self.result)
         return span
 
@@ -80,13 +91,18 @@ class Comparison(Expression):
         self.success = False
         self.text = None
 
-    def evaluate(self, variables, fixtures):
-        self.left_result = eval(self.left, fixtures, variables)
-        self.right_result = eval(self.right, fixtures, variables)
-        self.success = self._operate(fixtures)
+    def prepare(self, variables, fixtures):
         self.text = variables.get('TEXT')
+        return [
+            eval(self.left, fixtures, variables),
+            eval(self.right, fixtures, variables),
+        ]
+
+    def complete(self, values, variables):
+        self.left_result, self.right_result = values
+        self.success = self._operate()
 
-    def _operate(self, fixtures):
+    def _operate(self):
         l = self.autotype(self.left_result)
         r = self.autotype(self.right_result)
         result = eval("l %s r" % self.operator, {'l': l, 'r': r})
@@ -98,25 +114,13 @@ class Comparison(Expression):
         return result
 
     def as_xml(self):
-        span = etree.Element('span')
         if self.success:
-            span.attrib['class'] = self.theme.get_classes('success')
+            span = self.theme.fragment('success')
             span.text = str(self.text)
         else:
-            span.attrib['class'] = self.theme.get_classes('failure')
-            old_span = etree.Element('span')
-            old_span.attrib['class'] = self.theme.get_classes(
-                    'failure_expected')
-            old_span.text = str(self.left_result)
-            span.append(old_span)
-            space_span = etree.Element('span')
-            space_span.text = ' '
-            span.append(space_span)
-            new_span = etree.Element('span')
-            new_span.attrib['class'] = self.theme.get_classes(
-                    'failure_result')
-            new_span.text = str(self.right_result)
-            span.append(new_span)
+            span = self.theme.fragment('failure')
+            span[0].text = str(self.left_result)
+            span[2].text = str(self.right_result)
         return span
 
     @property
@@ -135,29 +139,16 @@ class Call(Expression):
         self.expression = expression
         self.result = None
 
-    def evaluate(self, variables, fixtures):
-        self.result = eval(self.expression, fixtures, variables)
+    def prepare(self, variables, fixtures):
+        return [eval(self.expression, fixtures, variables)]
 
-    def as_xml(self):
-        span = etree.Element('span')
-        span.attrib['class'] = self.theme.get_classes(
-                '%s_span' % self.css_class)
-        inner1 = etree.Element('span')
-        inner1.attrib['class'] = self.theme.get_classes(
-                '%s_expression' % self.css_class)
-        inner1.text = str(self.expression)
-        span.append(inner1)
-        inner2 = etree.Element('span')
-        inner2.attrib['class'] = self.theme.get_classes(
-                '%s_separator' % self.css_class)
-        inner2.text = ' '
-        span.append(inner2)
-        inner2 = etree.Element('span')
-        inner2.attrib['class'] = self.theme.get_classes(
-                '%s_result' % self.css_class)
-        inner2.text = str(self.result)
-        span.append(inner2)
+    def complete(self, values, variables):
+        self.result = values[0]
 
+    def as_xml(self):
+        span = self.theme.fragment(self.css_class)
+        span[0].text = str(self.expression)
+        span[2].text = str(self.result)
         return span
 
     def __str__(self):
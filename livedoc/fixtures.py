@@ -0,0 +1,173 @@
+import os
+import logging
+import threading
+import contextlib
+
+from livedoc.dependencies import recording_builtins, module_files
+from livedoc.tracing import span
+
+logger = logging.getLogger(__name__)
+
+DIRECTORY_FIXTURES = 'livedoc_fixtures.py'
+TEARDOWN = 'teardown'
+
+
+class FixtureLoader(object):
+    """Loads fixtures for documents, sharing directory-level ones.
+
+    Every directory between ``root`` and a document may contain a
+    ``livedoc_fixtures.py`` file. Each one is executed once per run, on top
+    of the fixtures of its parent directory, and everything it defines is
+    visible to the documents below it. The fixtures of a document, in the
+    sibling ``<document>.py`` file, are executed on top of those for every
+    document.
+
+    A fixtures file may define a ``teardown()`` function. Document ones are
+    called when the document is finished; directory ones in reverse order
+    when ``teardown`` is called on the loader.
+
+    ``dependencies`` maps every document loaded to the files its result
+    depends on: itself, the fixtures files that apply to it, whether they
+    exist or not, and the project modules they import.
+
+    Documents may be loaded from several threads. Directory fixtures are
+    still executed once, and their variables are shared by every thread,
+    so documents must not change the objects they hold.
+    """
+    def __init__(self, root=None):
+        self.root = root
+        self.dependencies = {}
+        self._scopes = {}
+        self._scope_files = {}
+        self._teardowns = []
+        self._files = {}
+        self._lock = threading.RLock()
+
+    @contextlib.contextmanager
+    def document(self, source):
+        with span('fixtures'):
+            variables = self.load(source)
+        base = self.directory(os.path.dirname(source))
+        try:
+            yield variables
+        finally:
+            teardown = self._own_teardown(variables, base)
+            if teardown is not None:
+                self._call(teardown)
+
+    def load(self, source):
+        path = os.path.dirname(source)
+        base = self.directory(path)
+        filename, ext = os.path.splitext(source)
+        files = {source, filename + '.py'}
+        files.update(self._scope_files[os.path.normpath(path or '.')])
+        variables = self._execute(filename + '.py', base, files)
+        self.dependencies[source] = files
+        return variables
+
+    def directory(self, path):
+        path = os.path.normpath(path or '.')
+        variables = self._scopes.get(path)
+        if variables is not None:
+            return variables
+        with self._lock:
+            if path in self._scopes:
+                return self._scopes[path]
+            return self._load_directory(path)
+
+    def _load_directory(self, path):
+        parent = os.path.dirname(path)
+        files = set()
+        if self._is_root(path) or parent == path:
+            base = {}
+        else:
+            base = self.directory(parent)
+            files.update(self._scope_files[parent])
+        filename = os.path.join(path, DIRECTORY_FIXTURES)
+        files.add(filename)
+        self._files[filename] = self._mtime(filename)
+        variables = self._execute(filename, base, files)
+        self._scope_files[path] = files
+        teardown = self._own_teardown(variables, base)
+        if teardown is not None:
+            self._teardowns.append(teardown)
+        self._scopes[path] = variables
+        return variables
+
+    def scope(self, source):
+        """Return the fixtures files that apply to a document, outermost
+        first, whether they exist or not. Nothing is executed.
+        """
+        files = []
+        path = os.path.normpath(os.path.dirname(source) or '.')
+        while True:
+            files.append(os.path.join(path, DIRECTORY_FIXTURES))
+            parent = os.path.dirname(path)
+            if self._is_root(path) or parent == path:
+                break
+            path = parent
+        files.reverse()
+        files.append(os.path.splitext(source)[0] + '.py')
+        return files
+
+    def teardown(self):
+        with self._lock:
+            while self._teardowns:
+                self._call(self._teardowns.pop())
+            self._scopes.clear()
+            self._scope_files.clear()
+            self._files.clear()
+
+    def refresh(self):
+        """Tear everything down if a directory fixtures file changed.
+
+        Used by long running processes, so edited fixtures are picked up
+        without restarting them.
+        """
+        for filename, mtime in self._files.items():
+            if self._mtime(filename) != mtime:
+                logger.info('Fixtures changed in %s, reloading', filename)
+                self.teardown()
+                return True
+        return False
+
+    def _mtime(self, filename):
+        try:
+            return os.stat(filename).st_mtime
+        except OSError:
+            return None
+
+    def _is_root(self, path):
+        if self.root is None:
+            return True
+        root = os.path.normpath(self.root)
+        return path == root or not path.startswith(root + os.sep)
+
+    def _execute(self, filename, base, files):
+        """Run a fixtures file on top of ``base``, adding the files of the
+        modules it imports to ``files``.
+        """
+        variables = dict(base)
+        if not os.path.exists(filename):
+            return variables
+        logger.debug('Loading fixtures from %s', filename)
+        with open(filename) as fd:
+            code = compile(fd.read(), filename, 'exec')
+        variables['__file__'] = filename
+        modules = set()
+        variables['__builtins__'] = recording_builtins(modules)
+        exec(code, variables)
+        files.update(module_files(modules))
+        return variables
+
+    def _own_teardown(self, variables, base):
+        teardown = variables.get(TEARDOWN)
+        if callable(teardown) and teardown is not base.get(TEARDOWN):
+            return teardown
+        return None
+
+    def _call(self, teardown):
+        try:
+            teardown()
+        except Exception as e:
+            logger.warning('Fixture teardown failed: %s', e)
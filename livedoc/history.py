@@ -0,0 +1,217 @@
+import time
+import sqlite3
+import threading
+
+from livedoc.reports import StoreReporter
+from livedoc.results import PASSED
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    source TEXT,
+    started REAL,
+    duration REAL,
+    status INTEGER
+);
+CREATE TABLE IF NOT EXISTS documents (
+    run INTEGER REFERENCES runs(id),
+    path TEXT,
+    status INTEGER,
+    duration REAL
+);
+CREATE TABLE IF NOT EXISTS results (
+    run INTEGER REFERENCES runs(id),
+    path TEXT,
+    test TEXT,
+    expression TEXT,
+    status INTEGER,
+    detail TEXT,
+    duration REAL
+);
+CREATE INDEX IF NOT EXISTS documents_path ON documents (path, run);
+CREATE INDEX IF NOT EXISTS results_path ON results (path, run);
+CREATE INDEX IF NOT EXISTS results_test ON results (test, run);
+CREATE INDEX IF NOT EXISTS results_run ON results (run);
+CREATE VIEW IF NOT EXISTS tests AS
+    SELECT run, path, test, MAX(status) AS status,
+           SUM(duration) AS duration, COUNT(*) AS results
+    FROM results GROUP BY run, path, test;
+'''
+
+
+class History(object):
+    """Outcomes and durations of every run, kept in a SQLite database.
+
+    Each run records its documents, and every result with the test it
+    belongs to, so trends can be queried across runs.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self):
+        self.db.close()
+
+    def start_run(self, source):
+        with self._lock, self.db:
+            cursor = self.db.execute(
+                'INSERT INTO runs (source, started) VALUES (?, ?)',
+                (source, time.time()),
+            )
+        return cursor.lastrowid
+
+    def finish_run(self, run, status):
+        with self._lock, self.db:
+            self.db.execute(
+                'UPDATE runs SET status = ?, duration = ? - started'
+                ' WHERE id = ?',
+                (status, time.time(), run),
+            )
+
+    def add_document(self, run, path, duration, results):
+        """Record a document and its ``Result`` rows."""
+        results = list(results)
+        status = max([x.status for x in results] or [PASSED])
+        with self._lock, self.db:
+            self.db.execute(
+                'INSERT INTO documents VALUES (?, ?, ?, ?)',
+                (run, path, status, duration),
+            )
+            self.db.executemany(
+                'INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [
+                    (run, path, x.test, x.expression, x.status, x.detail,
+                     x.duration)
+                    for x in results
+                ],
+            )
+
+    def runs(self, limit=None):
+        """Return the last ``limit`` runs, newest first.
+
+        Each one as ``(id, source, start date, duration, status)``.
+        """
+        return self._query(
+            "SELECT id, source, datetime(started, 'unixepoch'), duration,"
+            ' status FROM runs ORDER BY id DESC LIMIT ?',
+            (-1 if limit is None else limit,),
+        )
+
+    def durations(self):
+        """Return how long each document took the last time it was run."""
+        return dict(
+            (path, duration) for path, duration, run in self._query(
+                'SELECT path, duration, MAX(run) FROM documents'
+                ' GROUP BY path'
+            )
+        )
+
+    def slowest(self, limit=10, run=None):
+        """Return the slowest tests of ``run``, the last one by default."""
+        return self._query(
+            'SELECT path, test, duration FROM tests WHERE run = ?'
+            ' ORDER BY duration DESC LIMIT ?',
+            (self._run(run), limit),
+        )
+
+    def trend(self, path, test=None, limit=20):
+        """Return the duration of a document, or of one of its tests, in
+        each of the last ``limit`` runs it took part in, oldest first.
+        """
+        if test is None:
+            rows = self._query(
+                'SELECT run, duration, status FROM documents'
+                ' WHERE path = ? ORDER BY run DESC LIMIT ?',
+                (path, limit),
+            )
+        else:
+            rows = self._query(
+                'SELECT run, duration, status FROM tests'
+                ' WHERE path = ? AND test = ? ORDER BY run DESC LIMIT ?',
+                (path, test, limit),
+            )
+        return rows[::-1]
+
+    def flaky(self, runs=10):
+        """Return the results that both passed and did not pass in the
+        last ``runs`` runs, with how many times they did each.
+        """
+        return self._query(
+            'SELECT path, test, expression,'
+            ' SUM(status = 0) AS passed, SUM(status != 0) AS failed'
+            ' FROM results WHERE run IN'
+            ' (SELECT id FROM runs ORDER BY id DESC LIMIT ?)'
+            ' GROUP BY path, test, expression'
+            ' HAVING passed > 0 AND failed > 0'
+            ' ORDER BY failed DESC, path, test',
+            (runs,),
+        )
+
+    def regressions(self, base, head, slowdown=1.5):
+        """Compare two runs.
+
+        Returns the results that passed in ``base`` but not in ``head``,
+        and the documents that became ``slowdown`` times slower.
+        """
+        failures = self._query(
+            'SELECT h.path, h.test, h.expression, h.detail'
+            ' FROM results h JOIN results b'
+            ' ON b.path = h.path AND b.test = h.test'
+            ' AND b.expression = h.expression'
+            ' WHERE b.run = ? AND h.run = ? AND b.status = 0'
+            ' AND h.status != 0'
+            ' GROUP BY h.path, h.test, h.expression'
+            ' ORDER BY h.path, h.test',
+            (base, head),
+        )
+        slower = self._query(
+            'SELECT h.path, b.duration, h.duration'
+            ' FROM documents h JOIN documents b ON b.path = h.path'
+            ' WHERE b.run = ? AND h.run = ? AND h.duration > b.duration * ?'
+            ' ORDER BY h.duration / b.duration DESC',
+            (base, head, slowdown),
+        )
+        return failures, slower
+
+    def _run(self, run):
+        if run is not None:
+            return run
+        runs = self.runs(1)
+        return runs[0][0] if runs else None
+
+    def _query(self, sql, args=()):
+        with self._lock:
+            return self.db.execute(sql, args).fetchall()
+
+
+class HistoryReporter(StoreReporter):
+    """Records the results of every document of a run in a ``History``."""
+    def __init__(self, history, run, *args, **kwargs):
+        self.history = history
+        self.run = run
+        super().__init__(*args, **kwargs)
+        self._active = 0
+
+    def change_file(self, name):
+        super().change_file(name)
+        if not self._active:
+            self.store.clear()
+        self._active += 1
+        self._local.start = len(self.store)
+        self._local.started = time.perf_counter()
+
+    def file_finish(self):
+        # files processed by other threads add their results in between
+        self.history.add_document(
+            self.run,
+            self.current_file,
+            time.perf_counter() - self._local.started,
+            [
+                x for x in self.store.rows(self._local.start)
+                if x.file == self.current_file
+            ],
+        )
+        self._active -= 1
+        super().file_finish()
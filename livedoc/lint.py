@@ -0,0 +1,209 @@
+import os
+import ast
+import builtins
+import tokenize
+import itertools
+import collections
+from concurrent.futures import ProcessPoolExecutor
+
+from livedoc import LiveDoc
+from livedoc.discovery import discover
+from livedoc.expressions import (
+    expression_factory, Assignment, Comparison, Call,
+)
+from livedoc.fixtures import FixtureLoader
+
+COMPARISONS = ('==', '!=', '<', '>', '<=', '>=')
+
+# set by LiveDoc while evaluating every anchor
+PROVIDED = {'TEXT', 'OUT', 'TESTNAME', '__file__'}
+
+_livedoc = None
+_fixtures = {}
+
+
+class Problem(collections.namedtuple(
+        'Problem', ['document', 'expression', 'message'])):
+    __slots__ = ()
+
+    def __str__(self):
+        if self.expression is None:
+            return '%s: %s' % (self.document, self.message)
+        return '%s: `%s`: %s' % (self.document, self.expression, self.message)
+
+
+def lint(source, jobs=None):
+    """Return the problems found in the anchors of every document under
+    ``source``, in discovery order, without running any fixtures.
+
+    Documents are checked by ``jobs`` processes, as many as processors by
+    default, or in this one when ``jobs`` is 1.
+    """
+    livedoc = LiveDoc()
+    root = source if os.path.isdir(source) else os.path.dirname(source)
+    documents = [
+        item.source for item in discover(source, source)
+        if livedoc.is_document(item.source)
+    ]
+    if jobs == 1 or len(documents) < 2:
+        results = map(lint_document, documents, itertools.repeat(root))
+        return [problem for result in results for problem in result]
+    jobs = jobs or os.cpu_count() or 1
+    with ProcessPoolExecutor(min(jobs, len(documents))) as executor:
+        results = executor.map(
+            lint_document,
+            documents,
+            itertools.repeat(root),
+            chunksize=max(1, len(documents) // (jobs * 4)),
+        )
+        return [problem for result in results for problem in result]
+
+
+def lint_document(source, root=None):
+    """Return the problems found in the anchors of a document."""
+    problems = []
+    known = set(dir(builtins)) | PROVIDED
+    for filename in FixtureLoader(root).scope(source):
+        names, error = fixture_names(filename)
+        if error is not None:
+            problems.append(Problem(source, None, error))
+        if names is None:
+            # anything may have been imported, names cannot be checked
+            known = None
+        elif known is not None:
+            known.update(names)
+
+    processor = _processor(source)
+    with open(source) as fd:
+        content = fd.read()
+    tree = processor.parse(content)[0]
+    for a in processor.anchors(tree):
+        expression = a.attrib.get('title') or ''
+        for message in check_expression(expression, known):
+            problem = Problem(source, expression, message)
+            # table columns repeat the same expression in every row
+            if problem not in problems:
+                problems.append(problem)
+    return problems
+
+
+def check_expression(expression, known=None):
+    """Yield what is wrong with an anchor expression.
+
+    Names not in ``known`` are reported, unless it is None. Names assigned
+    by the expression are added to ``known``, for the ones coming after.
+    """
+    try:
+        expr = expression_factory(expression)
+    except (tokenize.TokenError, SyntaxError) as e:
+        yield 'syntax error: %s' % _reason(e)
+        return
+    if isinstance(expr, Comparison):
+        if expr.operator not in COMPARISONS:
+            yield (
+                '`%s` is the first operator, so it is taken as the '
+                'comparison; compare with one of %s'
+                % (expr.operator, ' '.join(COMPARISONS))
+            )
+            return
+        parts = [expr.left, expr.right]
+    elif isinstance(expr, Call):
+        parts = [expr.expression]
+    else:
+        parts = [expr.right]
+
+    names = []
+    for part in parts:
+        try:
+            tree = compile(part, '<anchor>', 'eval', ast.PyCF_ONLY_AST)
+        except SyntaxError as e:
+            yield 'syntax error in `%s`: %s' % (part, _reason(e))
+            return
+        names.extend(_free_names(tree))
+    if known is not None:
+        for name in dict.fromkeys(names):
+            if name not in known:
+                yield 'unknown name `%s`' % name
+    if isinstance(expr, Assignment):
+        if not expr.left.isidentifier():
+            yield 'cannot assign to `%s`' % expr.left
+        elif known is not None:
+            known.add(expr.left)
+
+
+def fixture_names(filename):
+    """Return the names a fixtures file defines, and its syntax error or
+    None. The names are None when it uses ``from ... import *``.
+
+    Results are kept until the file changes, as fixtures are shared by many
+    documents.
+    """
+    try:
+        stat = os.stat(filename)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        stamp = None
+    cached = _fixtures.get(filename)
+    if cached is None or cached[0] != stamp:
+        cached = _fixtures[filename] = (stamp, _fixture_names(filename))
+    return cached[1]
+
+
+def _fixture_names(filename):
+    if not os.path.exists(filename):
+        return set(), None
+    with open(filename) as fd:
+        content = fd.read()
+    try:
+        tree = ast.parse(content, filename)
+    except SyntaxError as e:
+        return set(), 'syntax error in %s: %s' % (filename, _reason(e))
+    names = set()
+    pending = list(tree.body)
+    while pending:
+        node = pending.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef,
+                             ast.ClassDef)):
+            names.add(node.name)
+            continue
+        if isinstance(node, ast.ImportFrom):
+            if any(alias.name == '*' for alias in node.names):
+                return None, None
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                names.add(alias.asname or alias.name.split('.')[0])
+            continue
+        if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Load):
+            names.add(node.id)
+        if isinstance(node, ast.Lambda):
+            continue
+        pending.extend(ast.iter_child_nodes(node))
+    return names, None
+
+
+def _free_names(tree):
+    loaded = []
+    bound = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            if isinstance(node.ctx, ast.Load):
+                loaded.append(node.id)
+            else:
+                bound.add(node.id)
+        elif isinstance(node, ast.arg):
+            bound.add(node.arg)
+    return [name for name in loaded if name not in bound]
+
+
+def _reason(error):
+    if isinstance(error, SyntaxError):
+        return error.msg
+    return error.args[0]
+
+
+def _processor(source):
+    # one per process, so workers do not build a LiveDoc for each document
+    global _livedoc
+    if _livedoc is None:
+        _livedoc = LiveDoc()
+    return _livedoc.choose_processor(source)
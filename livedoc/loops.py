@@ -0,0 +1,63 @@
+import threading
+from collections.abc import Awaitable
+
+_local = threading.local()
+
+
+class _OwnedLoop(object):
+    # kept in the data of its thread, which is dropped when the thread
+    # exits, so worker loops are closed with their workers
+    def __init__(self, loop):
+        self.loop = loop
+
+    def __del__(self):
+        self.loop.close()
+
+
+def get_event_loop():
+    """Return the event loop owned by the current worker thread.
+
+    Each thread gets its own loop, created on first use, so fixtures can
+    be awaited from any worker without sharing a loop between threads.
+    The loop is closed when the thread exits, or by ``close_event_loop``.
+    """
+    owned = getattr(_local, 'owned', None)
+    if owned is None or owned.loop.is_closed():
+        import asyncio
+        owned = _local.owned = _OwnedLoop(asyncio.new_event_loop())
+    return owned.loop
+
+
+def close_event_loop():
+    """Close the loop of the current thread, if it has one."""
+    owned = getattr(_local, 'owned', None)
+    _local.owned = None
+    if owned is not None:
+        owned.loop.close()
+
+
+def resolve(values, return_exceptions=False):
+    """Return ``values`` with every awaitable replaced by its result.
+
+    Awaitables are run concurrently on the worker loop. When nothing is
+    awaitable the loop is not touched at all.
+    """
+    pending = [i for i, v in enumerate(values) if isinstance(v, Awaitable)]
+    if not pending:
+        return values
+    results = get_event_loop().run_until_complete(_gather(
+        [values[i] for i in pending],
+        return_exceptions,
+    ))
+    values = list(values)
+    for i, result in zip(pending, results):
+        values[i] = result
+    return values
+
+
+async def _gather(awaitables, return_exceptions):
+    import asyncio
+    return await asyncio.gather(
+        *awaitables,
+        return_exceptions=return_exceptions
+    )
@@ -0,0 +1,207 @@
+import os
+import pickle
+import hashlib
+import logging
+import threading
+import functools
+import collections
+
+from livedoc.output import write_if_changed
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIRECTORY = '.livedoc-cache'
+
+_caches = {}
+_lock = threading.Lock()
+
+
+class Cache(object):
+    """Results of a memoized function.
+
+    Up to ``maxsize`` results are kept in memory, dropping the least
+    recently used ones; ``None`` means no limit. When ``directory`` is
+    given, results are also pickled there, keyed by the source of the
+    function and its arguments, so they survive between runs and are
+    invalidated when the function is edited.
+    """
+    def __init__(self, name, digest, maxsize=128, directory=None):
+        self.name = name
+        self.maxsize = maxsize
+        self.directory = directory
+        if directory is not None:
+            self.directory = os.path.join(directory, digest)
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._values = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, args, kwargs):
+        try:
+            return pickle.dumps((args, sorted(kwargs.items())), protocol=4)
+        except Exception:
+            return None
+
+    def get(self, key):
+        """Return whether a result is cached for ``key``, and the result."""
+        if key is None:
+            with self._lock:
+                self.misses += 1
+            return False, None
+        with self._lock:
+            if key in self._values:
+                self._values.move_to_end(key)
+                self.hits += 1
+                return True, self._values[key]
+        found, value = self._load(key)
+        with self._lock:
+            if found:
+                self.disk_hits += 1
+                self._remember(key, value)
+            else:
+                self.misses += 1
+        return found, value
+
+    def put(self, key, value):
+        if key is None:
+            return
+        with self._lock:
+            self._remember(key, value)
+        self._store(key, value)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def statistics(self):
+        return dict(
+            name=self.name,
+            hits=self.hits,
+            disk_hits=self.disk_hits,
+            misses=self.misses,
+            size=len(self._values),
+        )
+
+    def _remember(self, key, value):
+        if self.maxsize == 0:
+            return
+        self._values[key] = value
+        if self.maxsize is not None and len(self._values) > self.maxsize:
+            self._values.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(
+            self.directory,
+            '%s.pickle' % hashlib.sha256(key).hexdigest(),
+        )
+
+    def _load(self, key):
+        if self.directory is None:
+            return False, None
+        try:
+            with open(self._path(key), 'rb') as fd:
+                return True, pickle.load(fd)
+        except FileNotFoundError:
+            return False, None
+        except Exception as e:
+            logger.warning('Ignoring broken cache entry of %s: %s',
+                           self.name, e)
+            return False, None
+
+    def _store(self, key, value):
+        if self.directory is None:
+            return
+        try:
+            data = pickle.dumps(value, protocol=4)
+        except Exception as e:
+            logger.debug('Not storing a result of %s: %s', self.name, e)
+            return
+        write_if_changed(self._path(key), data)
+
+
+def get_cache(func, maxsize=128, directory=None):
+    """Return the cache of ``func``.
+
+    Fixtures files are executed again for every document, so the cache is
+    shared by every function defined in the same file, with the same name
+    and the same source.
+    """
+    name = '%s:%s' % (func.__code__.co_filename, func.__qualname__)
+    key = (name, source_digest(func), maxsize, directory)
+    with _lock:
+        if key not in _caches:
+            _caches[key] = Cache(name, key[1], maxsize, directory)
+        return _caches[key]
+
+
+def source_digest(func):
+    """Return a digest of the code of ``func``."""
+    import inspect
+    try:
+        source = inspect.getsource(func).encode()
+    except (OSError, TypeError):
+        code = func.__code__
+        source = code.co_code + repr(code.co_consts).encode()
+    return hashlib.sha256(source).hexdigest()[:16]
+
+
+def memoize(func=None, maxsize=128, persistent=False, directory=None):
+    """Cache the results of a pure fixture function.
+
+    Can be used as ``@memoize`` or with arguments, like
+    ``@memoize(maxsize=1000, persistent=True)``. Persistent results are
+    stored in ``directory``, ``.livedoc-cache`` by default. Arguments and
+    persistent results must be picklable; calls with arguments that are not
+    are never cached. Coroutine functions are supported, caching the value
+    they return.
+    """
+    if func is None:
+        return functools.partial(
+            memoize,
+            maxsize=maxsize,
+            persistent=persistent,
+            directory=directory,
+        )
+    if persistent and directory is None:
+        directory = DEFAULT_DIRECTORY
+    cache = get_cache(func, maxsize, directory)
+
+    import inspect
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = cache.key(args, kwargs)
+            found, value = cache.get(key)
+            if not found:
+                value = await func(*args, **kwargs)
+                cache.put(key, value)
+            return value
+    else:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = cache.key(args, kwargs)
+            found, value = cache.get(key)
+            if not found:
+                value = func(*args, **kwargs)
+                cache.put(key, value)
+            return value
+    wrapper.cache = cache
+    return wrapper
+
+
+def statistics():
+    return [cache.statistics() for cache in _caches.values()]
+
+
+def log_statistics():
+    # logged with the run summary, at the same level, for the functions
+    # that were called
+    for stats in statistics():
+        if not stats['hits'] and not stats['misses']:
+            continue
+        logger.info(
+            'Cache of %(name)s: %(hits)d hits, %(disk_hits)d from disk, '
+            '%(misses)d misses',
+            stats,
+        )
@@ -0,0 +1,205 @@
+import os
+import time
+import bisect
+import threading
+
+from livedoc.output import write_if_changed
+from livedoc.reports import Reporter
+
+# upper bounds, in seconds, of the buckets of every histogram
+BUCKETS = (
+    0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0,
+    30.0, 60.0,
+)
+
+# stages of a document, by their name in ``Context.timings``
+STAGES = {
+    'read': 'read',
+    'fixtures': 'fixtures',
+    'document': 'process',
+    'write': 'write',
+}
+
+HELP = {
+    'livedoc_documents': 'Documents processed',
+    'livedoc_assertions': 'Expressions checked',
+    'livedoc_failures': 'Comparisons that did not hold',
+    'livedoc_errors': 'Expressions that raised an exception',
+    'livedoc_document_duration_seconds': 'Time taken by each document',
+    'livedoc_stage_duration_seconds': 'Time taken by each document stage',
+    'livedoc_expression_duration_seconds': 'Time taken by each expression',
+}
+
+
+class Histogram(object):
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """Return ``(upper bound, observations up to it)`` of each bucket."""
+        total = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            yield bound, total
+
+
+class Metrics(object):
+    """Counters and histograms, written as OpenMetrics text.
+
+    Each sample is keyed by its metric name and a tuple of ``(label,
+    value)`` pairs.
+    """
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counters = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, labels, value=1):
+        with self._lock:
+            samples = self.counters.setdefault(name, {})
+            samples[labels] = samples.get(labels, 0) + value
+
+    def observe(self, name, labels, value):
+        with self._lock:
+            samples = self.histograms.setdefault(name, {})
+            if labels not in samples:
+                samples[labels] = Histogram(self.buckets)
+            samples[labels].observe(value)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for name in sorted(self.counters):
+                self._header(lines, name, 'counter')
+                for labels, value in sorted(self.counters[name].items()):
+                    lines.append('%s_total%s %d'
+                                 % (name, _labels(labels), value))
+            for name in sorted(self.histograms):
+                self._header(lines, name, 'histogram')
+                for labels, histogram in sorted(
+                        self.histograms[name].items()):
+                    for bound, count in histogram.cumulative():
+                        lines.append('%s_bucket%s %d' % (
+                            name,
+                            _labels(labels + (('le', str(bound)),)),
+                            count,
+                        ))
+                    lines.append('%s_sum%s %r'
+                                 % (name, _labels(labels), histogram.sum))
+                    lines.append('%s_count%s %d'
+                                 % (name, _labels(labels), histogram.count))
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def _header(self, lines, name, kind):
+        if name in HELP:
+            lines.append('# HELP %s %s' % (name, HELP[name]))
+        lines.append('# TYPE %s %s' % (name, kind))
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{%s}' % ','.join(
+        '%s="%s"' % (key, _escape(value)) for key, value in labels
+    )
+
+
+def _escape(value):
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('"', '\\"')
+        .replace('\n', '\\n')
+    )
+
+
+class MetricsReporter(Reporter):
+    """Collects the metrics of a run and writes them to ``path``.
+
+    Samples are labelled by the directory of the document and by ``kind``,
+    a function returning the processor type of a path. When ``interval``
+    is given, the file is also written during the run, at most that often.
+    """
+    def __init__(self, path, kind=None, interval=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.path = path
+        self.kind = kind or _extension
+        self.interval = interval
+        self.metrics = Metrics()
+        self._created = time.perf_counter()
+        self._written = time.monotonic()
+
+    def change_file(self, name):
+        super().change_file(name)
+        self._local.labels = (
+            ('directory', os.path.dirname(name) or '.'),
+            ('type', self.kind(name)),
+        )
+        self._local.started = self._local.last = time.perf_counter()
+
+    @property
+    def _labels(self):
+        return getattr(self._local, 'labels', ())
+
+    def add_comparison(self, expression, resolved_expression, result):
+        self._add(not result and 'livedoc_failures')
+
+    def add_exception(self, expression, exception):
+        self._add('livedoc_errors')
+
+    def add_timings(self, timings):
+        for key, stage in STAGES.items():
+            if key in timings:
+                self.metrics.observe(
+                    'livedoc_stage_duration_seconds',
+                    self._labels + (('stage', stage),),
+                    timings[key],
+                )
+
+    def file_finish(self):
+        self.metrics.inc('livedoc_documents', self._labels)
+        # so every series exists, even before anything fails
+        self.metrics.inc('livedoc_failures', self._labels, 0)
+        self.metrics.inc('livedoc_errors', self._labels, 0)
+        self.metrics.observe(
+            'livedoc_document_duration_seconds',
+            self._labels,
+            time.perf_counter()
+            - getattr(self._local, 'started', self._created),
+        )
+        super().file_finish()
+        if self.interval is not None:
+            now = time.monotonic()
+            if now - self._written >= self.interval:
+                self._written = now
+                self.write()
+
+    def write(self):
+        write_if_changed(self.path, self.metrics.render())
+
+    def _add(self, outcome):
+        now = time.perf_counter()
+        elapsed = now - getattr(self._local, 'last', self._created)
+        self._local.last = now
+        self.metrics.inc('livedoc_assertions', self._labels)
+        if outcome:
+            self.metrics.inc(outcome, self._labels)
+        self.metrics.observe(
+            'livedoc_expression_duration_seconds',
+            self._labels,
+            elapsed,
+        )
+
+
+def _extension(path):
+    return os.path.splitext(path)[1].lstrip('.').lower()
@@ -0,0 +1,62 @@
+import os
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def digest(data):
+    return hashlib.sha256(data).digest()
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    try:
+        with open(path, 'rb') as fd:
+            for chunk in iter(lambda: fd.read(65536), b''):
+                h.update(chunk)
+    except FileNotFoundError:
+        return None
+    return h.digest()
+
+
+def write_if_changed(path, content):
+    """Atomically write ``content`` to ``path`` unless it is already there.
+
+    The current file is compared by hash, so unchanged outputs keep their
+    modification time. Returns whether the file was written.
+    """
+    if isinstance(content, str):
+        content = content.encode()
+    if file_digest(path) == digest(content):
+        logger.debug('Unchanged %s', path)
+        return False
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    tmp = os.path.join(directory, '.%s.%d.%d.tmp' % (
+        os.path.basename(path),
+        os.getpid(),
+        threading.get_ident(),
+    ))
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, _mode(path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return True
+
+
+def _mode(path):
+    try:
+        return os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        return 0o644
+
+
+def copy_if_changed(source, target):
+    with open(source, 'rb') as fd:
+        return write_if_changed(target, fd.read())
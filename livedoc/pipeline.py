@@ -0,0 +1,111 @@
+import queue
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+def _put(results, value, stop):
+    # give up when the consumer went away, instead of blocking forever
+    while not stop.is_set():
+        try:
+            results.put(value, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def prefetch(items, func, depth):
+    """Yield ``(item, func(item))`` for each item, calling ``func`` on a
+    thread that keeps at most ``depth`` results ahead of the consumer.
+
+    Exceptions raised by ``func`` are raised when their item is reached.
+    """
+    results = queue.Queue(depth)
+    stop = threading.Event()
+
+    def run():
+        for item in items:
+            try:
+                entry = item, func(item), None
+            except Exception as e:
+                entry = item, None, e
+            if not _put(results, entry, stop):
+                return
+        _put(results, _DONE, stop)
+
+    thread = threading.Thread(target=run, name='livedoc-reader', daemon=True)
+    thread.start()
+    try:
+        while True:
+            entry = results.get()
+            if entry is _DONE:
+                return
+            item, value, error = entry
+            if error is not None:
+                raise error
+            yield item, value
+    finally:
+        stop.set()
+        thread.join()
+
+
+class Writer(object):
+    """Runs tasks one after another on its own thread.
+
+    At most ``depth`` tasks wait to be run; ``submit`` blocks beyond that.
+    The first exception raised by a task is raised again by the following
+    ``submit`` or by ``close``, and the tasks after it are dropped.
+    """
+    def __init__(self, depth):
+        self._tasks = queue.Queue(depth)
+        self._error = None
+        self._thread = threading.Thread(
+            target=self._run,
+            name='livedoc-writer',
+            daemon=True,
+        )
+        self._thread.start()
+
+    def submit(self, func, *args):
+        self._raise()
+        self._tasks.put((func, args))
+
+    def close(self):
+        self._tasks.put(_DONE)
+        self._thread.join()
+        self._raise()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if exc_info[0] is None:
+            self.close()
+            return
+        # already failing: finish the writes queued so far, keep that error
+        try:
+            self.close()
+        except Exception as e:
+            logger.warning('Writing failed too: %s', e)
+
+    def _run(self):
+        while True:
+            task = self._tasks.get()
+            if task is _DONE:
+                return
+            if self._error is not None:
+                continue
+            func, args = task
+            try:
+                func(*args)
+            except Exception as e:
+                self._error = e
+
+    def _raise(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
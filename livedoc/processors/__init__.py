@@ -0,0 +1,94 @@
+import threading
+
+
+class Processor(object):
+    """Turns documents into HTML.
+
+    A processor may be given documents from several threads at once, so
+    everything about a document is kept in its ``Context``, never in the
+    processor.
+    """
+    SUCCESS, FAILURE, ERROR = range(3)
+
+    def __init__(self, report):
+        self.report = report
+
+    @property
+    def kind(self):
+        """Short name of the processor, like ``markdown`` or ``copy``."""
+        return type(self).__name__.replace('Processor', '').lower()
+
+    def test(self, filename):
+        raise NotImplementedError('Abstract method')
+
+    def process_stream(self, content, fixtures, context=None):
+        raise NotImplementedError('Abstract method')
+
+    def close(self):
+        """Release what the processor keeps between documents."""
+
+
+class CopyProcessor(Processor):
+    def test(self, filename):
+        return True
+
+    def process_stream(self, content, fixtures, context=None):
+        return content, self.SUCCESS
+
+
+class LazyProcessor(Processor):
+    """Stands for a processor that is only imported when first needed.
+
+    ``path`` is given as ``module:Class``. Files are matched against
+    ``extensions`` without importing anything, so the dependencies of a
+    processor are not loaded unless a file it handles is found.
+    """
+    def __init__(self, path, extensions, **kwargs):
+        self.path = path
+        self.extensions = extensions
+        self.kwargs = kwargs
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def test(self, filename):
+        return filename.lower().endswith(self.extensions)
+
+    @property
+    def kind(self):
+        return self.path.split(':')[1].replace('Processor', '').lower()
+
+    def process_stream(self, content, fixtures, context=None):
+        return self.instance.process_stream(content, fixtures, context)
+
+    def close(self):
+        # a processor never loaded has nothing to release
+        if self._instance is not None:
+            self._instance.close()
+
+    def __getattr__(self, name):
+        # anything else is looked up in the processor, loading it if needed
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.instance, name)
+
+    @property
+    def instance(self):
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    module, name = self.path.split(':')
+                    cls = getattr(__import__(module, fromlist=[name]), name)
+                    self._instance = cls(**self.kwargs)
+        return self._instance
+
+
+def __getattr__(name):
+    if name == 'HtmlProcessor':
+        from livedoc.processors.html import HtmlProcessor
+        return HtmlProcessor
+    if name == 'MarkdownProcessor':
+        from livedoc.processors.markdown import MarkdownProcessor
+        return MarkdownProcessor
+    raise AttributeError(
+        "module %r has no attribute %r" % (__name__, name)
+    )
@@ -0,0 +1,516 @@
+import time
+import threading
+import copy
+import itertools
+from io import StringIO
+from concurrent.futures import ThreadPoolExecutor
+from lxml import etree
+
+from livedoc import loops
+from livedoc.budgets import Budgets, DOCUMENT, SECTION, FIXTURES, describe
+from livedoc.context import Context
+from livedoc.processors import Processor
+from livedoc.expressions import expression_factory
+from livedoc.theme import Theme
+from livedoc.tracebacks import ExceptionFormatter
+from livedoc import tracing
+from livedoc.tracing import span
+
+
+class HtmlProcessor(Processor):
+    INDEPENDENT_CLASS = 'independent'
+    ISOLATED_CLASS = 'isolated'
+    META_PREFIX = 'livedoc-'
+    HEADINGS = tuple('h%d' % i for i in range(1, 8))
+    extensions = ('html', 'htm')
+
+    def __init__(self,  theme=None, deterministic=False, exceptions=None,
+                 exception_sidecar=False, parallel_sections=False,
+                 section_workers=None, max_regression=None,
+                 warn_budgets=False, check_only=False, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.theme = theme or Theme()
+        self.deterministic = deterministic
+        self.exceptions = exceptions or ExceptionFormatter()
+        self.exception_sidecar = exception_sidecar
+        self.parallel_sections = parallel_sections
+        self.section_workers = section_workers
+        self.max_regression = max_regression
+        self.warn_budgets = warn_budgets
+        self.check_only = check_only
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def test(self, filename):
+        return filename.lower().endswith(self.extensions)
+
+    def process_stream(self, content, fixtures, context=None):
+        tree, options = self.parse(content)
+        return self.process_tree(tree, fixtures, context, options)
+
+    def parse(self, content):
+        """Return the tree of a document and the options it gives outside
+        of it, if any.
+        """
+        with span('parse'):
+            parser = etree.HTMLParser()
+            tree = etree.parse(StringIO(content), parser)
+        return tree, {}
+
+    def anchors(self, tree):
+        """Prepare a parsed document and return the anchors to evaluate,
+        in document order, headings and table columns included.
+        """
+        self._preprocess(tree)
+        return tree.findall('//a[@href="-"]')
+
+    def process_tree(self, tree, fixtures, context=None, options=None):
+        """Process an already parsed document.
+
+        ``options`` are added to the ones given by ``livedoc-*`` meta tags,
+        like ``sections`` or ``budget``, without their prefix. With
+        ``check_only``, anchors are evaluated and reported but the page is
+        not rendered, and None is returned instead of the HTML.
+        """
+        if context is None:
+            context = Context(fixtures)
+
+        start = time.perf_counter()
+        with span('preprocess'):
+            headers = None if self.check_only else self.headers(tree)
+            anchors = self.anchors(tree)
+            options = dict(self._options(tree), **(options or {}))
+        budgets = Budgets.from_options(
+            options,
+            context.baseline,
+            self.max_regression,
+        )
+        if self._parallel_sections(options):
+            status = self.process_sections(anchors, context, budgets)
+        else:
+            status = self.process_anchors(anchors, context, budgets)
+        if self.check_only:
+            context.timings[DOCUMENT] = time.perf_counter() - start
+            status = max(status, self._check_budgets(budgets, context, None))
+            return None, status
+        for a in anchors:
+            a.getparent().remove(a)
+        elapsed = context.timings[DOCUMENT] = time.perf_counter() - start
+        body = tree.find('//body')
+        status = max(status, self._check_budgets(budgets, context, body))
+        self._postprocess(tree, elapsed)
+        with span('render'):
+            doc = '\n'.join(self._extract_children(tree.find('/body')))
+            html = self.theme.test_template.render(body=doc, headers=headers)
+        return html, status
+
+    def _check_budgets(self, budgets, context, body):
+        """Check the fixtures and document timings, noticed in ``body``."""
+        status = self.SUCCESS
+        for kind in (FIXTURES, DOCUMENT):
+            if kind not in context.timings:
+                continue
+            budget, notice = self._check_budget(
+                budgets, kind, context.timings[kind],
+            )
+            status = max(status, budget)
+            if notice is not None:
+                body.insert(0, notice)
+        return status
+
+    def process_anchors(self, anchors, context, budgets=None):
+        if budgets is None:
+            budgets = Budgets()
+        status = self.SUCCESS
+        rows = {}
+        section = None
+        for batch in self._batches(anchors):
+            if self._is_heading(batch[0]):
+                status = max(
+                    status,
+                    self._end_section(section, context, budgets),
+                )
+                section = batch[0], time.perf_counter()
+            scopes = [self._scope(a, context, rows) for a in batch]
+            if len(batch) == 1:
+                status = max(
+                    status,
+                    self.process_element(batch[0], scopes[0]),
+                )
+            else:
+                status = max(status, self.process_batch(batch, scopes))
+        return max(status, self._end_section(section, context, budgets))
+
+    def process_sections(self, anchors, context, budgets=None):
+        """Evaluate each heading section on its own worker.
+
+        The anchors before the first heading are evaluated first, and every
+        section starts with a copy of the variables they set. Results are
+        inserted into the page, and reported, in document order once every
+        section has been evaluated.
+        """
+        if budgets is None:
+            budgets = Budgets()
+        sections = list(self._sections(anchors))
+        status = self.process_anchors(sections[0], context, budgets)
+        results = list(self._sections_executor().map(
+            self._evaluate_section,
+            sections[1:],
+            [context.child() for section in sections[1:]],
+            itertools.repeat(budgets),
+            itertools.repeat(tracing.attributes()),
+        ))
+        for section, result in zip(sections[1:], results):
+            events, outcomes, budget, notice = result
+            self.report.replay(events)
+            status = max(status, self._apply(outcomes), budget)
+            if notice is not None:
+                section[0].getparent().addnext(notice)
+        return status
+
+    def _sections_executor(self):
+        # one pool for every document, so its workers and their event
+        # loops are not created again for each one
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    self.section_workers, 'livedoc-section'
+                )
+            return self._executor
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+    def _evaluate_section(self, anchors, context, budgets, attributes):
+        start = time.perf_counter()
+        rows = {}
+        outcomes = []
+        with span('section', **attributes), \
+                self.report.buffered() as events:
+            for batch in self._batches(anchors):
+                scopes = [self._scope(a, context, rows) for a in batch]
+                if len(batch) == 1:
+                    outcomes.append(self.evaluate_element(batch[0], scopes[0]))
+                else:
+                    outcomes.extend(self.evaluate_batch(batch, scopes))
+            budget, notice = self._time_section(start, context, budgets)
+        return events, outcomes, budget, notice
+
+    def _end_section(self, section, context, budgets):
+        if section is None:
+            return self.SUCCESS
+        heading, start = section
+        status, notice = self._time_section(start, context, budgets)
+        if notice is not None:
+            heading.getparent().addnext(notice)
+        return status
+
+    def _time_section(self, start, context, budgets):
+        """Record how long the section started at ``start`` took."""
+        elapsed = time.perf_counter() - start
+        name = context.variables.get('TESTNAME')
+        context.timings.setdefault('sections', {})[name] = elapsed
+        return self._check_budget(budgets, SECTION, elapsed, name)
+
+    def _check_budget(self, budgets, kind, elapsed, name=None):
+        """Report ``elapsed`` when it is over budget.
+
+        Returns the status it gives the document, and the notice to show in
+        the page or None.
+        """
+        message = budgets.check(kind, elapsed, name)
+        if message is None:
+            return self.SUCCESS, None
+        subject = describe(kind, name)
+        self.report.add_budget(subject, message, not self.warn_budgets)
+        notice = None
+        if not self.check_only:
+            notice = self.theme.fragment('budget')
+            notice.text = '%s %s' % (subject, message)
+        if self.warn_budgets:
+            return self.SUCCESS, notice
+        return self.FAILURE, notice
+
+    def process_element(self, a, context):
+        return self._apply([self.evaluate_element(a, context)])
+
+    def process_batch(self, anchors, contexts):
+        return self._apply(self.evaluate_batch(anchors, contexts))
+
+    def evaluate_element(self, a, context):
+        """Evaluate an anchor without touching the tree.
+
+        Returns an ``(anchor, expression, context, error)`` outcome, to be
+        given to ``_apply``.
+        """
+        expression = a.attrib.get('title')
+        context.variables['TEXT'] = a.text
+        context.variables['OUT'] = ''
+        expr = self.split_expression(expression)
+        try:
+            with span('evaluate', expression=expression,
+                      test=context.variables.get('TESTNAME')):
+                expr.evaluate(context.variables, context.fixtures)
+        except Exception as e:
+            return a, expr, context, self._report_exception(expr, e, context)
+        return a, expr, context, None
+
+    def evaluate_batch(self, anchors, contexts):
+        """Evaluate independent anchors, awaiting their results together.
+
+        Expressions are prepared and completed in document order, but the
+        awaitables they return run concurrently on the worker loop.
+        """
+        prepared = []
+        for a, context in zip(anchors, contexts):
+            context.variables['TEXT'] = a.text
+            context.variables['OUT'] = ''
+            expr = self.split_expression(a.attrib.get('title'))
+            try:
+                values = expr.prepare(context.variables, context.fixtures)
+            except Exception as e:
+                values = [e]
+            prepared.append((a, context, expr, values))
+
+        with span('evaluate batch', expressions=len(anchors),
+                  test=contexts[0].variables.get('TESTNAME')):
+            results = iter(loops.resolve(
+                [v for a, context, expr, values in prepared for v in values],
+                return_exceptions=True,
+            ))
+        outcomes = []
+        for a, context, expr, values in prepared:
+            values = [next(results) for v in values]
+            error = None
+            try:
+                for value in values:
+                    if isinstance(value, BaseException):
+                        raise value
+                expr.complete(values, context.variables)
+            except Exception as e:
+                error = self._report_exception(expr, e, context)
+            outcomes.append((a, expr, context, error))
+        return outcomes
+
+    def _apply(self, outcomes):
+        """Insert the results of evaluated anchors next to them."""
+        status = self.SUCCESS
+        for a, expr, context, error in outcomes:
+            if self.check_only:
+                if error is not None:
+                    status = self.ERROR
+                elif expr.failed:
+                    status = max(status, self.FAILURE)
+                continue
+            if error is None:
+                try:
+                    a.addnext(expr.as_xml())
+                    status = max(
+                        status,
+                        self.FAILURE if expr.failed else self.SUCCESS
+                    )
+                    continue
+                except Exception as e:
+                    error = self._report_exception(expr, e, context)
+            self._format_exception(a, expr, error, context)
+            status = self.ERROR
+        return status
+
+    def _scope(self, anchor, context, rows):
+        """Return the context to evaluate ``anchor`` in.
+
+        Each row of a table with the ``isolated`` class gets its own child
+        context, so the variables set in a row do not leak to the others.
+        """
+        for row in anchor.iterancestors('tr'):
+            for table in row.iterancestors('table'):
+                classes = table.attrib.get('class', '').split()
+                if self.ISOLATED_CLASS not in classes:
+                    return context
+                if row not in rows:
+                    rows[row] = context.child()
+                return rows[row]
+        return context
+
+    def _batches(self, anchors):
+        batch = []
+        for a in anchors:
+            if self._is_independent(a):
+                batch.append(a)
+                continue
+            if batch:
+                yield batch
+                batch = []
+            yield [a]
+        if batch:
+            yield batch
+
+    def _sections(self, anchors):
+        section = []
+        for a in anchors:
+            if self._is_heading(a):
+                yield section
+                section = []
+            section.append(a)
+        yield section
+
+    def _options(self, tree):
+        """Return the options given by ``livedoc-*`` meta tags."""
+        options = {}
+        for meta in tree.getroot().iterfind('.//meta[@name]'):
+            name = meta.attrib['name']
+            if name.startswith(self.META_PREFIX):
+                options[name[len(self.META_PREFIX):]] = (
+                    meta.attrib.get('content', '').strip()
+                )
+        return options
+
+    def _parallel_sections(self, options):
+        if 'sections' in options:
+            return options['sections'] == 'parallel'
+        return self.parallel_sections
+
+    def _is_heading(self, anchor):
+        return anchor.getparent().tag in self.HEADINGS
+
+    def _is_independent(self, anchor):
+        classes = anchor.attrib.get('class', '').split()
+        return self.INDEPENDENT_CLASS in classes
+
+    def headers(self, tree):
+        result = ['<meta name="generator" content="livedoc">']
+        result.extend(self._extract_children(tree.find('/head')))
+        return result
+
+    def _extract_children(self, tree):
+        if tree is None:
+            return
+        for child in tree.getchildren():
+            yield etree.tostring(child).decode()
+
+    def split_expression(self, expression):
+        return expression_factory(expression, self.theme, self.report)
+
+    def _preprocess(self, tree):
+        self._preprocess_titles(tree)
+        self._preprocess_tables(tree)
+
+    def _postprocess(self, tree, elapsed):
+        self._postprocess_addfooter(tree, elapsed)
+
+    def _preprocess_titles(self, tree):
+        for tag in self.HEADINGS:
+            for title in tree.findall('//%s' % tag):
+                link = etree.Element("a")
+                link.attrib['href'] = '-'
+                link.attrib['title'] = (
+                    'TESTNAME = "%s"'
+                    % title.text.replace('"', '\\\\"')
+                )
+                title.text = ''
+                title.append(link)
+
+    def _preprocess_tables(self, tree):
+        for table in tree.findall('//table'):
+            head = table.find('thead')
+            body = table.find('tbody')
+            patterns = []
+            for row in head.findall('tr'):
+                for col in row.findall('th'):
+                    a = col.find('a[@href="-"]')
+                    if a is None:
+                        patterns.append(None)
+                        continue
+                    patterns.append(a)
+                    a.getparent().text = a.text
+                    a.getparent().remove(a)
+            if not any(x is not None for x in patterns):
+                continue
+            for row in body.findall('tr'):
+                for n, col in enumerate(row.findall('td')):
+                    pattern = patterns[n]
+                    if pattern is None:
+                        continue
+                    element = copy.deepcopy(pattern)
+                    element.text = col.text
+                    col.text = ''
+                    col.append(element)
+
+    def _postprocess_addfooter(self, tree, elapsed):
+        footer = etree.Element('div')
+        footer.attrib['class'] = self.theme.get_classes('footer')
+        hr = etree.Element('hr')
+        span_1 = etree.Element('span')
+        span_1.text = "Generated by "
+        link = etree.Element('a')
+        link.attrib['href'] = 'https://github.com/magmax/livedoc/'
+        link.text = 'LiveDoc'
+        footer.append(hr)
+        footer.append(span_1)
+        footer.append(link)
+        if not self.deterministic:
+            span_2 = etree.Element('span')
+            span_2.text = (
+                " in %.2f ms on %s" % (elapsed * 1000, time.asctime())
+            )
+            footer.append(span_2)
+        body = tree.find('//body')
+        body.append(footer)
+
+    def _report_exception(self, expression, exception, context):
+        """Report ``exception`` and format its traceback, and the current
+        variables apart, as tracebacks may be shared by several anchors.
+        """
+        self.report.add_exception(expression, exception)
+        if self.check_only:
+            return exception, None
+        full = self.exception_sidecar
+        return exception, (
+            self.exceptions.format_traceback(exception, full),
+            'Context:\n%s' % self.exceptions.format_variables(
+                context.variables, full
+            ),
+        )
+
+    def _format_exception(self, anchor, expression, error, context):
+        exception, (text, variables) = error
+        msg = (
+            "The expression: `%s` returned %s"
+            % (str(expression), str(exception))
+        )
+        button = etree.Element("button")
+        button.attrib['class'] = self.theme.get_classes('exception_button')
+        button.text = msg
+        anchor.addnext(button)
+        last = button
+        id = context.tracebacks.get(text)
+        if id is None:
+            id = 'livedoc-exception-%d' % next(context.ids)
+            context.tracebacks[text] = id
+            last = self._exception_span(id, text, context)
+            button.addnext(last)
+        # the variables differ between rows of a table, they are kept for
+        # every anchor
+        variables_id = 'livedoc-exception-%d' % next(context.ids)
+        last.addnext(self._exception_span(variables_id, variables, context))
+        button.attrib['onclick'] = (
+            "toggle_visibility('%s'); toggle_visibility('%s');"
+            % (id, variables_id)
+        )
+
+    def _exception_span(self, id, text, context):
+        span = etree.Element("span")
+        span.attrib['id'] = id
+        span.attrib['class'] = self.theme.get_classes('exception')
+        item = etree.Element("span")
+        item.attrib['class'] = self.theme.get_classes('exception_text')
+        if self.exception_sidecar:
+            span.attrib['data-sidecar'] = 'true'
+            context.sidecar[id] = text
+        else:
+            item.text = text
+        span.append(item)
+        return span
@@ -0,0 +1,149 @@
+import re
+import threading
+import xml.etree.ElementTree
+from io import StringIO
+
+import yaml
+import markdown
+from markdown.util import STX
+from markdown.extensions import Extension
+from markdown.treeprocessors import Treeprocessor
+from lxml import etree
+
+from livedoc import budgets
+from livedoc.processors.html import HtmlProcessor
+from livedoc.tracing import span
+
+EXTENSIONS = [
+    'markdown.extensions.tables',
+    'markdown.extensions.attr_list',
+]
+
+FRONT_MATTER = re.compile(r'\A---[ \t]*\n(.*?)^---[ \t]*$\n?', re.M | re.S)
+# the livedoc-* meta tags HTML documents may have
+OPTIONS = frozenset(['sections']) | frozenset(budgets.OPTIONS.values())
+
+
+def front_matter(content):
+    """Split the YAML block between ``---`` lines opening a document.
+
+    Returns the options it gives, like the ``livedoc-*`` meta tags of an
+    HTML document, and the rest of the content. A block that is not a YAML
+    mapping of known options is content, like a horizontal rule or a
+    ``Note: ...`` line between two, and is left alone.
+    """
+    match = FRONT_MATTER.match(content)
+    if match is None:
+        return {}, content
+    try:
+        options = yaml.safe_load(match.group(1))
+    except yaml.YAMLError:
+        return {}, content
+    if not isinstance(options, dict) or not options.keys() <= OPTIONS:
+        return {}, content
+    return (
+        {str(key): str(value) for key, value in options.items()},
+        content[match.end():],
+    )
+
+
+class LxmlTreeprocessor(Treeprocessor):
+    """Hands the converted document over as an lxml tree.
+
+    The tree Markdown builds is copied into lxml elements, so it does not
+    have to be serialized and parsed again. Raw HTML is only inserted by
+    Markdown once the document is serialized, so documents using it, or
+    keeping any other placeholder, are left alone and ``md.lxml_tree`` is
+    set to None.
+    """
+    def run(self, root):
+        self.md.lxml_tree = None
+        if self.md.htmlStash.html_counter:
+            return None
+        html = etree.Element('html')
+        body = etree.SubElement(html, 'body')
+        try:
+            body.text = _text(root.text)
+            _copy(root, body)
+        except ValueError:
+            return None
+        # like the HTML parser, drop the whitespace closing the body
+        if len(body) and body[-1].tail is not None:
+            body[-1].tail = body[-1].tail.rstrip() or None
+        self.md.lxml_tree = etree.ElementTree(html)
+        # nothing is left to serialize
+        return xml.etree.ElementTree.Element('div')
+
+
+def _copy(source, target, SubElement=etree.SubElement):
+    # called for every element of the document, so kept tight
+    for element in source:
+        tag = element.tag
+        if not isinstance(tag, str):
+            raise ValueError('Unsupported node %r' % element)
+        attrib = element.attrib
+        for value in attrib.values():
+            if STX in value:
+                raise ValueError('Placeholder left in %r' % value)
+        result = SubElement(target, tag, attrib)
+        text = element.text
+        if text:
+            result.text = _text(text)
+        tail = element.tail
+        if tail:
+            result.tail = _text(tail)
+        if len(element):
+            _copy(element, result)
+
+
+def _text(value):
+    # the HTML parser leaves empty texts unset
+    if not value:
+        return None
+    if STX in value:
+        raise ValueError('Placeholder left in %r' % value)
+    return value
+
+
+class LxmlExtension(Extension):
+    def extendMarkdown(self, md, *args):
+        processor = LxmlTreeprocessor(md)
+        if hasattr(md.treeprocessors, 'register'):
+            md.treeprocessors.register(processor, 'lxml', -10)
+        else:
+            md.treeprocessors.add('lxml', processor, '_end')
+
+
+class MarkdownProcessor(HtmlProcessor):
+    extensions = ('md', 'markdown')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._local = threading.local()
+
+    @property
+    def markdown(self):
+        """Markdown converter of the current thread."""
+        md = getattr(self._local, 'markdown', None)
+        if md is None:
+            md = self._local.markdown = markdown.Markdown(
+                extensions=EXTENSIONS + [LxmlExtension()],
+                output_format="xhtml5",
+            )
+        return md
+
+    def parse(self, content):
+        options, content = front_matter(content)
+        md = self.markdown
+        md.lxml_tree = None
+        try:
+            with span('markdown'):
+                html = md.convert(content)
+            tree = md.lxml_tree
+        finally:
+            md.reset()
+        if tree is None:
+            with span('parse'):
+                parser = etree.HTMLParser()
+                tree = etree.parse(StringIO(html), parser)
+        return tree, options
@@ -1,52 +1,140 @@
 import os
+import sys
+import time
 import logging
-from lxml import etree
+import threading
+import contextlib
+
+from livedoc.results import ResultStore, PASSED, FAILED, ERROR
 
 logger = logging.getLogger(__name__)
 
 
 class Report(object):
+    """Sends every event to the registered reporters.
+
+    Events may be sent from several threads, each one processing its own
+    file. Reporters get them one at a time, in the thread that sent them,
+    unless that thread buffers them to be replayed later.
+    """
     def __init__(self):
         self.reporters = []
+        self._local = threading.local()
+        self._lock = threading.RLock()
+
+    def run_start(self, sources):
+        self._dispatch('run_start', sources)
+
+    def needs_sources(self):
+        """Whether a registered reporter wants the files up front."""
+        return any(x.needs_sources for x in self.reporters)
 
     def test_name(self, name):
-        for reporter in self.reporters:
-            reporter.change_test(name)
+        self._dispatch('change_test', name)
 
     def test_file(self, name):
-        for reporter in self.reporters:
-            reporter.change_file(name)
+        self._dispatch('change_file', name)
 
     def file_finish(self):
-        for reporter in self.reporters:
-            reporter.file_finish()
+        self._dispatch('file_finish')
 
     def add_comparison(self, expression, resolved_expression, result):
-        for reporter in self.reporters:
-            reporter.add_comparison(
-                expression,
-                resolved_expression,
-                result,
-            )
+        self._dispatch(
+            'add_comparison',
+            expression,
+            resolved_expression,
+            result,
+        )
 
     def add_exception(self, expression, exception):
-        for reporter in self.reporters:
-            reporter.add_exception(
-                expression,
-                exception,
-            )
+        self._dispatch(
+            'add_exception',
+            expression,
+            exception,
+        )
+
+    def add_budget(self, subject, message, failed):
+        self._dispatch('add_budget', subject, message, failed)
+
+    def add_timings(self, timings):
+        self._dispatch('add_timings', timings)
+
+    @contextlib.contextmanager
+    def buffered(self):
+        """Record the events sent from this thread instead of reporting them.
+
+        Yields the list of recorded events, to be given to ``replay`` once
+        they can be reported in order.
+        """
+        previous = getattr(self._local, 'events', None)
+        self._local.events = events = []
+        try:
+            yield events
+        finally:
+            self._local.events = previous
+
+    def replay(self, events):
+        for method, args in events:
+            self._dispatch(method, *args)
+
+    def _dispatch(self, method, *args):
+        events = getattr(self._local, 'events', None)
+        if events is not None:
+            events.append((method, args))
+            return
+        with self._lock:
+            for reporter in self.reporters:
+                getattr(reporter, method)(*args)
 
     def register(self, reporter):
         if reporter is not None:
-            self.reporters.append(reporter)
+            with self._lock:
+                self.reporters.append(reporter)
+
+    def unregister(self, reporter):
+        with self._lock:
+            if reporter in self.reporters:
+                self.reporters.remove(reporter)
 
 
 class Reporter(object):
+    """Receives the events of a run.
+
+    The current file and test are kept per thread, as files may be
+    processed by several threads at once. Subclasses keep any state of the
+    current file in ``_local`` too.
+    """
     DEFAULT_TESTNAME = "<main>"
 
+    # whether ``run_start`` needs the files before the run begins, which
+    # makes LiveDoc find them all before processing any
+    needs_sources = False
+
     def __init__(self):
-        self.current_test = self.DEFAULT_TESTNAME
-        self.current_file = None
+        self._local = threading.local()
+
+    @property
+    def current_test(self):
+        return getattr(self._local, 'test', self.DEFAULT_TESTNAME)
+
+    @current_test.setter
+    def current_test(self, name):
+        self._local.test = name
+
+    @property
+    def current_file(self):
+        return getattr(self._local, 'file', None)
+
+    @current_file.setter
+    def current_file(self, name):
+        self._local.file = name
+
+    def run_start(self, sources):
+        """A run is about to process the files in ``sources``.
+
+        ``sources`` is None when the files are found while the run goes,
+        because no registered reporter sets ``needs_sources``.
+        """
 
     def add_comparison(self, expression, resolved_expression, result):
         raise NotImplementedError('Abstract method')
@@ -54,6 +142,17 @@ class Reporter(object):
     def add_exception(self, expression, exception):
         raise NotImplementedError('Abstract method')
 
+    def add_budget(self, subject, message, failed):
+        """Something took longer than its time budget.
+
+        Recorded as a comparison, that fails unless the budget is only a
+        warning.
+        """
+        self.add_comparison('%s budget' % subject, message, not failed)
+
+    def add_timings(self, timings):
+        """How long the stages of the current file took, in seconds."""
+
     def change_test(self, name):
         self.current_test = name
 
@@ -66,15 +165,91 @@ class Reporter(object):
         self.current_file = None
 
 
+class StoreReporter(Reporter):
+    """Keeps every result in a ``ResultStore``.
+
+    The duration of a result is the time since the previous result, or
+    since the test or file changed.
+    """
+    def __init__(self, store=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.store = ResultStore() if store is None else store
+        self._created = time.perf_counter()
+
+    def add_comparison(self, expression, resolved_expression, result):
+        self.store.add(
+            self.current_file,
+            self.current_test,
+            expression,
+            PASSED if result else FAILED,
+            resolved_expression,
+            self._lap(),
+        )
+
+    def add_exception(self, expression, exception):
+        self.store.add(
+            self.current_file,
+            self.current_test,
+            expression,
+            ERROR,
+            exception,
+            self._lap(),
+        )
+
+    def change_test(self, name):
+        super().change_test(name)
+        self._lap()
+
+    def change_file(self, name):
+        super().change_file(name)
+        self._lap()
+
+    def _lap(self):
+        now = time.perf_counter()
+        elapsed = now - getattr(self._local, 'last', self._created)
+        self._local.last = now
+        return elapsed
+
+
+class MemoryReporter(StoreReporter):
+    """Keeps every result in memory, read as plain, serializable dicts."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(ResultStore(passed_details=True), *args, **kwargs)
+
+    @property
+    def results(self):
+        return [self._as_dict(x) for x in self.store]
+
+    def _as_dict(self, result):
+        item = dict(
+            file=result.file,
+            test=result.test,
+            expression=result.expression,
+        )
+        if result.status == ERROR:
+            item['error'] = result.detail
+        else:
+            item['resolved'] = result.detail
+        item['success'] = result.success
+        return item
+
+    def clear(self):
+        self.store.clear()
+
+
 class ConsoleReporter(Reporter):
     NOT_SET = 'NOT SET'
     SUCCESS = 'OK'
     FAILURE = 'FAIL'
     ERROR = 'ERROR'
 
-    def __init__(self, *args, **kwargs):
-        self._status = self.NOT_SET
-        super().__init__(*args, **kwargs)
+    @property
+    def _status(self):
+        return getattr(self._local, 'status', self.NOT_SET)
+
+    @_status.setter
+    def _status(self, value):
+        self._local.status = value
 
     def add_comparison(self, expression, resolved_expression, result):
         if self._status in (self.NOT_SET, self.SUCCESS):
@@ -93,6 +268,17 @@ class ConsoleReporter(Reporter):
         self._status = self.ERROR
         logger.warning("Exception raised: %s", exception)
 
+    def add_budget(self, subject, message, failed):
+        if failed and self._status != self.ERROR:
+            self._status = self.FAILURE
+        logger.warning(
+            '%s - %s: %s %s',
+            self.current_file,
+            self.current_test,
+            subject,
+            message,
+        )
+
     def change_test(self, name):
         if name == self.current_test:
             return
@@ -119,6 +305,121 @@ class ConsoleReporter(Reporter):
             logger.error(msg)
 
 
+class ProgressReporter(Reporter):
+    """Shows how far a run is: files done, assertions per second, files
+    being processed and the time left.
+
+    The line is written at most once every ``interval`` seconds, half a
+    second on a terminal and ten otherwise. ``estimates`` maps files to how
+    long they took in a previous run, like ``History.durations`` returns,
+    so the time left follows the files still to do instead of an average.
+    ``workers``, when given, is called to tell how many workers are busy.
+    The total is shown as ``?`` when the run does not tell the files.
+    """
+    needs_sources = True
+
+    def __init__(self, stream=None, interval=None, estimates=None,
+                 workers=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stream = sys.stderr if stream is None else stream
+        self.tty = self.stream.isatty()
+        self.interval = interval
+        if interval is None:
+            self.interval = 0.5 if self.tty else 10
+        self.estimates = estimates or {}
+        self.workers = workers
+        self.total = 0
+        self.done = 0
+        self.active = 0
+        self.assertions = 0
+        self._expected = {}
+        self._expected_done = 0.0
+        self._expected_left = 0.0
+        self._started = time.monotonic()
+        self._shown = None
+
+    def run_start(self, sources):
+        self._started = time.monotonic()
+        if sources is None:
+            self.total = None
+            return
+        self.total = len(sources)
+        known = [self.estimates[x] for x in sources if x in self.estimates]
+        if known:
+            mean = sum(known) / len(known)
+            self._expected = {x: self.estimates.get(x, mean) for x in sources}
+            self._expected_left = sum(self._expected.values())
+
+    def add_comparison(self, expression, resolved_expression, result):
+        self.assertions += 1
+        self.refresh()
+
+    def add_exception(self, expression, exception):
+        self.assertions += 1
+        self.refresh()
+
+    def add_budget(self, subject, message, failed):
+        pass
+
+    def change_file(self, name):
+        super().change_file(name)
+        self.active += 1
+
+    def file_finish(self):
+        expected = self._expected.get(self.current_file, 0.0)
+        self._expected_done += expected
+        self._expected_left -= expected
+        self.active -= 1
+        self.done += 1
+        self.refresh(force=self.done == self.total)
+        super().file_finish()
+
+    def refresh(self, force=False):
+        now = time.monotonic()
+        if not force and self._shown is not None:
+            if now - self._shown < self.interval:
+                return
+        self._shown = now
+        line = self.status(now)
+        if self.tty:
+            end = '\n' if self.done == self.total else ''
+            self.stream.write('\r%s\x1b[K%s' % (line, end))
+        else:
+            self.stream.write(line + '\n')
+        self.stream.flush()
+
+    def status(self, now=None):
+        elapsed = (time.monotonic() if now is None else now) - self._started
+        return '%d/%s files, %d assertions (%.1f/s), %d active, ETA %s' % (
+            self.done,
+            '?' if self.total is None else self.total,
+            self.assertions,
+            self.assertions / elapsed if elapsed > 0 else 0.0,
+            self.active if self.workers is None else self.workers(),
+            self._format(self.eta(elapsed)),
+        )
+
+    def eta(self, elapsed):
+        """Return the seconds the run needs to finish, or None if unknown."""
+        if self.total is None:
+            return None
+        if self.done >= self.total:
+            return 0.0
+        if self._expected_done > 0:
+            return elapsed * self._expected_left / self._expected_done
+        if self.done:
+            return elapsed * (self.total - self.done) / self.done
+        return None
+
+    def _format(self, seconds):
+        if seconds is None:
+            return '?'
+        seconds = int(round(seconds))
+        if seconds >= 3600:
+            return '%dh%02dm' % (seconds // 3600, seconds % 3600 // 60)
+        return '%dm%02ds' % (seconds // 60, seconds % 60)
+
+
 class TestCase(object):
     def __init__(self, name):
         self.name = name
@@ -126,6 +427,7 @@ class TestCase(object):
         self.skipped = False
         self.failure = False
         self.error = False
+        self.output = None
 
     def set_failure(self, expression, resolved_expression, result):
         self.failure = (
@@ -148,12 +450,15 @@ class TestCase(object):
         )
 
     def as_xml(self):
+        from lxml import etree
         test = etree.Element(
             'testcase',
             dict(
                 name=str(self.name),
             )
         )
+        if self.time is not None:
+            test.attrib['time'] = str(self.time)
         if self.failure:
             failure = etree.Element('failure', {'message': "test failure"})
             failure.text = self.failure
@@ -162,6 +467,9 @@ class TestCase(object):
             error = etree.Element('error', {'message': "test error"})
             error.text = self.error
             test.append(error)
+        if self.output:
+            output = etree.SubElement(test, 'system-out')
+            output.text = self.output
         return test
 
 
@@ -190,6 +498,7 @@ class TestSuite(object):
         return sum(x.time for x in self._tests if x.time)
 
     def as_xml(self):
+        from lxml import etree
         if self._tests == []:
             return
         testsuite = etree.Element(
@@ -207,30 +516,20 @@ class TestSuite(object):
         return testsuite
 
 
-class JunitReporter(Reporter):
+class JunitReporter(StoreReporter):
     def __init__(self, outputdir, *args, **kwargs):
         self.outputdir = outputdir
-        self._current_suite = TestSuite(self.DEFAULT_TESTNAME)
-        self._suites = [self._current_suite]
         super().__init__(*args, **kwargs)
 
-    def add_comparison(self, expression, resolved_expression, result):
-        test = TestCase(expression)
-
-        if not result:
-            test.set_failure(expression, resolved_expression, result)
-
-        self._current_suite.add_test(test)
-
-    def add_exception(self, expression, exception):
-        test = TestCase(expression)
-        test.set_error(expression, exception)
-
-        self._current_suite.add_test(test)
+    def change_file(self, name):
+        super().change_file(name)
+        # results of other files may come in between, from other threads
+        self._local.start = len(self.store)
+        self._local.budgets = {}
 
-    def change_test(self, name):
-        self._current_suite = TestSuite(name)
-        self._suites.append(self._current_suite)
+    def add_budget(self, subject, message, failed):
+        self._budgets()[len(self.store)] = message
+        super().add_budget(subject, message, failed)
 
     def file_finish(self):
         filename = os.path.join(
@@ -243,12 +542,48 @@ class JunitReporter(Reporter):
         with open(filename, 'w+') as fd:
             xml = self.as_xml()
             if xml is not None:
+                from lxml import etree
                 fd.write(etree.tostring(xml).decode())
+        self._local.start = len(self.store)
+        self._budgets().clear()
         super().file_finish()
 
+    def suites(self):
+        """Group the results of the current file by test."""
+        suites = []
+        start = getattr(self._local, 'start', 0)
+        budgets = self._budgets()
+        for index, result in enumerate(self.store.rows(start), start):
+            if result.file != self.current_file:
+                continue
+            if not suites or suites[-1].name != result.test:
+                suites.append(TestSuite(result.test))
+            test = TestCase(result.expression)
+            test.time = result.duration
+            budget = budgets.get(index)
+            if budget is not None:
+                if result.status == FAILED:
+                    test.failure = budget
+                else:
+                    test.output = budget
+            elif result.status == FAILED:
+                test.set_failure(result.expression, result.detail, False)
+            elif result.status == ERROR:
+                test.set_error(result.expression, result.detail)
+            suites[-1].add_test(test)
+        return suites
+
+    def _budgets(self):
+        # messages of the budgets of the current file, by result index
+        budgets = getattr(self._local, 'budgets', None)
+        if budgets is None:
+            budgets = self._local.budgets = {}
+        return budgets
+
     def as_xml(self):
+        from lxml import etree
         tree = etree.Element('testsuites')
-        for suite in self._suites:
+        for suite in self.suites():
             xml = suite.as_xml()
             if xml is not None:
                 tree.append(xml)
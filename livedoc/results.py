@@ -0,0 +1,127 @@
+from array import array
+
+PASSED, FAILED, ERROR = range(3)
+NONE = -1
+
+
+class StringTable(object):
+    """Stores each distinct string once and refers to it by its index."""
+    def __init__(self):
+        self.strings = []
+        self._ids = {}
+
+    def add(self, value):
+        if value is None:
+            return NONE
+        value = str(value)
+        id = self._ids.get(value)
+        if id is None:
+            id = self._ids[value] = len(self.strings)
+            self.strings.append(value)
+        return id
+
+    def get(self, id):
+        return None if id == NONE else self.strings[id]
+
+    def __len__(self):
+        return len(self.strings)
+
+
+class Result(object):
+    """A row of a ``ResultStore``, built when it is read."""
+    __slots__ = ('file', 'test', 'expression', 'status', 'detail',
+                 'duration')
+
+    def __init__(self, file, test, expression, status, detail, duration):
+        self.file = file
+        self.test = test
+        self.expression = expression
+        self.status = status
+        self.detail = detail
+        self.duration = duration
+
+    @property
+    def success(self):
+        return self.status == PASSED
+
+    def __repr__(self):
+        return 'Result(%r, %r, %r, %r)' % (
+            self.file, self.test, self.expression, self.status,
+        )
+
+
+class ResultStore(object):
+    """Results of a run, kept as columns of plain arrays.
+
+    Files, test names, expressions and details are ids in a shared string
+    table, so each result takes a few tens of bytes whatever its texts.
+    The detail is the resolved expression of a comparison or the message
+    of an error. Unless ``passed_details`` is set, it is only kept for the
+    results that did not pass.
+    """
+    def __init__(self, passed_details=False):
+        self.passed_details = passed_details
+        self.strings = StringTable()
+        self.files = array('i')
+        self.tests = array('i')
+        self.expressions = array('i')
+        self.details = array('i')
+        self.statuses = array('b')
+        self.durations = array('d')
+
+    def add(self, file, test, expression, status, detail=None, duration=0.0):
+        self.files.append(self.strings.add(file))
+        self.tests.append(self.strings.add(test))
+        self.expressions.append(self.strings.add(expression))
+        if status == PASSED and not self.passed_details:
+            detail = None
+        self.details.append(self.strings.add(detail))
+        self.statuses.append(status)
+        self.durations.append(duration)
+
+    def get(self, index):
+        get = self.strings.get
+        return Result(
+            get(self.files[index]),
+            get(self.tests[index]),
+            get(self.expressions[index]),
+            self.statuses[index],
+            get(self.details[index]),
+            self.durations[index],
+        )
+
+    def rows(self, start=0, stop=None):
+        for index in range(start, len(self) if stop is None else stop):
+            yield self.get(index)
+
+    def __iter__(self):
+        return self.rows()
+
+    def __len__(self):
+        return len(self.statuses)
+
+    def merge(self, other):
+        """Append every result of ``other``."""
+        ids = [self.strings.add(x) for x in other.strings.strings]
+
+        def translate(column):
+            return array('i', (NONE if x == NONE else ids[x] for x in column))
+        self.files.extend(translate(other.files))
+        self.tests.extend(translate(other.tests))
+        self.expressions.extend(translate(other.expressions))
+        self.details.extend(translate(other.details))
+        self.statuses.extend(other.statuses)
+        self.durations.extend(other.durations)
+
+    def summary(self, start=0, stop=None):
+        statuses = self.statuses[start:stop]
+        return dict(
+            total=len(statuses),
+            passed=statuses.count(PASSED),
+            failed=statuses.count(FAILED),
+            errors=statuses.count(ERROR),
+            duration=sum(self.durations[start:stop]),
+        )
+
+    def clear(self):
+        self.__init__(self.passed_details)
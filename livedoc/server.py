@@ -0,0 +1,111 @@
+import os
+import stat
+import json
+import logging
+import threading
+import socketserver
+
+from livedoc import LiveDoc
+from livedoc.exceptions import LiveDocException
+from livedoc.output import write_if_changed
+from livedoc.reports import Report, MemoryReporter
+
+logger = logging.getLogger(__name__)
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """Reads one JSON request per line and answers with one JSON line."""
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                response = self.server.dispatch(json.loads(line.decode()))
+            except Exception as e:
+                logger.exception('Request failed')
+                response = {'error': str(e)}
+            self.wfile.write(json.dumps(response).encode() + b'\n')
+            self.wfile.flush()
+
+
+class Server(socketserver.UnixStreamServer):
+    """Keeps a warm LiveDoc instance and serves render and check requests.
+
+    Processors, the theme and directory fixtures are loaded once and reused
+    by every request; directory fixtures are reloaded when their file
+    changes. Check requests evaluate documents without rendering them.
+    Requests are handled one by one.
+    """
+    def __init__(self, path, theme_name=None, root=None):
+        self.results = MemoryReporter()
+        report = Report()
+        report.register(self.results)
+        self.livedoc = LiveDoc(report=report, theme_name=theme_name)
+        self.livedoc.fixtures.root = os.path.abspath(root or os.getcwd())
+        # check requests only evaluate documents, with the same fixtures
+        self.checker = LiveDoc(
+            report=report, theme_name=theme_name, check_only=True
+        )
+        self.checker.fixtures = self.livedoc.fixtures
+        # compile the templates before the first request arrives
+        self.livedoc.theme.test_template
+        self._remove_stale_socket(path)
+        super().__init__(path, RequestHandler)
+
+    def dispatch(self, request):
+        command = request.get('command')
+        if command == 'ping':
+            return {'status': LiveDoc.STATUS_SUCCESS}
+        if command == 'render':
+            return self.render(request, html=True)
+        if command == 'check':
+            return self.render(request, html=False)
+        if command == 'shutdown':
+            threading.Thread(target=self.shutdown).start()
+            return {'status': LiveDoc.STATUS_SUCCESS}
+        raise LiveDocException('Unknown command %s' % command)
+
+    def render(self, request, html=True):
+        livedoc = self.livedoc if html else self.checker
+        source = request['path']
+        content = request.get('content')
+        if content is None:
+            with open(source) as fd:
+                content = fd.read()
+        self.livedoc.fixtures.refresh()
+        self.results.clear()
+        livedoc.report.test_file(source)
+        try:
+            output, status = livedoc.process_stream(source, content)
+        finally:
+            livedoc.report.file_finish()
+        response = {'status': status, 'results': self.results.results}
+        if not html:
+            return response
+        response['html'] = output
+        if request.get('output'):
+            write_if_changed(request['output'], output)
+        return response
+
+    def server_close(self):
+        super().server_close()
+        self.livedoc.fixtures.teardown()
+        self._remove_stale_socket(self.server_address)
+
+    def _remove_stale_socket(self, path):
+        try:
+            if stat.S_ISSOCK(os.stat(path).st_mode):
+                os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def serve(path, theme_name=None, root=None):
+    server = Server(path, theme_name=theme_name, root=root)
+    logger.info('Listening on %s', path)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
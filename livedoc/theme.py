@@ -1,7 +1,8 @@
 import os
+import copy
 import logging
-import jinja2
-import shutil
+
+from livedoc.output import copy_if_changed
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +26,7 @@ class Style(object):
         self.exception_button = 'exception-button'
         self.exception = 'exception'
         self.exception_text = 'exception-text'
+        self.budget = 'budget'
 
     def load(self, filename):
         with open(filename) as fd:
@@ -46,12 +48,19 @@ class Style(object):
         logger.warning("Required invalid style for %s" % name)
         return ''
 
+    def as_dict(self):
+        return dict(vars(self))
+
 
 class Theme(object):
     def __init__(self):
         self.style = Style()
         self.theme = None
         self._loaded = False
+        self._env = None
+        self._templates = {}
+        self._classes = None
+        self._fragments = {}
 
     def load(self, theme='simple'):
         for directory in reversed(self.theme_directories):
@@ -59,6 +68,10 @@ class Theme(object):
             if os.path.exists(filename):
                 self.style.load(filename)
         self._loaded = True
+        self._env = None
+        self._templates = {}
+        self._classes = None
+        self._fragments = {}
 
     @property
     def theme_directories(self):
@@ -75,16 +88,72 @@ class Theme(object):
     def env(self):
         if not self._loaded:
             self.load()
-        return jinja2.Environment(
-            loader=jinja2.FileSystemLoader(list(self.theme_directories))
-        )
+        if self._env is None:
+            import jinja2
+            self._env = jinja2.Environment(
+                loader=jinja2.FileSystemLoader(list(self.theme_directories))
+            )
+        return self._env
 
     @property
     def test_template(self):
-        return self.env.get_template('test.html')
+        return self.get_template('test.html')
+
+    def get_template(self, name):
+        if name not in self._templates:
+            self._templates[name] = self.env.get_template(name)
+        return self._templates[name]
+
+    @property
+    def classes(self):
+        """Classes of every style, resolved once."""
+        if self._classes is None:
+            self._classes = self.style.as_dict()
+        return self._classes
 
     def get_classes(self, name):
-        return self.style.get(name)
+        try:
+            return self.classes[name]
+        except KeyError:
+            return self.style.get(name)
+
+    def fragment(self, kind):
+        """Return a new copy of the result fragment of ``kind``.
+
+        Fragments are built once per theme and copied, so expressions only
+        have to fill their texts in. ``info``, ``success``, ``budget`` and
+        ``plain`` are a single span; ``failure`` has the expected value, a
+        separator and the result as children, like ``call`` and ``print``
+        have the expression, a separator and the result.
+        """
+        if kind not in self._fragments:
+            self._fragments[kind] = self._build_fragment(kind)
+        return copy.deepcopy(self._fragments[kind])
+
+    def _build_fragment(self, kind):
+        from lxml import etree
+        span = etree.Element('span')
+        if kind == 'plain':
+            return span
+        if kind == 'failure':
+            children = ('failure_expected', None, 'failure_result')
+            span.attrib['class'] = self.get_classes('failure')
+        elif kind in ('call', 'print'):
+            children = (
+                '%s_expression' % kind,
+                '%s_separator' % kind,
+                '%s_result' % kind,
+            )
+            span.attrib['class'] = self.get_classes('%s_span' % kind)
+        else:
+            span.attrib['class'] = self.get_classes(kind)
+            return span
+        for name in children:
+            child = etree.SubElement(span, 'span')
+            if name is not None:
+                child.attrib['class'] = self.get_classes(name)
+        span[1].text = ' '
+        return span
 
     def copy_assets(self, output):
         logger.debug('Copying assets to %s' % output)
@@ -94,10 +163,10 @@ class Theme(object):
                 s = os.path.join(source, item)
                 t = os.path.join(target, item)
                 if os.path.isdir(s):
-                    os.makedirs(t)
+                    os.makedirs(t, exist_ok=True)
                     copytree(s, t)
                 else:
-                    shutil.copy2(s, t)
+                    copy_if_changed(s, t)
         for path in self.theme_directories:
             path = os.path.join(path, 'assets')
             if not os.path.exists(path):
@@ -0,0 +1,59 @@
+import reprlib
+import traceback
+
+
+class ExceptionFormatter(object):
+    """Formats the traceback and variables of a failing expression.
+
+    Values are rendered with ``reprlib``, so big fixture values are cut to
+    ``max_value`` characters, and containers to ``max_items`` items, and at
+    most ``max_variables`` variables and ``max_frames`` frames are shown.
+    With ``full=True`` nothing is truncated.
+    """
+    def __init__(self, max_value=200, max_items=20, max_variables=100,
+                 max_frames=20):
+        self.max_variables = max_variables
+        self.max_frames = max_frames
+        self.repr = reprlib.Repr()
+        self.repr.maxstring = max_value
+        self.repr.maxother = max_value
+        self.repr.maxlong = max_value
+        self.repr.maxlist = max_items
+        self.repr.maxtuple = max_items
+        self.repr.maxdict = max_items
+        self.repr.maxset = max_items
+        self.repr.maxfrozenset = max_items
+        self.repr.maxdeque = max_items
+        self.repr.maxarray = max_items
+
+    def format(self, exception, variables, full=False):
+        return '%s\nContext:\n%s' % (
+            self.format_traceback(exception, full),
+            self.format_variables(variables, full),
+        )
+
+    def format_traceback(self, exception, full=False):
+        return ''.join(traceback.format_exception(
+            type(exception),
+            exception,
+            exception.__traceback__,
+            limit=None if full else -self.max_frames,
+        ))
+
+    def format_variables(self, variables, full=False):
+        names = sorted(k for k in variables if not k.startswith('__'))
+        lines = [
+            '\t%s = %s' % (k, self._format_value(variables[k], full))
+            for k in (names if full else names[:self.max_variables])
+        ]
+        if len(names) > len(lines):
+            lines.append('\t... %d more' % (len(names) - len(lines)))
+        return '\n'.join(lines)
+
+    def _format_value(self, value, full):
+        if full:
+            return str(value)
+        try:
+            return self.repr.repr(value)
+        except Exception as e:
+            return '<unrepresentable: %s>' % e
@@ -0,0 +1,126 @@
+import os
+import json
+import time
+import threading
+import contextlib
+
+from livedoc.output import write_if_changed
+
+NULL_SPAN = contextlib.nullcontext()
+
+
+class Tracer(object):
+    """Opens spans around the stages of a run; this one records nothing."""
+    def span(self, name, **attributes):
+        return NULL_SPAN
+
+    def attributes(self):
+        """Return the attributes of the innermost span of this thread."""
+        return {}
+
+
+class ChromeTracer(Tracer):
+    """Records spans as Chrome trace events, to be seen in a trace viewer
+    like ``chrome://tracing`` or Perfetto.
+
+    Spans keep the attributes of the spans they are nested in on the same
+    thread, so every span of a document knows which document it is. Times
+    are wall clock microseconds, so the events of several processes can be
+    merged with ``extend``.
+    """
+    def __init__(self, name='livedoc'):
+        self.pid = os.getpid()
+        self.events = [{
+            'name': 'process_name',
+            'ph': 'M',
+            'pid': self.pid,
+            'args': {'name': name},
+        }]
+        self._origin = time.time() - time.perf_counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def span(self, name, **attributes):
+        stack = self._stack()
+        if stack:
+            attributes = dict(stack[-1], **attributes)
+        stack.append(attributes)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            stack.pop()
+            self._add({
+                'name': name,
+                'ph': 'X',
+                'ts': (self._origin + start) * 1e6,
+                'dur': (end - start) * 1e6,
+                'pid': self.pid,
+                'tid': threading.get_ident(),
+                'args': attributes,
+            })
+
+    def attributes(self):
+        stack = getattr(self._local, 'stack', None)
+        return dict(stack[-1]) if stack else {}
+
+    def drain(self):
+        """Return the events recorded so far, forgetting them."""
+        with self._lock:
+            events, self.events = self.events, []
+        return events
+
+    def extend(self, events):
+        with self._lock:
+            self.events.extend(events)
+
+    def write(self, path):
+        with self._lock:
+            data = json.dumps(
+                {'traceEvents': self.events, 'displayTimeUnit': 'ms'},
+                default=str,
+            )
+        write_if_changed(path, data)
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+            thread = threading.current_thread()
+            self._add({
+                'name': 'thread_name',
+                'ph': 'M',
+                'pid': self.pid,
+                'tid': thread.ident,
+                'args': {'name': thread.name},
+            })
+        return stack
+
+    def _add(self, event):
+        with self._lock:
+            self.events.append(event)
+
+
+_tracer = Tracer()
+
+
+def get_tracer():
+    return _tracer
+
+
+def set_tracer(tracer):
+    """Make ``tracer`` receive every span; return the previous one."""
+    global _tracer
+    previous, _tracer = _tracer, tracer or Tracer()
+    return previous
+
+
+def attributes():
+    return _tracer.attributes()
+
+
+def span(name, **attributes):
+    """Return a context manager timing ``name`` in the current tracer."""
+    return _tracer.span(name, **attributes)
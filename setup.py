@@ -53,8 +53,8 @@ setup(
         # 'Development Status :: 7 - Inactive',
         # 'Programming Language :: Python :: 2.7',
         # 'Programming Language :: Python :: 3.3',
-        'Programming Language :: Python :: 3.4',
-        'Programming Language :: Python :: 3.5',
+        'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3.8',
         'Programming Language :: Python :: Implementation :: CPython',
         # 'Programming Language :: Python :: Implementation :: PyPy',
         'License :: OSI Approved :: MIT License',
@@ -68,6 +68,7 @@ setup(
     author_email='miguelangel.garcia@gmail.com',
     url='https://github.com/magmax/livedoc',
     license='MIT',
+    python_requires='>=3.7',
     packages=find_packages(exclude=['tests']),
     include_package_data=True,
     zip_safe=False,
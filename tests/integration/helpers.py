@@ -0,0 +1,32 @@
+import os
+import tempfile
+import unittest
+
+
+class TreeTestCase(unittest.TestCase):
+    """Tests working on files written in a temporary directory.
+
+    ``self.source`` is a ``docs`` directory in ``self.tmp``, which is
+    removed when the test ends. ``self.output`` is next to it, and is not
+    created.
+    """
+    def setUp(self):
+        super().setUp()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.source = os.path.join(self.tmp.name, 'docs')
+        self.output = os.path.join(self.tmp.name, 'output')
+        os.mkdir(self.source)
+
+    def path(self, name):
+        return os.path.join(self.source, name)
+
+    def write(self, name, content):
+        """Write a file below ``source``, with its directories, and return
+        its path.
+        """
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as fd:
+            fd.write(content)
+        return path
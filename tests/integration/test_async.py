@@ -0,0 +1,105 @@
+import time
+import asyncio
+import threading
+import unittest
+from unittest import mock
+from livedoc import loops
+from livedoc.expressions import Assignment, Call, Comparison
+from livedoc.processors import HtmlProcessor
+
+
+async def slow_double(x):
+    await asyncio.sleep(0.2)
+    return 2 * x
+
+
+async def broken():
+    raise ValueError('broken fixture')
+
+
+class ResolveTest(unittest.TestCase):
+    def test_plain_values_are_returned_as_they_are(self):
+        values = [1, 'a']
+        assert loops.resolve(values) is values
+
+    def test_awaitables_are_resolved(self):
+        assert loops.resolve([1, slow_double(2)]) == [1, 4]
+
+    def test_loop_is_reused_in_the_same_thread(self):
+        assert loops.get_event_loop() is loops.get_event_loop()
+
+    def test_loop_is_closed_with_its_thread(self):
+        owned = []
+        thread = threading.Thread(
+            target=lambda: owned.append(loops.get_event_loop())
+        )
+        thread.start()
+        thread.join()
+
+        assert owned[0].is_closed()
+
+    def test_close_event_loop(self):
+        loop = loops.get_event_loop()
+        loops.close_event_loop()
+
+        assert loop.is_closed()
+        assert loops.get_event_loop() is not loop
+
+
+class AsyncExpressionTest(unittest.TestCase):
+    def test_call_awaits_coroutine(self):
+        sut = Call('slow_double(2)')
+        sut.evaluate({}, {'slow_double': slow_double})
+        assert sut.result == 4
+
+    def test_assignment_awaits_coroutine(self):
+        variables = {}
+        sut = Assignment('a', 'slow_double(2)', report=mock.Mock())
+        sut.evaluate(variables, {'slow_double': slow_double})
+        assert variables['a'] == 4
+
+    def test_comparison_awaits_both_sides(self):
+        sut = Comparison('slow_double(2)', 'slow_double(2)', '==')
+        sut.evaluate({}, {'slow_double': slow_double})
+        assert sut.success
+
+
+class IndependentAnchorsTest(unittest.TestCase):
+    def test_independent_anchors_run_concurrently(self):
+        sut = HtmlProcessor(report=mock.Mock())
+        content = ''.join(
+            '<a href="-" class="independent"'
+            ' title="TEXT == slow_double(%d)">%d</a>' % (i, 2 * i)
+            for i in range(5)
+        )
+        start = time.time()
+        result, status = sut.process_stream(
+            content,
+            {'slow_double': slow_double},
+        )
+        assert time.time() - start < 0.5
+        assert status == HtmlProcessor.SUCCESS
+        assert result.count('class="success"') == 5
+
+    def test_results_keep_document_order(self):
+        sut = HtmlProcessor(report=mock.Mock())
+        result, status = sut.process_stream(
+            '<a href="-" class="independent" title="a = slow_double(1)">1</a>'
+            '<a href="-" class="independent" title="b = slow_double(2)">2</a>'
+            '<a href="-" title="a + b == TEXT">6</a>',
+            {'slow_double': slow_double},
+        )
+        assert result.index('>2</span>') < result.index('>4</span>')
+        assert status == HtmlProcessor.SUCCESS
+
+    def test_one_failing_anchor_does_not_stop_the_batch(self):
+        sut = HtmlProcessor(report=mock.Mock())
+        result, status = sut.process_stream(
+            '<a href="-" class="independent" title="OUT = broken()"></a>'
+            '<a href="-" class="independent" title="2 == slow_double(1)">'
+            '2</a>',
+            {'slow_double': slow_double, 'broken': broken},
+        )
+        assert 'broken fixture' in result
+        assert 'class="success"' in result
+        assert status == HtmlProcessor.ERROR
@@ -0,0 +1,239 @@
+import os
+import time
+import shutil
+import tempfile
+import unittest
+from livedoc import LiveDoc
+from livedoc.budgets import (
+    Budgets, parse_duration, load_baseline, save_baseline,
+    DOCUMENT, SECTION, FIXTURES,
+)
+from livedoc.context import Context
+from livedoc.exceptions import LiveDocException
+from livedoc.processors import HtmlProcessor, MarkdownProcessor
+from livedoc.reports import Report, MemoryReporter, JunitReporter
+
+
+DOCUMENT_HTML = '''
+<head><meta name="livedoc-section-budget" content="10ms"></head>
+<h1>fast</h1>
+<a href="-" title="1 == 1">1</a>
+<h1>slow</h1>
+<a href="-" title="wait() == 1">1</a>
+'''
+
+DOCUMENT_MARKDOWN = '''---
+section-budget: 10ms
+---
+# fast
+
+[1](- "1 == 1")
+
+# slow
+
+[1](- "wait() == 1")
+'''
+
+
+def wait():
+    time.sleep(0.03)
+    return 1
+
+
+class BudgetsTest(unittest.TestCase):
+    def test_parse_duration(self):
+        assert parse_duration('500ms') == 0.5
+        assert parse_duration('2s') == 2
+        assert parse_duration(' 1.5 ') == 1.5
+        assert parse_duration('1m') == 60
+
+    def test_parse_invalid_duration(self):
+        with self.assertRaises(LiveDocException):
+            parse_duration('fast')
+
+    def test_within_budget(self):
+        sut = Budgets({DOCUMENT: 1})
+
+        assert sut.check(DOCUMENT, 0.5) is None
+        assert sut.check(SECTION, 5, 'any') is None
+
+    def test_over_budget(self):
+        sut = Budgets({DOCUMENT: 1})
+
+        assert sut.check(DOCUMENT, 1.5) == (
+            'took 1500.0 ms, over its budget of 1000.0 ms'
+        )
+
+    def test_regression_from_baseline(self):
+        sut = Budgets(
+            baseline={'sections': {'a': 0.1}, FIXTURES: 0.1},
+            max_regression=20,
+        )
+
+        assert sut.check(SECTION, 0.11, 'a') is None
+        assert sut.check(SECTION, 0.15, 'a') == (
+            'took 150.0 ms, 50% over the baseline of 100.0 ms'
+        )
+        assert sut.check(SECTION, 0.15, 'b') is None
+        assert sut.check(FIXTURES, 0.15) is not None
+
+    def test_tiny_regressions_are_noise(self):
+        sut = Budgets(baseline={DOCUMENT: 0.0001}, max_regression=20)
+
+        assert sut.check(DOCUMENT, 0.0005) is None
+
+    def test_from_options(self):
+        sut = Budgets.from_options({'budget': '2s', 'sections': 'parallel'})
+
+        assert sut.limits == {DOCUMENT: 2}
+
+
+class ProcessorBudgetsTest(unittest.TestCase):
+    def setUp(self):
+        self.results = MemoryReporter()
+        report = Report()
+        report.register(self.results)
+        self.report = report
+
+    def process(self, processor, content, context=None):
+        context = context or Context({'wait': wait})
+        html, status = processor.process_stream(content, {}, context)
+        return html, status, context
+
+    def test_section_over_budget_fails(self):
+        sut = HtmlProcessor(report=self.report)
+
+        html, status, context = self.process(sut, DOCUMENT_HTML)
+
+        assert status == HtmlProcessor.FAILURE
+        assert '<span class="budget">Section "slow" took' in html
+        assert 'Section "fast"' not in html
+        failed = [x for x in self.results.results if not x['success']]
+        assert [(x['test'], x['expression']) for x in failed] == [
+            ('slow', 'Section "slow" budget'),
+        ]
+
+    def test_warn_budgets(self):
+        sut = HtmlProcessor(report=self.report, warn_budgets=True)
+
+        html, status, context = self.process(sut, DOCUMENT_HTML)
+
+        assert status == HtmlProcessor.SUCCESS
+        assert '<span class="budget">Section "slow" took' in html
+
+    def test_timings(self):
+        sut = HtmlProcessor(report=self.report)
+
+        html, status, context = self.process(sut, DOCUMENT_HTML)
+
+        assert set(context.timings['sections']) == {'fast', 'slow'}
+        assert context.timings['sections']['slow'] >= 0.03
+        assert context.timings[DOCUMENT] >= 0.03
+
+    def test_parallel_sections(self):
+        sut = HtmlProcessor(report=self.report, parallel_sections=True)
+
+        html, status, context = self.process(sut, DOCUMENT_HTML)
+
+        assert status == HtmlProcessor.FAILURE
+        assert '<span class="budget">Section "slow" took' in html
+        assert set(context.timings['sections']) == {'fast', 'slow'}
+
+    def test_baseline(self):
+        sut = HtmlProcessor(report=self.report, max_regression=50)
+        context = Context({'wait': wait})
+        context.baseline = {'sections': {'slow': 0.01}}
+
+        html, status, context = self.process(
+            sut,
+            '<h1>slow</h1><a href="-" title="wait() == 1">1</a>',
+            context,
+        )
+
+        assert status == HtmlProcessor.FAILURE
+        assert 'over the baseline of 10.0 ms' in html
+
+    def test_document_and_fixtures_budgets(self):
+        sut = HtmlProcessor(report=self.report)
+        context = Context({'wait': wait})
+        context.timings[FIXTURES] = 0.5
+
+        html, status, context = self.process(
+            sut,
+            '<head>'
+            '<meta name="livedoc-budget" content="1ms">'
+            '<meta name="livedoc-fixtures-budget" content="100ms">'
+            '</head>'
+            '<a href="-" title="wait() == 1">1</a>',
+            context,
+        )
+
+        assert status == HtmlProcessor.FAILURE
+        assert '<span class="budget">Document took' in html
+        assert '<span class="budget">Fixtures took 500.0 ms' in html
+
+    def test_markdown_front_matter(self):
+        sut = MarkdownProcessor(report=self.report)
+
+        html, status, context = self.process(sut, DOCUMENT_MARKDOWN)
+
+        assert status == HtmlProcessor.FAILURE
+        assert '<span class="budget">Section "slow" took' in html
+        assert 'section-budget' not in html
+
+    def test_junit_report(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        junit = JunitReporter(tmpdir)
+        self.report.register(junit)
+        sut = HtmlProcessor(report=self.report)
+
+        self.report.test_file('doc.html')
+        self.process(sut, DOCUMENT_HTML)
+        xml = junit.as_xml()
+
+        failure = xml.find('.//failure')
+        assert failure.text.startswith('took ')
+        assert 'over its budget of 10.0 ms' in failure.text
+
+
+class BaselineTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def test_livedoc_collects_timings(self):
+        sut = LiveDoc()
+        source = os.path.join(self.tmpdir, 'doc.html')
+
+        sut.process_stream(source, '<h1>a</h1><a href="-" title="1">1</a>')
+
+        timings = sut.timings[source]
+        assert FIXTURES in timings
+        assert DOCUMENT in timings
+        assert list(timings['sections']) == ['a']
+
+    def test_save_and_load(self):
+        path = os.path.join(self.tmpdir, 'baseline.json')
+        timings = {'doc.md': {DOCUMENT: 0.5, 'sections': {'a': 0.1}}}
+
+        save_baseline(path, timings)
+
+        assert load_baseline(path) == timings
+
+    def test_livedoc_compares_with_baseline(self):
+        source = os.path.join(self.tmpdir, 'doc.html')
+        with open(os.path.join(self.tmpdir, 'doc.py'), 'w') as fd:
+            fd.write('from time import sleep as wait\n')
+        sut = LiveDoc(
+            baseline={source: {'sections': {'a': 0.001}}},
+            max_regression=10,
+        )
+
+        html, status = sut.process_stream(
+            source,
+            '<h1>a</h1><a href="-" title="wait(0.02)">-</a>',
+        )
+
+        assert status == LiveDoc.STATUS_FAILURE
+        assert 'over the baseline of 1.0 ms' in html
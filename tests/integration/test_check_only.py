@@ -0,0 +1,107 @@
+import os
+import unittest
+from io import StringIO
+from unittest import mock
+from lxml import etree
+from livedoc import LiveDoc
+from livedoc.__main__ import main
+from livedoc.context import Context
+from livedoc.processors import HtmlProcessor
+from livedoc.reports import Report, StoreReporter
+from helpers import TreeTestCase
+
+
+DOCUMENT = '''
+<h1>Sums</h1>
+<a href="-" title="1 + 1 == 2">2</a>
+<a href="-" title="1 + 1 == 3">3</a>
+'''
+
+BROKEN = '''
+<h1>Broken</h1>
+<a href="-" title="missing == 1">1</a>
+'''
+
+
+class CheckOnlyProcessorTest(unittest.TestCase):
+    def setUp(self):
+        self.results = StoreReporter()
+        self.report = Report()
+        self.report.register(self.results)
+        self.sut = HtmlProcessor(report=self.report, check_only=True)
+
+    def test_nothing_rendered(self):
+        with mock.patch.object(self.sut, 'theme') as theme:
+            html, status = self.sut.process_stream(DOCUMENT, {})
+
+        assert html is None
+        assert status == HtmlProcessor.FAILURE
+        theme.test_template.render.assert_not_called()
+        theme.fragment.assert_not_called()
+
+    def test_results_reported(self):
+        self.sut.process_stream(DOCUMENT, {})
+
+        assert [x.success for x in self.results.store] == [True, False]
+
+    def test_errors_reported_unformatted(self):
+        with mock.patch.object(self.sut, 'exceptions') as exceptions:
+            html, status = self.sut.process_stream(BROKEN, {})
+
+        assert status == HtmlProcessor.ERROR
+        assert len(self.results.store) == 1
+        exceptions.format.assert_not_called()
+
+    def test_budgets_checked(self):
+        context = Context({})
+        context.timings['fixtures'] = 1
+
+        tree = etree.parse(StringIO('<p>nothing</p>'), etree.HTMLParser())
+
+        html, status = self.sut.process_tree(
+            tree, {}, context, {'fixtures-budget': '10ms'},
+        )
+
+        assert status == HtmlProcessor.FAILURE
+
+
+class CheckOnlyTest(TreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write('doc.md', '# Sum\n\n[2](- "TEXT == str(1 + 1)")\n')
+        self.write('logo.txt', 'copied')
+
+    def test_no_outputs(self):
+        results = StoreReporter()
+        report = Report()
+        report.register(results)
+        sut = LiveDoc(report=report, check_only=True)
+
+        sut.process(self.source, self.output)
+
+        assert not os.path.exists(self.output)
+        assert len(results.store) == 1
+        assert sut.status == LiveDoc.STATUS_SUCCESS
+
+    def test_pipelined(self):
+        sut = LiveDoc(check_only=True, pipeline=2)
+
+        sut.process(self.source, self.output)
+
+        assert not os.path.exists(self.output)
+
+    def test_command_line(self):
+        report = os.path.join(self.tmp.name, 'junit')
+        self.write('bad.md', '# Bad\n\n[3](- "TEXT == str(1 + 1)")\n')
+
+        status = main([
+            self.source,
+            '-o', self.output,
+            '--check-only',
+            '--junit-report', report,
+        ])
+
+        assert status == LiveDoc.STATUS_FAILURE
+        # documents given by absolute path keep their reports next to them
+        assert os.path.exists(os.path.join(self.source, 'bad.md.xml'))
+        assert not os.path.exists(self.output)
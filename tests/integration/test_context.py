@@ -0,0 +1,98 @@
+import unittest
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+from livedoc.context import Context
+from livedoc.processors.html import HtmlProcessor
+
+
+class ContextTest(unittest.TestCase):
+    def test_initial_variables(self):
+        sut = Context()
+        assert sut.variables == {'__builtins__': {}}
+        assert sut.fixtures == {}
+
+    def test_reset(self):
+        fixtures = {'foo': 1}
+        sut = Context(fixtures)
+        variables = sut.variables
+        sut.variables['a'] = 1
+        sut.sidecar['id'] = 'text'
+        next(sut.ids)
+
+        sut.reset()
+
+        assert sut.variables is variables
+        assert 'a' not in sut.variables
+        assert sut.sidecar == {}
+        assert next(sut.ids) == 0
+        assert sut.fixtures is fixtures
+
+    def test_child_does_not_leak_variables(self):
+        sut = Context()
+        sut.variables['a'] = 1
+        child = sut.child()
+        child.variables['a'] = 2
+        child.variables['b'] = 3
+
+        assert sut.variables['a'] == 1
+        assert 'b' not in sut.variables
+
+    def test_child_shares_results(self):
+        sut = Context()
+        child = sut.child()
+        child.sidecar['id'] = 'text'
+        next(child.ids)
+
+        assert sut.sidecar == {'id': 'text'}
+        assert next(sut.ids) == 1
+
+
+class ProcessorContextTest(unittest.TestCase):
+    def test_variables_do_not_leak_between_documents(self):
+        sut = HtmlProcessor(report=mock.Mock())
+        sut.process_stream('<a href="-" title="a = 1">1</a>', {})
+        result, status = sut.process_stream(
+            '<a href="-" title="OUT = a"></a>',
+            {},
+        )
+        assert status == HtmlProcessor.ERROR
+
+    def test_isolated_table_rows(self):
+        sut = HtmlProcessor(report=mock.Mock())
+        context = Context()
+        result, status = sut.process_stream('''
+<a href="-" title="total = 0">0</a>
+<table class="isolated">
+  <thead>
+    <tr><th><a href="-" title="total = total + int(TEXT)">n</a></th></tr>
+  </thead>
+  <tbody>
+    <tr><td>2</td></tr>
+    <tr><td>3</td></tr>
+  </tbody>
+</table>''', {'int': int}, context)
+
+        assert status == HtmlProcessor.SUCCESS
+        assert '<span class="info">2</span>' in result
+        assert '<span class="info">3</span>' in result
+        assert context.variables['total'] == 0
+
+    def test_processor_can_be_shared_between_threads(self):
+        sut = HtmlProcessor(report=mock.Mock())
+
+        def process(n):
+            context = Context()
+            sut.process_stream(
+                ''.join(
+                    '<a href="-" title="a = %d">%d</a>' % (n, n)
+                    for i in range(50)
+                ),
+                {},
+                context,
+            )
+            return context.variables['a']
+
+        with ThreadPoolExecutor(4) as executor:
+            result = list(executor.map(process, range(20)))
+
+        assert result == list(range(20))
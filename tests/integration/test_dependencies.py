@@ -0,0 +1,115 @@
+import io
+import os
+import sys
+from unittest import mock
+from livedoc.__main__ import main
+from livedoc.dependencies import DependencyGraph
+from livedoc.fixtures import FixtureLoader
+from helpers import TreeTestCase
+
+FIXTURES = '''
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'lib'))
+import json
+'''
+
+
+class DependenciesTest(TreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(self.forget_modules)
+        self.write('livedoc_fixtures.py', FIXTURES)
+        self.write('lib/ld_dep_helper.py',
+                   'from ld_dep_inner import value\n')
+        self.write('lib/ld_dep_inner.py', 'def value():\n    return 1\n')
+        self.write('lib/ld_dep_other.py', 'other = 2\n')
+        self.write('a.md', '# A\n\n[1](- "TEXT == str(value())")\n')
+        self.write('a.py', 'from ld_dep_helper import value\n')
+        self.write('sub/b.md', '# B\n\n[2](- "TEXT == str(other)")\n')
+        self.write('sub/b.py', 'import ld_dep_other\nother = 2\n')
+        self.write('sub/c.md', '# C\n\nNothing\n')
+        self.write('logo.txt', 'copied')
+
+    def forget_modules(self):
+        lib = os.path.join(self.source, 'lib')
+        if lib in sys.path:
+            sys.path.remove(lib)
+        for name in ('ld_dep_helper', 'ld_dep_inner', 'ld_dep_other'):
+            sys.modules.pop(name, None)
+
+    def test_fixture_loader_records_files(self):
+        sut = FixtureLoader(self.source)
+
+        with sut.document(self.path('a.md')):
+            pass
+        with sut.document(self.path('sub/c.md')):
+            pass
+
+        assert sut.dependencies[self.path('a.md')] == {
+            self.path('a.md'),
+            self.path('a.py'),
+            self.path('livedoc_fixtures.py'),
+            self.path('lib/ld_dep_helper.py'),
+            self.path('lib/ld_dep_inner.py'),
+        }
+        # fixtures files that do not exist yet are included
+        assert sut.dependencies[self.path('sub/c.md')] == {
+            self.path('sub/c.md'),
+            self.path('sub/c.py'),
+            self.path('sub/livedoc_fixtures.py'),
+            self.path('livedoc_fixtures.py'),
+        }
+
+    def test_graph(self):
+        sut = DependencyGraph()
+
+        sut.update({'a.md': {'a.md', 'lib/x.py'}, 'b.md': {'b.md'}})
+
+        assert sut.affected(['lib/x.py']) == ['a.md']
+        assert sut.affected([os.path.abspath('b.md'), 'a.md']) == [
+            'a.md', 'b.md',
+        ]
+        assert sut.affected(['other.py']) == []
+
+    def test_graph_save_and_load(self):
+        path = os.path.join(self.tmp.name, 'deps.json')
+        sut = DependencyGraph()
+        sut.update({'a.md': {'a.md'}})
+
+        sut.save(path)
+
+        assert DependencyGraph.load(path).documents == sut.documents
+        assert DependencyGraph.load(path + '.missing').documents == {}
+
+    def affected(self, *paths, stdin=''):
+        with mock.patch('sys.stdout', new_callable=io.StringIO) as stdout, \
+                mock.patch('sys.stdin', io.StringIO(stdin)):
+            assert main(['affected', '-d', self.graph] + list(paths)) == 0
+        return stdout.getvalue().splitlines()
+
+    def test_command_line(self):
+        self.graph = os.path.join(self.tmp.name, 'deps.json')
+        main([self.source, '-o', self.output,
+              '--dependencies', self.graph])
+
+        assert self.affected(self.path('lib/ld_dep_inner.py')) == [
+            self.path('a.md'),
+        ]
+        assert self.affected(self.path('lib/ld_dep_other.py')) == [
+            self.path('sub/b.md'),
+        ]
+        assert self.affected(self.path('livedoc_fixtures.py')) == sorted(
+            self.path(x) for x in ('a.md', 'sub/b.md', 'sub/c.md')
+        )
+        assert self.affected(stdin=self.path('sub/b.py') + '\n') == [
+            self.path('sub/b.md'),
+        ]
+        assert self.affected(self.path('logo.txt')) == []
+
+    def test_new_documents_affect_themselves(self):
+        self.graph = os.path.join(self.tmp.name, 'deps.json')
+        self.write('new.md', '# New\n')
+
+        assert self.affected(self.path('new.md'), self.path('x.py')) == [
+            self.path('new.md'),
+        ]
@@ -0,0 +1,142 @@
+import os
+import unittest
+import tempfile
+from livedoc.discovery import (
+    discover,
+    IgnorePattern,
+    IgnoreRules,
+    WorkItem,
+)
+
+
+class IgnorePatternTest(unittest.TestCase):
+    def test_basename_matches_at_any_depth(self):
+        sut = IgnorePattern('*.log')
+        assert sut.match('foo.log', False)
+        assert sut.match('a/b/foo.log', False)
+        assert not sut.match('foo.md', False)
+
+    def test_directory_only(self):
+        sut = IgnorePattern('build/')
+        assert sut.match('build', True)
+        assert sut.match('a/build', True)
+        assert not sut.match('build', False)
+
+    def test_anchored(self):
+        sut = IgnorePattern('/vendor')
+        assert sut.match('vendor', True)
+        assert not sut.match('a/vendor', True)
+
+    def test_middle_slash_is_anchored(self):
+        sut = IgnorePattern('docs/generated')
+        assert sut.match('docs/generated', True)
+        assert not sut.match('a/docs/generated', True)
+
+    def test_double_star(self):
+        sut = IgnorePattern('**/cache/*.md')
+        assert sut.match('cache/a.md', False)
+        assert sut.match('x/y/cache/a.md', False)
+        assert not sut.match('x/cache/y/a.md', False)
+
+    def test_brackets(self):
+        sut = IgnorePattern('draft[0-9].md')
+        assert sut.match('draft1.md', False)
+        assert not sut.match('drafta.md', False)
+
+
+class IgnoreRulesTest(unittest.TestCase):
+    def test_negation_wins_when_later(self):
+        sut = IgnoreRules(['*.md', '!keep.md'])
+        assert sut.ignored('foo.md')
+        assert not sut.ignored('keep.md')
+
+    def test_comments_and_blank_lines(self):
+        sut = IgnoreRules(['# *.md', '', '*.txt'])
+        assert not sut.ignored('foo.md')
+        assert sut.ignored('foo.txt')
+
+    def test_child_rules_are_relative_to_base(self):
+        parent = IgnoreRules(['*.txt'])
+        sut = IgnoreRules(
+            ['/local.md', '!notes.txt'],
+            base='sub',
+            parent=parent,
+        )
+        assert sut.ignored('sub/local.md')
+        assert not sut.ignored('local.md')
+        assert not sut.ignored('sub/notes.txt')
+        assert sut.ignored('other.txt')
+
+
+class DiscoverTest(unittest.TestCase):
+    def touch(self, *parts):
+        path = os.path.join(*parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as fd:
+            fd.write('')
+        return path
+
+    def test_walks_tree_lazily(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.touch(tmp, 'a.md')
+            self.touch(tmp, 'sub', 'b.html')
+
+            sut = discover(tmp, 'out')
+
+            assert next(sut) == WorkItem(
+                os.path.join(tmp, 'a.md'),
+                os.path.join('out', 'a.html'),
+            )
+            assert next(sut) == WorkItem(
+                os.path.join(tmp, 'sub', 'b.html'),
+                os.path.join('out', 'sub', 'b.html'),
+            )
+            assert list(sut) == []
+
+    def test_skips_fixtures_and_backups_by_default(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.touch(tmp, 'a.md')
+            self.touch(tmp, 'a.py')
+            self.touch(tmp, 'a.md~')
+
+            result = [x.source for x in discover(tmp, 'out')]
+
+            assert result == [os.path.join(tmp, 'a.md')]
+
+    def test_honors_livedocignore(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, '.livedocignore'), 'w') as fd:
+                fd.write('vendor/\n*.txt\n')
+            self.touch(tmp, 'a.md')
+            self.touch(tmp, 'notes.txt')
+            self.touch(tmp, 'vendor', 'b.md')
+
+            result = [x.source for x in discover(tmp, 'out')]
+
+            assert result == [os.path.join(tmp, 'a.md')]
+
+    def test_nested_livedocignore(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            ignore = self.touch(tmp, 'sub', '.livedocignore')
+            with open(ignore, 'w') as fd:
+                fd.write('generated.md\n')
+            self.touch(tmp, 'generated.md')
+            self.touch(tmp, 'sub', 'generated.md')
+
+            result = [x.source for x in discover(tmp, 'out')]
+
+            assert result == [os.path.join(tmp, 'generated.md')]
+
+    def test_symbolic_link_loops_are_walked_once(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.touch(tmp, 'sub', 'a.md')
+            os.symlink(tmp, os.path.join(tmp, 'sub', 'loop'))
+            os.symlink(os.path.join(tmp, 'sub'), os.path.join(tmp, 'again'))
+
+            result = [x.source for x in discover(tmp, 'out')]
+
+            assert result == [os.path.join(tmp, 'again', 'a.md')]
+
+    def test_single_file(self):
+        result = list(discover('foo.md', 'out.html'))
+        assert result == [WorkItem('foo.md', 'out.html')]
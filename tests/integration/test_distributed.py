@@ -0,0 +1,235 @@
+import os
+import time
+import socket
+import unittest
+import threading
+from unittest import mock
+from livedoc import LiveDoc
+from livedoc.distributed import (
+    Connection, Coordinator, Worker, inside, parse_address,
+)
+from livedoc.exceptions import LiveDocException
+from livedoc.reports import Report, MemoryReporter
+from helpers import TreeTestCase
+
+
+class ParseAddressTest(unittest.TestCase):
+    def test_host_and_port(self):
+        assert parse_address('example.com:8765') == (
+            socket.AF_INET, ('example.com', 8765)
+        )
+
+    def test_port_only(self):
+        assert parse_address(':8765') == (socket.AF_INET, ('localhost', 8765))
+
+    def test_unix_socket(self):
+        assert parse_address('/tmp/livedoc.sock') == (
+            socket.AF_UNIX, '/tmp/livedoc.sock'
+        )
+
+
+class InsideTest(unittest.TestCase):
+    def test_relative_path(self):
+        assert inside('/tmp/root', 'sub/a.py') == '/tmp/root/sub/a.py'
+
+    def test_paths_leading_out_are_refused(self):
+        for name in ('../a.py', 'sub/../../a.py', '/etc/a.py', '.'):
+            with self.assertRaises(LiveDocException):
+                inside('/tmp/root', name)
+
+
+class DistributedTest(TreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write('livedoc_fixtures.py', 'base = 10\n')
+        self.write('a.md', '# A\n\n[11](- "TEXT == str(base + 1)")\n')
+        self.write('b.html', '<a href="-" title="TEXT == str(f(2))">6</a>')
+        self.write('b.py', 'def f(x):\n    return 3 * x\n')
+        self.write('sub/c.md', '# C\n\n[1](- "TEXT == str(base)")\n')
+        self.write('sub/d.txt', 'copied')
+        self.results = MemoryReporter()
+        self.report = Report()
+        self.report.register(self.results)
+
+    def run_workers(self, address, count):
+        sut = Coordinator(address, self.source, self.output,
+                          report=self.report)
+        workers = [
+            Worker(sut.address, timeout=10, token=sut.token)
+            for i in range(count)
+        ]
+        threads = [threading.Thread(target=x.run) for x in workers]
+        for thread in threads:
+            thread.start()
+        status = sut.run(timeout=10)
+        for thread in threads:
+            thread.join()
+        return status, workers
+
+    def test_several_workers_over_tcp(self):
+        status, workers = self.run_workers('localhost:0', 3)
+
+        assert status == 1
+        assert sum(x.processed for x in workers) == 3
+        for name in ('a.html', 'b.html', 'sub/c.html'):
+            assert os.path.exists(os.path.join(self.output, name))
+        with open(os.path.join(self.output, 'sub', 'd.html')) as fd:
+            assert fd.read() == 'copied'
+
+    def test_results_are_reported_in_discovery_order(self):
+        self.run_workers('localhost:0', 3)
+
+        assert [
+            (os.path.relpath(x['file'], self.source), x['test'], x['success'])
+            for x in self.results.results
+        ] == [
+            ('a.md', 'A', True),
+            ('b.html', '<main>', True),
+            ('sub/c.md', 'C', False),
+        ]
+
+    def test_worker_over_unix_socket(self):
+        status, workers = self.run_workers(
+            os.path.join(self.tmp.name, 'coordinator.sock'),
+            1,
+        )
+
+        assert workers[0].processed == 3
+        assert len(self.results.results) == 3
+
+    def test_documents_of_a_lost_worker_are_handed_out_again(self):
+        sut = Coordinator('localhost:0', self.source, self.output,
+                          report=self.report)
+        thread = threading.Thread(target=sut.serve_forever)
+        thread.start()
+        try:
+            lost = Connection(sut.address, timeout=10, token=sut.token)
+            lost.request('hello')
+            item = lost.request('next')['item']
+            lost.close()
+
+            worker = Worker(sut.address, timeout=10, token=sut.token)
+            worker.run()
+
+            assert sut.wait(10)
+            assert worker.processed == 3
+            name = os.path.splitext(item['name'])[0] + '.html'
+            assert os.path.exists(os.path.join(self.output, name))
+        finally:
+            sut.shutdown()
+            thread.join()
+            sut.server_close()
+
+    def test_failing_document_is_reported_as_an_error(self):
+        self.write('bad.md', '# Bad\n\n[1](- "TEXT == str(1)")\n')
+        self.write('bad.py', 'raise RuntimeError("broken fixtures")\n')
+
+        status, workers = self.run_workers('localhost:0', 2)
+
+        assert status == LiveDoc.STATUS_ERROR
+        assert sum(x.processed for x in workers) == 4
+        errors = [x for x in self.results.results if 'error' in x]
+        assert len(errors) == 1
+        assert 'RuntimeError: broken fixtures' in errors[0]['error']
+        assert not os.path.exists(os.path.join(self.output, 'bad.html'))
+        assert os.path.exists(os.path.join(self.output, 'a.html'))
+
+    def test_document_given_up_after_workers_go_away(self):
+        sut = Coordinator('localhost:0', self.source, self.output,
+                          report=self.report)
+        thread = threading.Thread(target=sut.serve_forever)
+        thread.start()
+        try:
+            names = set()
+            for i in range(Coordinator.MAX_ATTEMPTS):
+                lost = Connection(sut.address, timeout=10, token=sut.token)
+                lost.request('hello')
+                names.add(lost.request('next')['item']['name'])
+                lost.close()
+                # wait for the coordinator to notice
+                while sut._busy:
+                    time.sleep(0.01)
+
+            worker = Worker(sut.address, timeout=10, token=sut.token)
+            worker.run()
+
+            assert sut.wait(10)
+            assert worker.processed == 2
+            assert names == {'a.md'}
+            assert 'Abandoned after 3 workers' in self.results.results[0][
+                'error']
+            assert sut.livedoc.status == LiveDoc.STATUS_ERROR
+        finally:
+            sut.shutdown()
+            thread.join()
+            sut.server_close()
+
+    def test_only_fixtures_of_documents_are_sent(self):
+        self.write('.livedocignore', 'vendor\n')
+        self.write('vendor/livedoc_fixtures.py', 'vendored = 1\n')
+        self.write('vendor/page.md', '# Vendored\n')
+        self.write('helper.py', 'unrelated = 1\n')
+
+        sut = Coordinator('localhost:0', self.source, self.output)
+        try:
+            bundle = sut.bundle()
+        finally:
+            sut.server_close()
+
+        assert sorted(bundle) == ['b.py', 'livedoc_fixtures.py']
+
+    def test_requests_without_the_token_are_refused(self):
+        sut = Coordinator('localhost:0', self.source, self.output,
+                          token='secret')
+        thread = threading.Thread(target=sut.serve_forever)
+        thread.start()
+        try:
+            for token in (None, 'guess'):
+                connection = Connection(sut.address, timeout=10, token=token)
+                try:
+                    for command in ('hello', 'next', 'result'):
+                        with self.assertRaises(LiveDocException):
+                            connection.request(command, id=0, html='x')
+                finally:
+                    connection.close()
+            assert sut._busy == {}
+        finally:
+            sut.shutdown()
+            thread.join()
+            sut.server_close()
+
+    def test_workers_are_served_while_outputs_are_written(self):
+        writing, written = threading.Event(), threading.Event()
+
+        def slow_write(path, content):
+            writing.set()
+            assert written.wait(10)
+
+        sut = Coordinator('localhost:0', self.source, self.output,
+                          report=self.report)
+        thread = threading.Thread(target=sut.serve_forever)
+        thread.start()
+        first = Connection(sut.address, timeout=10, token=sut.token)
+        second = Connection(sut.address, timeout=10, token=sut.token)
+        try:
+            item = first.request('next')['item']
+            with mock.patch('livedoc.distributed.write_if_changed',
+                            slow_write):
+                result = threading.Thread(target=first.request, args=(
+                    'result',
+                ), kwargs=dict(
+                    id=item['id'], status=0, html='<p>a</p>', results=[],
+                ))
+                result.start()
+                assert writing.wait(10)
+
+                assert second.request('next')['item'] is not None
+                written.set()
+                result.join()
+        finally:
+            written.set()
+            first.close()
+            second.close()
+            sut.shutdown()
+            thread.join()
+            sut.server_close()
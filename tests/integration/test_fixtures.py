@@ -0,0 +1,80 @@
+import os
+from livedoc import LiveDoc
+from livedoc.fixtures import FixtureLoader
+from helpers import TreeTestCase
+
+
+class FixtureLoaderTest(TreeTestCase):
+    def test_document_without_fixtures(self):
+        sut = FixtureLoader(self.source)
+        variables = sut.load(self.path('doc.md'))
+        assert 'foo' not in variables
+
+    def test_sibling_fixtures(self):
+        self.write('doc.py', 'foo = 1')
+        sut = FixtureLoader(self.source)
+        variables = sut.load(self.path('doc.md'))
+        assert variables['foo'] == 1
+
+    def test_directory_fixtures_are_inherited(self):
+        self.write('livedoc_fixtures.py', 'foo = 1\nbar = 1')
+        self.write('sub/livedoc_fixtures.py', 'bar = 2')
+        self.write('sub/doc.py', 'baz = foo + bar')
+        sut = FixtureLoader(self.source)
+        variables = sut.load(self.path('sub/doc.md'))
+        assert variables['foo'] == 1
+        assert variables['bar'] == 2
+        assert variables['baz'] == 3
+
+    def test_directory_fixtures_run_once(self):
+        self.write('livedoc_fixtures.py', 'state = []')
+        self.write('a.py', 'state.append(1)')
+        self.write('b.py', 'state.append(2)')
+        sut = FixtureLoader(self.source)
+        sut.load(self.path('a.md'))
+        variables = sut.load(self.path('b.md'))
+        assert variables['state'] == [1, 2]
+
+    def test_fixtures_above_root_are_ignored(self):
+        self.write('livedoc_fixtures.py', 'foo = 1')
+        sut = FixtureLoader(self.path('sub'))
+        variables = sut.load(self.path('sub/doc.md'))
+        assert 'foo' not in variables
+
+    def test_teardown(self):
+        self.write(
+            'livedoc_fixtures.py',
+            'calls = []\n'
+            'def teardown():\n'
+            '    calls.append("root")\n',
+        )
+        self.write(
+            'sub/livedoc_fixtures.py',
+            'def teardown():\n'
+            '    calls.append("sub")\n',
+        )
+        self.write(
+            'sub/doc.py',
+            'def teardown():\n'
+            '    calls.append("doc")\n',
+        )
+        sut = FixtureLoader(self.source)
+        with sut.document(self.path('sub/doc.md')) as v:
+            calls = v['calls']
+        assert calls == ['doc']
+        with sut.document(self.path('sub/other.md')):
+            pass
+        sut.teardown()
+        assert calls == ['doc', 'sub', 'root']
+
+
+class LiveDocFixturesTest(TreeTestCase):
+    def test_shared_fixtures_are_available_to_documents(self):
+        self.write('livedoc_fixtures.py', 'def triple(x):\n    return 3 * x\n')
+        self.write('sub/doc.md', '[6](- "TEXT == triple(2)")')
+
+        sut = LiveDoc()
+        sut.process(self.source, self.output)
+
+        assert sut.status == LiveDoc.STATUS_SUCCESS
+        assert os.path.exists(os.path.join(self.output, 'sub', 'doc.html'))
@@ -0,0 +1,86 @@
+import io
+import os
+import unittest
+import tempfile
+from unittest import mock
+from livedoc.__main__ import main
+from livedoc.history import History
+
+
+class HistoryTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, 'docs')
+        self.database = os.path.join(self.tmp.name, 'history.sqlite')
+        os.mkdir(self.source)
+        self.document = os.path.join(self.source, 'doc.md')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def livedoc(self, content):
+        with open(self.document, 'w') as fd:
+            fd.write(content)
+        return main([
+            self.source,
+            '-o', os.path.join(self.tmp.name, 'output'),
+            '--history', self.database,
+        ])
+
+    def run_twice(self):
+        self.livedoc('# Sum\n\n[2](- "TEXT == str(1 + 1)")\n')
+        self.livedoc('# Sum\n\n[3](- "TEXT == str(1 + 1)")\n')
+        return History(self.database)
+
+    def test_runs_are_recorded(self):
+        sut = self.run_twice()
+
+        runs = sut.runs()
+        assert [x[0] for x in runs] == [2, 1]
+        assert [x[4] for x in runs] == [1, 0]
+        assert [x[0] for x in sut.trend(self.document)] == [1, 2]
+        assert [x[2] for x in sut.trend(self.document, 'Sum')] == [0, 1]
+
+    def test_slowest_tests_of_the_last_run(self):
+        sut = self.run_twice()
+
+        rows = sut.slowest()
+        assert [(x[0], x[1]) for x in rows] == [(self.document, 'Sum')]
+        assert rows[0][2] >= 0
+
+    def test_flaky_results(self):
+        sut = self.run_twice()
+        self.livedoc('# Sum\n\n[2](- "TEXT == str(1 + 1)")\n')
+
+        assert sut.flaky() == [
+            (self.document, 'Sum', 'TEXT == str(1 + 1)', 2, 1),
+        ]
+        assert sut.flaky(runs=1) == []
+
+    def test_regressions(self):
+        sut = self.run_twice()
+
+        failures, slower = sut.regressions(1, 2, slowdown=1e9)
+        assert failures == [
+            (self.document, 'Sum', 'TEXT == str(1 + 1)', '3 == 2'),
+        ]
+        assert slower == []
+        assert sut.regressions(2, 1)[0] == []
+
+    def test_durations(self):
+        sut = self.run_twice()
+
+        durations = sut.durations()
+        assert list(durations) == [self.document]
+        assert durations[self.document] == sut.trend(self.document)[-1][1]
+
+    def test_history_command(self):
+        self.run_twice()
+
+        with mock.patch('sys.stdout', new_callable=io.StringIO) as stdout:
+            assert main(['history', self.database, 'regressions', '1', '2',
+                         '--slowdown', '1e9']) == 0
+
+        assert stdout.getvalue() == (
+            'FAIL\t%s\tSum\tTEXT == str(1 + 1)\t3 == 2\n' % self.document
+        )
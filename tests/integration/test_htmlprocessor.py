@@ -2,6 +2,7 @@ import unittest
 from unittest import mock
 from io import StringIO
 from lxml import etree
+from livedoc.context import Context
 from livedoc.processors import HtmlProcessor
 
 
@@ -105,6 +106,7 @@ class HtmlProcessorTest(unittest.TestCase):
 
     def test_basic_table_processing(self):
         sut = HtmlProcessor(report=unittest.mock.Mock())
+        context = Context()
         sut.process_stream('''
 <table>
   <thead>
@@ -115,8 +117,8 @@ class HtmlProcessorTest(unittest.TestCase):
   <tbody>
       <td><a href="-" title="a=TEXT">5</a></td>
   </tbody>
-</table>''', {})
-        assert sut.variables['a'] == 5
+</table>''', {}, context)
+        assert context.variables['a'] == 5
 
     def test_table_preprocessing(self):
         content = '''
@@ -157,6 +159,7 @@ class HtmlProcessorTest(unittest.TestCase):
 
     def test_short_table_processing(self):
         sut = HtmlProcessor(report=unittest.mock.Mock())
+        context = Context()
         sut.process_stream('''
 <table>
   <thead>
@@ -169,11 +172,12 @@ class HtmlProcessorTest(unittest.TestCase):
       <td>5</td>
     </tr>
   </tbody>
-</table>''', {})
-        assert sut.variables['a'] == 5
+</table>''', {}, context)
+        assert context.variables['a'] == 5
 
     def test_short_table_processing_with_empty_patterns(self):
         sut = HtmlProcessor(report=unittest.mock.Mock())
+        context = Context()
         sut.process_stream('''
 <table>
   <thead>
@@ -188,5 +192,5 @@ class HtmlProcessorTest(unittest.TestCase):
       <td>27</td>
     </tr>
   </tbody>
-</table>''', {})
-        assert sut.variables['a'] == 27
+</table>''', {}, context)
+        assert context.variables['a'] == 27
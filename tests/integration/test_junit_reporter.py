@@ -154,3 +154,18 @@ class JunitReporterTest(unittest.TestCase):
             assert 0 == self.get_errors(xml)
             assert 0 == self.get_failures(xml)
             assert 1 == self.get_tests(xml)
+
+    def test_each_file_gets_its_results(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            sut = JunitReporter(tmp)
+            sut.change_file('first')
+            sut.add_comparison('foo', 'foo', True)
+            sut.file_finish()
+            sut.change_file('second')
+            sut.add_comparison('bar', 'bar', False)
+            xml = sut.as_xml()
+
+            assert 1 == self.get_tests(xml)
+            assert 1 == self.get_failures(xml)
+            cases = self.get_case_list(self.get_suite_by_pos(xml, 0))
+            assert "bar" == cases[0].attrib['name']
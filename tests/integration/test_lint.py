@@ -0,0 +1,181 @@
+import io
+import os
+import unittest
+from unittest import mock
+from livedoc import LiveDoc
+from livedoc.__main__ import main
+from livedoc.fixtures import FixtureLoader
+from livedoc.lint import lint, lint_document, check_expression, Problem
+from helpers import TreeTestCase
+
+FIXTURES = '''
+import os.path
+from json import dumps as to_json
+
+def total(*values):
+    return sum(values)
+
+if True:
+    LIMIT = 10
+
+raise RuntimeError('fixtures must not run')
+'''
+
+DOCUMENT = '''# Sums
+
+[3](- "total(1, 2) == TEXT")
+[6](- "result = total(LIMIT, -4)")
+[6](- "result == TEXT")
+[2](- "totl(2) == TEXT")
+
+| value | double |
+|-------|--------|
+| [?](- "value = TEXT") | [?](- "value * factor == TEXT") |
+| 1     | 2      |
+| 2     | 4      |
+'''
+
+
+class CheckExpressionTest(unittest.TestCase):
+    def check(self, expression, known=None):
+        return list(check_expression(expression, known))
+
+    def test_valid(self):
+        assert self.check('len(TEXT) == 3', {'len', 'TEXT'}) == []
+
+    def test_syntax_error(self):
+        problems = self.check('total(1 +')
+
+        assert len(problems) == 1
+        assert problems[0].startswith('syntax error')
+
+    def test_syntax_error_in_side(self):
+        problems = self.check('1 + == 2')
+
+        assert problems == ['syntax error in `1 +`: invalid syntax']
+
+    def test_misclassified_operator(self):
+        problems = self.check('os.sep == "/"')
+
+        assert len(problems) == 1
+        assert problems[0].startswith('`.` is the first operator')
+
+    def test_unknown_names(self):
+        problems = self.check('f(x) == [y for y in z]', {'f'})
+
+        assert problems == ['unknown name `x`', 'unknown name `z`']
+
+    def test_bound_names_are_known(self):
+        assert self.check('sum(v for v in range(3))', {'sum', 'range'}) == []
+
+    def test_assignment_makes_name_known(self):
+        known = set()
+
+        assert self.check('x = 1', known) == []
+        assert self.check('x', known) == []
+
+    def test_invalid_assignment(self):
+        assert self.check('x + 1 = 2', {'x'}) == ['cannot assign to `x + 1`']
+
+    def test_names_unchecked(self):
+        assert self.check('anything(at_all)', None) == []
+
+
+class LintTest(TreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write('livedoc_fixtures.py', FIXTURES)
+        self.write('sums.md', DOCUMENT)
+        self.write('sub/star.md', '# Star\n\n[1](- "anything == 1")\n')
+        self.write('sub/star.py', 'from json import *\n')
+        self.write('sub/page.html',
+                   '<h1>Page</h1><a href="-" title="missing == 1">1</a>')
+        self.write('logo.txt', 'copied')
+
+    def test_document(self):
+        problems = lint_document(self.path('sums.md'), self.source)
+
+        assert [(x.expression, x.message) for x in problems] == [
+            ('total(1, 2) == TEXT',
+             '`,` is the first operator, so it is taken as the comparison; '
+             'compare with one of == != < > <= >=',),
+            ('totl(2) == TEXT', 'unknown name `totl`'),
+            # table columns are checked once
+            ('value * factor == TEXT', 'unknown name `factor`'),
+        ]
+
+    def test_star_import(self):
+        assert lint_document(self.path('sub/star.md'), self.source) == []
+
+    def test_fixtures_syntax_error(self):
+        self.write('sub/page.py', 'def broken(:\n')
+
+        problems = lint_document(self.path('sub/page.html'), self.source)
+
+        assert problems[0].expression is None
+        assert 'syntax error in %s' % self.path('sub/page.py') \
+            in problems[0].message
+
+    def test_parallel(self):
+        expected = lint(self.source, jobs=1)
+
+        assert lint(self.source, jobs=2) == expected
+        assert [x.document for x in expected] == [
+            self.path('sums.md'),
+            self.path('sums.md'),
+            self.path('sums.md'),
+            self.path('sub/page.html'),
+        ]
+
+    def test_changed_fixtures_are_read_again(self):
+        page = self.path('sub/page.html')
+        assert lint_document(page, self.source)[0].message == \
+            'unknown name `missing`'
+        path = self.write('sub/page.py', 'missing = 1\n')
+        stat = os.stat(path)
+
+        assert lint_document(page, self.source) == []
+
+        self.write('sub/page.py', 'other = 1\n')
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+        assert lint_document(page, self.source)[0].message == \
+            'unknown name `missing`'
+
+    def test_format(self):
+        assert str(Problem('a.md', 'x', 'bad')) == 'a.md: `x`: bad'
+        assert str(Problem('a.md', None, 'bad')) == 'a.md: bad'
+
+    def test_fixture_scope(self):
+        sut = FixtureLoader(self.source)
+
+        assert sut.scope(self.path('sub/star.md')) == [
+            self.path('livedoc_fixtures.py'),
+            self.path('sub/livedoc_fixtures.py'),
+            self.path('sub/star.py'),
+        ]
+
+    def test_command_line(self):
+        with mock.patch('sys.stdout', new_callable=io.StringIO) as stdout:
+            status = main(['lint', self.source, '-j', '1'])
+
+        assert status == LiveDoc.STATUS_ERROR
+        assert stdout.getvalue().count('\n') == 4
+        assert 'unknown name `missing`' in stdout.getvalue()
+
+    def test_precheck(self):
+        status = main([self.source, '-o', self.output, '--precheck'])
+
+        assert status == LiveDoc.STATUS_ERROR
+        assert not os.path.exists(self.output)
+
+    def test_source_named_like_a_command(self):
+        source = os.path.join(self.tmp.name, 'lint')
+        os.mkdir(source)
+        with open(os.path.join(source, 'doc.md'), 'w') as fd:
+            fd.write('[2](- "TEXT == str(1 + 1)")\n')
+
+        status = main(['run', source, '-o', self.output])
+
+        assert status == LiveDoc.STATUS_SUCCESS
+        assert os.path.exists(os.path.join(self.output, 'doc.html'))
@@ -1,5 +1,7 @@
 import unittest
+import unittest.mock
 from livedoc import MarkdownProcessor
+from livedoc.processors.markdown import front_matter
 
 
 class MarkdownProcessorTest(unittest.TestCase):
@@ -24,3 +26,65 @@ class MarkdownProcessorTest(unittest.TestCase):
         assert "whatever" in result
         assert "<body>" in result
         assert status == MarkdownProcessor.SUCCESS
+
+    def test_markdown_is_not_parsed_as_html(self):
+        sut = MarkdownProcessor(report=unittest.mock.Mock())
+        with unittest.mock.patch('lxml.etree.HTMLParser') as parser:
+            result, status = sut.process_stream(
+                '# Title\n\n[2](- "TEXT == str(1 + 1)")',
+                {},
+            )
+
+        parser.assert_not_called()
+        assert '<h1><span>Title</span></h1>' in result
+        assert '<span class="success">2</span>' in result
+
+    def test_raw_html_is_parsed(self):
+        sut = MarkdownProcessor(report=unittest.mock.Mock())
+        result, status = sut.process_stream(
+            'some <em class="x">raw</em> [2](- "TEXT == str(1 + 1)")',
+            {},
+        )
+
+        assert '<em class="x">raw</em>' in result
+        assert '<span class="success">2</span>' in result
+
+    def test_converter_is_reused(self):
+        sut = MarkdownProcessor(report=unittest.mock.Mock())
+        md = sut.markdown
+        sut.process_stream('*one*', {})
+        result, status = sut.process_stream('two', {})
+
+        assert sut.markdown is md
+        assert 'one' not in result
+
+    def test_horizontal_rules_are_not_front_matter(self):
+        sut = MarkdownProcessor(report=unittest.mock.Mock())
+        result, status = sut.process_stream(
+            '---\n\n# Intro\n\n[2](- "TEXT == str(1 + 2)")\n\n---\n\nEnd',
+            {},
+        )
+
+        assert status == MarkdownProcessor.FAILURE
+        assert '<h1><span>Intro</span></h1>' in result
+        assert '<hr' in result
+
+    def test_front_matter(self):
+        options, content = front_matter(
+            '---\nbudget: 500ms\nsections: parallel\n---\n# Title\n'
+        )
+
+        assert options == {'budget': '500ms', 'sections': 'parallel'}
+        assert content == '# Title\n'
+
+    def test_front_matter_must_be_a_mapping(self):
+        content = '---\nJust a paragraph\n---\n'
+
+        assert front_matter(content) == ({}, content)
+
+    def test_front_matter_only_takes_known_options(self):
+        sut = MarkdownProcessor(report=unittest.mock.Mock())
+        result, status = sut.process_stream('---\nNote: text\n---\n', {})
+
+        assert 'Note: text' in result
+        assert front_matter('---\nbudget: 1s\nauthor: me\n---\n')[0] == {}
@@ -0,0 +1,167 @@
+import os
+import logging
+import asyncio
+import unittest
+import tempfile
+from livedoc import LiveDoc
+from livedoc.fixtures import FixtureLoader
+from livedoc.memoize import memoize, statistics
+from helpers import TreeTestCase
+
+
+class MemoizeTest(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+
+    def test_results_are_reused(self):
+        @memoize
+        def double(x):
+            self.calls.append(x)
+            return 2 * x
+
+        assert [double(1), double(2), double(1)] == [2, 4, 2]
+        assert self.calls == [1, 2]
+        assert double.cache.hits == 1
+        assert double.cache.misses == 2
+
+    def test_least_recently_used_are_dropped(self):
+        @memoize(maxsize=2)
+        def double(x):
+            self.calls.append(x)
+            return 2 * x
+
+        for x in (1, 2, 1, 3, 1, 2):
+            double(x)
+
+        assert self.calls == [1, 2, 3, 2]
+
+    def test_unhashable_arguments(self):
+        @memoize
+        def total(values, start=0):
+            self.calls.append(values)
+            return sum(values, start)
+
+        assert total([1, 2], start=1) == total([1, 2], start=1) == 4
+        assert len(self.calls) == 1
+
+    def test_unpicklable_arguments_are_not_cached(self):
+        @memoize
+        def call(f):
+            self.calls.append(f)
+            return f()
+
+        f = lambda: 1  # NOQA
+        assert call(f) == call(f) == 1
+        assert len(self.calls) == 2
+
+    def test_coroutines(self):
+        @memoize
+        async def double(x):
+            self.calls.append(x)
+            return 2 * x
+
+        assert asyncio.run(double(1)) == asyncio.run(double(1)) == 2
+        assert self.calls == [1]
+
+    def test_persistent_results_survive_the_process(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            def double(x):
+                self.calls.append(x)
+                return 2 * x
+
+            memoize(double, directory=tmp)(1)
+            cached = memoize(double, directory=tmp)
+            cached.cache.clear()
+
+            assert cached(1) == 2
+            assert self.calls == [1]
+            assert cached.cache.disk_hits == 1
+
+    def test_statistics(self):
+        @memoize
+        def double(x):
+            return 2 * x
+
+        double(1)
+        double(1)
+
+        stats = [x for x in statistics() if x['name'].endswith('double')
+                 and 'test_statistics' in x['name']]
+        assert stats == [dict(
+            name=double.cache.name,
+            hits=1,
+            disk_hits=0,
+            misses=1,
+            size=1,
+        )]
+
+
+class FixturesMemoizeTest(TreeTestCase):
+    def test_cache_is_shared_between_documents(self):
+        self.write('livedoc_fixtures.py', '''
+from livedoc.memoize import memoize
+calls = []
+
+@memoize
+def table(x):
+    calls.append(x)
+    return x
+''')
+        sut = FixtureLoader(self.source)
+        for name in ('a.md', 'b.md'):
+            fixtures = sut.load(self.path(name))
+            fixtures['table'](1)
+
+        assert fixtures['table'].cache.hits == 1
+        assert fixtures['calls'] == [1]
+
+    def test_source_changes_invalidate_persistent_results(self):
+        cache = os.path.join(self.tmp.name, 'cache')
+        code = '''
+from livedoc.memoize import memoize
+
+@memoize(directory=%r)
+def value():
+    return %d
+'''
+        path = self.write('doc.py', code % (cache, 1))
+        assert FixtureLoader(self.source).load(path)['value']() == 1
+
+        # a different size makes the change visible to linecache
+        self.write('doc.py', code % (cache, 2) + '\n')
+        assert FixtureLoader(self.source).load(path)['value']() == 2
+
+    def test_statistics_are_logged_at_the_end_of_the_run(self):
+        self.write('doc.py', '''
+from livedoc.memoize import memoize
+
+@memoize
+def logged(x):
+    return x
+''')
+        self.write(
+            'doc.md',
+            '[1](- "TEXT == str(logged(1))")\n'
+            '[1](- "TEXT == str(logged(1))")\n'
+        )
+        with self.assertLogs('livedoc.memoize', 'INFO') as logs:
+            LiveDoc().process(self.source, self.output)
+
+        assert any(
+            'logged: 1 hits, 0 from disk, 1 misses' in x for x in logs.output
+        )
+
+    def test_unused_functions_are_not_logged(self):
+        self.write('doc.py', '''
+from livedoc.memoize import memoize
+
+@memoize
+def unused(x):
+    return x
+''')
+        self.write('doc.md', '[1](- "TEXT == str(1)")\n')
+        with self.assertLogs('livedoc.memoize', 'INFO') as logs:
+            LiveDoc().process(self.source, self.output)
+            logging.getLogger('livedoc.memoize').info('end')
+
+        assert not any('unused' in x for x in logs.output)
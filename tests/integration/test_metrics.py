@@ -0,0 +1,113 @@
+import os
+import tempfile
+import unittest
+from livedoc.__main__ import main
+from livedoc.metrics import Histogram, Metrics, MetricsReporter
+
+
+class HistogramTest(unittest.TestCase):
+    def test_cumulative(self):
+        sut = Histogram((0.1, 1.0))
+
+        for value in (0.05, 0.1, 0.5, 2):
+            sut.observe(value)
+
+        assert list(sut.cumulative()) == [(0.1, 2), (1.0, 3), ('+Inf', 4)]
+        assert sut.count == 4
+        assert sut.sum == 2.65
+
+
+class MetricsTest(unittest.TestCase):
+    def test_render(self):
+        sut = Metrics(buckets=(1.0,))
+        labels = (('directory', 'docs'), ('type', 'markdown'))
+
+        sut.inc('livedoc_documents', labels)
+        sut.inc('livedoc_documents', labels)
+        sut.observe('livedoc_document_duration_seconds', labels, 0.5)
+
+        assert sut.render() == '\n'.join([
+            '# HELP livedoc_documents Documents processed',
+            '# TYPE livedoc_documents counter',
+            'livedoc_documents_total{directory="docs",type="markdown"} 2',
+            '# HELP livedoc_document_duration_seconds'
+            ' Time taken by each document',
+            '# TYPE livedoc_document_duration_seconds histogram',
+            'livedoc_document_duration_seconds_bucket'
+            '{directory="docs",type="markdown",le="1.0"} 1',
+            'livedoc_document_duration_seconds_bucket'
+            '{directory="docs",type="markdown",le="+Inf"} 1',
+            'livedoc_document_duration_seconds_sum'
+            '{directory="docs",type="markdown"} 0.5',
+            'livedoc_document_duration_seconds_count'
+            '{directory="docs",type="markdown"} 1',
+            '# EOF',
+        ]) + '\n'
+
+    def test_label_values_are_escaped(self):
+        sut = Metrics()
+
+        sut.inc('x', (('directory', 'a"b\\c'),))
+
+        assert 'x_total{directory="a\\"b\\\\c"} 1' in sut.render()
+
+
+class MetricsReporterTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'livedoc.prom')
+
+    def test_counters(self):
+        sut = MetricsReporter(self.path)
+
+        sut.change_file('docs/a.md')
+        sut.add_comparison('1 == 1', '1 == 1', True)
+        sut.add_comparison('1 == 2', '1 == 2', False)
+        sut.add_exception('x', NameError('x'))
+        sut.add_timings({'read': 0.001, 'document': 0.01, 'sections': {}})
+        sut.file_finish()
+        sut.write()
+
+        with open(self.path) as fd:
+            text = fd.read()
+        labels = '{directory="docs",type="md"}'
+        assert 'livedoc_documents_total%s 1' % labels in text
+        assert 'livedoc_assertions_total%s 3' % labels in text
+        assert 'livedoc_failures_total%s 1' % labels in text
+        assert 'livedoc_errors_total%s 1' % labels in text
+        assert 'livedoc_expression_duration_seconds_count%s 3' % labels in text
+        assert (
+            'livedoc_stage_duration_seconds_count'
+            '{directory="docs",type="md",stage="process"} 1'
+        ) in text
+        assert 'stage="fixtures"' not in text
+        assert text.endswith('# EOF\n')
+
+    def test_interval(self):
+        sut = MetricsReporter(self.path, interval=0)
+
+        sut.change_file('a.md')
+        sut.file_finish()
+
+        assert os.path.exists(self.path)
+
+    def test_command_line(self):
+        source = os.path.join(self.tmp.name, 'docs')
+        os.mkdir(source)
+        with open(os.path.join(source, 'doc.md'), 'w') as fd:
+            fd.write('# Sum\n\n[2](- "TEXT == str(1 + 1)")\n')
+
+        main([
+            source,
+            '-o', os.path.join(self.tmp.name, 'output'),
+            '--metrics-file', self.path,
+        ])
+
+        with open(self.path) as fd:
+            text = fd.read()
+        labels = '{directory="%s",type="markdown"}' % source
+        assert 'livedoc_documents_total%s 1' % labels in text
+        assert 'livedoc_assertions_total%s 1' % labels in text
+        for stage in ('read', 'fixtures', 'process', 'write'):
+            assert 'stage="%s"' % stage in text
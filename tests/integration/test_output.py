@@ -0,0 +1,67 @@
+import os
+import unittest
+import tempfile
+from unittest import mock
+from livedoc import LiveDoc
+from livedoc.output import write_if_changed
+from livedoc.processors.html import HtmlProcessor
+
+
+class WriteIfChangedTest(unittest.TestCase):
+    def test_writes_new_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'sub', 'foo.html')
+            assert write_if_changed(path, 'foo')
+            with open(path) as fd:
+                assert fd.read() == 'foo'
+
+    def test_skips_unchanged_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'foo.html')
+            write_if_changed(path, 'foo')
+            os.utime(path, (0, 0))
+
+            assert not write_if_changed(path, 'foo')
+            assert os.stat(path).st_mtime == 0
+
+    def test_rewrites_changed_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'foo.html')
+            write_if_changed(path, 'foo')
+            assert write_if_changed(path, b'bar')
+            with open(path) as fd:
+                assert fd.read() == 'bar'
+            assert os.listdir(tmp) == ['foo.html']
+
+
+class DeterministicTest(unittest.TestCase):
+    def test_footer_has_no_time(self):
+        sut = HtmlProcessor(report=mock.Mock(), deterministic=True)
+        first, status = sut.process_stream('<p>foo</p>', {})
+        second, status = sut.process_stream('<p>foo</p>', {})
+        assert ' ms on ' not in first
+        assert first == second
+
+    def test_exception_ids_are_stable(self):
+        sut = HtmlProcessor(report=mock.Mock(), deterministic=True)
+        content = '<a href="-" title="OUT = 1/0"></a>'
+        first, status = sut.process_stream(content, {})
+        second, status = sut.process_stream(content, {})
+        assert 'livedoc-exception-0' in first
+        assert first == second
+
+    def test_second_run_does_not_touch_outputs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, 'source')
+            os.makedirs(source)
+            with open(os.path.join(source, 'doc.md'), 'w') as fd:
+                fd.write('[2](- "TEXT == 1 + 1")')
+            output = os.path.join(tmp, 'output')
+
+            LiveDoc(deterministic=True).process(source, output)
+            for name in os.listdir(output):
+                os.utime(os.path.join(output, name), (0, 0))
+            LiveDoc(deterministic=True).process(source, output)
+
+            for name in os.listdir(output):
+                assert os.stat(os.path.join(output, name)).st_mtime == 0
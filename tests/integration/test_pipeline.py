@@ -0,0 +1,142 @@
+import os
+import time
+import threading
+import unittest
+from unittest import mock
+from livedoc import LiveDoc
+from livedoc.__main__ import main
+from livedoc.pipeline import prefetch, Writer
+from livedoc.reports import Report, StoreReporter
+from helpers import TreeTestCase
+
+
+class PrefetchTest(unittest.TestCase):
+    def test_results_in_order(self):
+        result = list(prefetch(range(5), lambda x: x * 2, 2))
+
+        assert result == [(0, 0), (1, 2), (2, 4), (3, 6), (4, 8)]
+
+    def test_reads_ahead_on_another_thread(self):
+        threads = set()
+
+        def read(item):
+            threads.add(threading.current_thread().name)
+            return item
+
+        list(prefetch(range(3), read, 1))
+
+        assert threads == {'livedoc-reader'}
+
+    def test_bounded(self):
+        read = []
+
+        def func(item):
+            read.append(item)
+            return item
+
+        results = prefetch(range(10), func, 2)
+        next(results)
+        time.sleep(0.1)
+
+        # the one being consumed, two queued and one waiting to be queued
+        assert len(read) <= 4
+        results.close()
+
+    def test_error_raised_at_its_item(self):
+        def func(item):
+            if item == 1:
+                raise ValueError('unreadable')
+            return item
+
+        results = prefetch(range(3), func, 2)
+
+        assert next(results) == (0, 0)
+        with self.assertRaises(ValueError):
+            next(results)
+
+
+class WriterTest(unittest.TestCase):
+    def test_runs_tasks_in_order(self):
+        done = []
+
+        with Writer(2) as sut:
+            for i in range(5):
+                sut.submit(done.append, i)
+
+        assert done == [0, 1, 2, 3, 4]
+
+    def test_error_raised_on_close(self):
+        def fail():
+            raise IOError('disk full')
+        done = []
+
+        sut = Writer(2)
+        sut.submit(fail)
+        sut.submit(done.append, 1)
+
+        with self.assertRaises(IOError):
+            sut.close()
+        assert done == []
+
+
+class PipelineTest(TreeTestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(4):
+            self.write('doc%d.md' % i,
+                       '# Doc %d\n\n[%d](- "TEXT == str(%d)")\n' % (i, i, i))
+        self.write('logo.txt', 'copied')
+
+    def run_livedoc(self, pipeline):
+        results = StoreReporter()
+        report = Report()
+        report.register(results)
+        sut = LiveDoc(
+            report=report, deterministic=True, pipeline=pipeline
+        )
+        sut.process(self.source, self.output)
+        return sut, results
+
+    def outputs(self):
+        result = {}
+        for name in sorted(os.listdir(self.output)):
+            path = os.path.join(self.output, name)
+            if os.path.isfile(path):
+                with open(path) as fd:
+                    result[name] = fd.read()
+        return result
+
+    def test_same_results_as_sequential(self):
+        sut, results = self.run_livedoc(0)
+        expected = self.outputs()
+        sequential = [
+            (x.file, x.expression, x.success) for x in results.store
+        ]
+        for name in os.listdir(self.output):
+            if os.path.isfile(os.path.join(self.output, name)):
+                os.remove(os.path.join(self.output, name))
+
+        sut, results = self.run_livedoc(2)
+
+        assert self.outputs() == expected
+        assert [(x.file, x.expression, x.success) for x in results.store] \
+            == sequential
+        assert sut.status == LiveDoc.STATUS_SUCCESS
+
+    def test_timings_include_write(self):
+        sut, results = self.run_livedoc(2)
+
+        for timings in sut.timings.values():
+            assert 'read' in timings
+            assert 'write' in timings
+
+    def test_write_error(self):
+        with mock.patch('livedoc.write_if_changed',
+                        side_effect=IOError('disk full')):
+            with self.assertRaises(IOError):
+                self.run_livedoc(2)
+
+    def test_command_line(self):
+        main([self.source, '-o', self.output, '--pipeline', '2'])
+
+        assert 'doc3.html' in os.listdir(self.output)
@@ -0,0 +1,149 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+from livedoc import LiveDoc
+from livedoc.discovery import WorkItem
+from livedoc.reports import Report, Reporter, ProgressReporter
+
+
+class ProgressReporterTest(unittest.TestCase):
+    def setUp(self):
+        self.stream = io.StringIO()
+
+    def process(self, sut, name, assertions=1):
+        sut.change_file(name)
+        for i in range(assertions):
+            sut.add_comparison('1 == 1', '1 == 1', True)
+        sut.file_finish()
+
+    def test_status(self):
+        sut = ProgressReporter(self.stream, interval=0)
+        sut.run_start(['a.md', 'b.md', 'c.md'])
+
+        self.process(sut, 'a.md', 3)
+        sut.change_file('b.md')
+
+        assert sut.status().startswith('1/3 files, 3 assertions (')
+        assert ', 1 active, ETA ' in sut.status()
+
+    def test_lines_are_written(self):
+        sut = ProgressReporter(self.stream, interval=0)
+        sut.run_start(['a.md', 'b.md'])
+
+        self.process(sut, 'a.md')
+        self.process(sut, 'b.md')
+
+        lines = self.stream.getvalue().splitlines()
+        assert lines[-1].startswith('2/2 files, 2 assertions')
+        assert lines[-1].endswith('ETA 0m00s')
+
+    def test_refresh_is_bounded(self):
+        sut = ProgressReporter(self.stream, interval=3600)
+        sut.run_start(['a.md', 'b.md'])
+
+        self.process(sut, 'a.md', 1000)
+        self.process(sut, 'b.md', 1000)
+
+        # the first event, and the end of the run
+        assert len(self.stream.getvalue().splitlines()) == 2
+
+    def test_eta_without_estimates(self):
+        sut = ProgressReporter(self.stream)
+        sut.run_start(['a.md', 'b.md', 'c.md', 'd.md'])
+
+        assert sut.eta(10) is None
+        self.process(sut, 'a.md')
+        assert sut.eta(10) == 30
+
+    def test_eta_follows_estimates(self):
+        sut = ProgressReporter(
+            self.stream,
+            estimates={'a.md': 1, 'b.md': 9, 'c.md': 2},
+        )
+        sut.run_start(['a.md', 'b.md', 'c.md', 'new.md'])
+
+        self.process(sut, 'a.md')
+
+        # b.md took 9 times longer than a.md, new.md is given the mean
+        assert sut.eta(2) == 2 * (9 + 2 + 4)
+
+    def test_workers(self):
+        sut = ProgressReporter(self.stream, workers=lambda: 7)
+        sut.run_start(['a.md'])
+
+        assert ', 7 active, ' in sut.status()
+
+    def test_unknown_total(self):
+        sut = ProgressReporter(self.stream, interval=0)
+        sut.run_start(None)
+
+        self.process(sut, 'a.md', 2)
+
+        assert sut.status().startswith('1/? files, 2 assertions (')
+        assert sut.status().endswith('ETA ?')
+
+    def test_format(self):
+        sut = ProgressReporter(self.stream)
+
+        assert sut._format(None) == '?'
+        assert sut._format(75) == '1m15s'
+        assert sut._format(7300) == '2h01m'
+
+    def test_livedoc_announces_files(self):
+        reporter = mock.MagicMock()
+        report = Report()
+        report.register(reporter)
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, 'docs')
+            os.mkdir(source)
+            for name in ('a.html', 'b.html'):
+                with open(os.path.join(source, name), 'w') as fd:
+                    fd.write('<p>nothing</p>')
+
+            LiveDoc(report=report).process(source, os.path.join(tmp, 'out'))
+
+        sources = reporter.run_start.call_args[0][0]
+        assert sorted(os.path.basename(x) for x in sources) == [
+            'a.html', 'b.html',
+        ]
+
+    def test_livedoc_streams_files(self):
+        events = []
+
+        class Recorder(Reporter):
+            def run_start(self, sources):
+                events.append(('start', sources))
+
+            def change_file(self, name):
+                events.append(('process', os.path.basename(name)))
+
+        def discover(source, target):
+            for name in ('a.html', 'b.html'):
+                events.append(('found', name))
+                yield WorkItem(
+                    os.path.join(source, name), os.path.join(target, name)
+                )
+
+        report = Report()
+        report.register(Recorder())
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, 'docs')
+            os.mkdir(source)
+            for name in ('a.html', 'b.html'):
+                with open(os.path.join(source, name), 'w') as fd:
+                    fd.write('<p>nothing</p>')
+
+            with mock.patch('livedoc.discover', discover):
+                LiveDoc(report=report).process(
+                    source, os.path.join(tmp, 'out')
+                )
+
+        assert events == [
+            ('start', None),
+            ('found', 'a.html'),
+            ('process', 'a.html'),
+            ('found', 'b.html'),
+            ('process', 'b.html'),
+        ]
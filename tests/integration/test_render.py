@@ -0,0 +1,111 @@
+import threading
+import unittest
+from unittest import mock
+from livedoc import LiveDoc, Document, RenderedDocument
+from livedoc.reports import Report, StoreReporter
+
+
+class RenderTest(unittest.TestCase):
+    def test_renders_tuples(self):
+        sut = LiveDoc()
+        result = sut.render([
+            ('first.md', '[2](- "TEXT == 1 + 1")', None),
+            ('second.html', '<a href="-" title="1 == 2">1</a>', None),
+        ])
+
+        assert [x.name for x in result] == ['first.md', 'second.html']
+        assert result[0].success
+        assert 'class="success"' in result[0].html
+        assert result[1].status == RenderedDocument.FAILURE
+        assert sut.status == LiveDoc.STATUS_FAILURE
+
+    def test_structured_results(self):
+        sut = LiveDoc()
+        result, = sut.render([Document(
+            'doc.md',
+            '# Sum\n\n[2](- "TEXT == 1 + 1")\n\n[ ](- "OUT = 1 / 0")',
+        )])
+
+        comparison, error = result.results
+        assert comparison['file'] == 'doc.md'
+        assert comparison['test'] == 'Sum'
+        assert comparison['resolved'] == '2 == 2'
+        assert comparison['success']
+        assert error['error'] == 'division by zero'
+        assert result.status == RenderedDocument.ERROR
+
+    def test_fixtures_as_dict(self):
+        fixtures = {'double': lambda x: 2 * x}
+        sut = LiveDoc()
+        result, = sut.render([
+            ('doc.md', '[4](- "TEXT == double(2)")', fixtures),
+        ])
+        assert result.success
+
+    def test_fixtures_as_code(self):
+        code = 'def double(x):\n    return 2 * x\n'
+        sut = LiveDoc()
+        result = sut.render([
+            ('a.md', '[4](- "TEXT == double(2)")', code),
+            ('b.md', '[6](- "TEXT == double(3)")', code),
+        ])
+        assert all(x.success for x in result)
+
+    def test_results_are_not_shared_between_documents(self):
+        sut = LiveDoc()
+        first, second = sut.render([
+            ('a.md', '[1](- "TEXT == 1")', None),
+            ('b.md', 'nothing to check', None),
+        ])
+        assert len(first.results) == 1
+        assert second.results == []
+        assert first.sidecar == second.sidecar == {}
+
+    def test_processors_are_reused_between_calls(self):
+        processor = mock.Mock()
+        processor.test = mock.Mock(return_value=True)
+        processor.process_stream = mock.Mock(return_value=('html', 0))
+        sut = LiveDoc(processors=[processor])
+
+        sut.render([('a.md', 'a', None)])
+        sut.render([('b.md', 'b', None)])
+
+        assert processor.process_stream.call_count == 2
+        assert sut.report.reporters == []
+
+    def test_registered_reporters_see_results(self):
+        results = StoreReporter()
+        report = Report()
+        report.register(results)
+        sut = LiveDoc(report=report)
+
+        sut.render([('a.md', '[1](- "TEXT == 1")', None)])
+
+        assert [(x.file, x.expression) for x in results.store] == [
+            ('a.md', 'TEXT == 1'),
+        ]
+
+    def test_concurrent_calls_keep_their_results(self):
+        sut = LiveDoc()
+        barrier = threading.Barrier(4, timeout=10)
+        rendered = {}
+
+        def work(n):
+            documents = [
+                ('%d-%d.md' % (n, i), '[%d](- "TEXT == %d")' % (i, i), None)
+                for i in range(20)
+            ]
+            barrier.wait()
+            rendered[n] = sut.render(documents)
+
+        threads = [threading.Thread(target=work, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for n in range(4):
+            for i, result in enumerate(rendered[n]):
+                assert [x['file'] for x in result.results] == [result.name]
+                assert result.name == '%d-%d.md' % (n, i)
+                assert result.success
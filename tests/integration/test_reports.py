@@ -76,3 +76,20 @@ class ReportTest(unittest.TestCase):
             'expression', 'exception')
         mock_register2.add_exception.assert_called_once_with(
             'expression', 'exception')
+
+    def test_buffered_events_are_reported_on_replay(self):
+        mock_register = unittest.mock.MagicMock()
+        sut = Report()
+        sut.register(mock_register)
+        with sut.buffered() as events:
+            sut.test_name('foo')
+            sut.add_comparison('expression', 'resolved', 'result')
+
+        mock_register.change_test.assert_not_called()
+        sut.replay(events)
+
+        assert mock_register.method_calls == [
+            unittest.mock.call.change_test('foo'),
+            unittest.mock.call.add_comparison(
+                'expression', 'resolved', 'result'),
+        ]
@@ -0,0 +1,72 @@
+import unittest
+from livedoc.results import (
+    ResultStore, StringTable, PASSED, FAILED, ERROR, NONE
+)
+
+
+class StringTableTest(unittest.TestCase):
+    def test_strings_are_stored_once(self):
+        sut = StringTable()
+        assert sut.add('foo') == sut.add('foo') == 0
+        assert sut.add('bar') == 1
+        assert sut.get(1) == 'bar'
+        assert len(sut) == 2
+
+    def test_none(self):
+        sut = StringTable()
+        assert sut.add(None) == NONE
+        assert sut.get(NONE) is None
+
+
+class ResultStoreTest(unittest.TestCase):
+    def fill(self, sut):
+        sut.add('doc.md', 'test', 'a == 1', PASSED, '1 == 1', 0.5)
+        sut.add('doc.md', 'test', 'a == 2', FAILED, '1 == 2', 0.25)
+        sut.add('doc.md', 'other', 'f()', ERROR, ValueError('wrong'), 1.0)
+        return sut
+
+    def test_rows(self):
+        sut = self.fill(ResultStore())
+        rows = list(sut)
+
+        assert len(sut) == 3
+        assert [x.expression for x in rows] == ['a == 1', 'a == 2', 'f()']
+        assert rows[1].detail == '1 == 2'
+        assert rows[2].detail == 'wrong'
+        assert rows[2].test == 'other'
+        assert rows[0].success and not rows[1].success
+
+    def test_details_of_passed_results_are_dropped(self):
+        assert list(self.fill(ResultStore()))[0].detail is None
+        assert list(self.fill(ResultStore(True)))[0].detail == '1 == 1'
+
+    def test_summary(self):
+        sut = self.fill(ResultStore())
+        assert sut.summary() == dict(
+            total=3,
+            passed=1,
+            failed=1,
+            errors=1,
+            duration=1.75,
+        )
+        assert sut.summary(1, 2)['failed'] == 1
+
+    def test_merge(self):
+        sut = ResultStore()
+        sut.add('first.md', '<main>', 'x', PASSED)
+        sut.merge(self.fill(ResultStore()))
+
+        assert len(sut) == 4
+        assert sut.get(3).file == 'doc.md'
+        assert sut.get(3).detail == 'wrong'
+        assert len(sut.strings) == 11
+
+    def test_results_are_compact(self):
+        sut = ResultStore()
+        for i in range(10000):
+            sut.add('doc.md', 'test', 'a == TEXT', i % 2, '%d == 1' % i)
+
+        columns = (sut.files, sut.tests, sut.expressions, sut.details,
+                   sut.statuses, sut.durations)
+        size = sum(x.itemsize * len(x) for x in columns)
+        assert size / len(sut) <= 32
@@ -0,0 +1,109 @@
+import threading
+import unittest
+from livedoc.context import Context
+from livedoc.processors import HtmlProcessor
+from livedoc.reports import Report, MemoryReporter
+
+
+DOCUMENT = '''
+<a href="-" title="base = 10">10</a>
+<h1>first</h1>
+<a href="-" title="a = wait(1)">1</a>
+<a href="-" title="base + a == 11">11</a>
+<h1>second</h1>
+<a href="-" title="b = wait(2)">2</a>
+<a href="-" title="OUT = a">1</a>
+<h1>third</h1>
+<a href="-" title="c = wait(3)">3</a>
+<a href="-" title="base + c == 13">13</a>
+'''
+
+
+class SectionsTest(unittest.TestCase):
+    def setUp(self):
+        barrier = threading.Barrier(3, timeout=5)
+
+        def wait(value):
+            barrier.wait()
+            return value
+
+        self.fixtures = {'wait': wait}
+        self.results = MemoryReporter()
+        report = Report()
+        report.register(self.results)
+        self.sut = HtmlProcessor(report=report, parallel_sections=True)
+        self.addCleanup(self.sut.close)
+
+    def test_sections_run_concurrently(self):
+        context = Context(self.fixtures)
+        result, status = self.sut.process_stream(DOCUMENT, {}, context)
+
+        assert 'BrokenBarrierError' not in result
+        assert '<span class="success">11</span>' in result
+        assert '<span class="success">13</span>' in result
+        assert context.variables['base'] == 10
+
+    def test_workers_are_kept_between_documents(self):
+        self.sut.process_stream(DOCUMENT, {}, Context(self.fixtures))
+        executor = self.sut._executor
+        self.sut.process_stream(DOCUMENT, {}, Context(self.fixtures))
+
+        assert self.sut._executor is executor
+        self.sut.close()
+        assert self.sut._executor is None
+
+    def test_sections_do_not_share_variables(self):
+        result, status = self.sut.process_stream(
+            DOCUMENT,
+            {},
+            Context(self.fixtures),
+        )
+
+        assert status == HtmlProcessor.ERROR
+        assert "name 'a' is not defined" in result
+
+    def test_results_are_reported_in_document_order(self):
+        self.sut.process_stream(DOCUMENT, {}, Context(self.fixtures))
+
+        results = self.results.results
+        assert [(x['test'], x['expression']) for x in results] == [
+            ('first', 'base + a == 11'),
+            ('second', 'a => None'),
+            ('third', 'base + c == 13'),
+        ]
+
+    def test_results_are_inserted_in_document_order(self):
+        result, status = self.sut.process_stream(
+            DOCUMENT,
+            {},
+            Context(self.fixtures),
+        )
+
+        assert (
+            result.index('first')
+            < result.index('>11<')
+            < result.index('second')
+            < result.index('third')
+            < result.index('>13<')
+        )
+
+    def test_meta_tag_enables_sections(self):
+        self.sut.parallel_sections = False
+        result, status = self.sut.process_stream(
+            '<meta name="livedoc-sections" content="parallel">' + DOCUMENT,
+            {},
+            Context(self.fixtures),
+        )
+
+        assert '<span class="success">13</span>' in result
+
+    def test_meta_tag_disables_sections(self):
+        result, status = self.sut.process_stream(
+            '<meta name="livedoc-sections" content="sequential">'
+            '<h1>first</h1><a href="-" title="a = 1">1</a>'
+            '<h1>second</h1><a href="-" title="OUT = a">1</a>',
+            {},
+            Context(),
+        )
+
+        assert status == HtmlProcessor.SUCCESS
@@ -0,0 +1,82 @@
+import os
+import threading
+from livedoc.client import Client
+from livedoc.server import Server
+from livedoc.__main__ import main
+from helpers import TreeTestCase
+
+
+class ServerTest(TreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.socket = os.path.join(self.tmp.name, 'livedoc.sock')
+        self.server = Server(self.socket, root=self.source)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.client = Client(self.socket, timeout=10)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.thread.join()
+        self.server.server_close()
+
+    def test_ping(self):
+        assert self.client.ping() == {'status': 0}
+
+    def test_render_in_memory_content(self):
+        path = self.path('doc.md')
+        response = self.client.render(path, '[2](- "TEXT == 1 + 1")')
+
+        assert response['status'] == 0
+        assert 'class="success"' in response['html']
+        assert response['results'][0]['success']
+        assert not os.path.exists(path)
+
+    def test_check_file_with_fixtures(self):
+        self.write('doc.py', 'def double(x):\n    return 2 * x\n')
+        path = self.write('doc.md', '[5](- "TEXT == double(2)")')
+
+        response = self.client.check(path)
+
+        assert response['status'] == 1
+        assert 'html' not in response
+        assert response['results'][0]['resolved'] == '5 == 4'
+
+    def test_check_does_not_render(self):
+        path = self.write('doc.md', '[2](- "TEXT == 1 + 1")')
+
+        assert self.client.check(path)['status'] == 0
+        # the rendering processors are never loaded
+        assert all(
+            x._instance is None for x in self.server.livedoc.processors[:2]
+        )
+
+    def test_render_to_output(self):
+        path = self.write('doc.html', '<a href="-" title="1 == 1">1</a>')
+        output = os.path.join(self.tmp.name, 'out.html')
+
+        response = self.client.render(path, output=output)
+
+        assert response['status'] == 0
+        assert os.path.exists(output)
+
+    def test_shared_fixtures_are_reloaded_when_changed(self):
+        fixtures = self.write('livedoc_fixtures.py', 'value = 1')
+        path = self.path('doc.md')
+        assert self.client.check(path, '[1](- "TEXT == value")')[
+            'status'] == 0
+
+        self.write('livedoc_fixtures.py', 'value = 2')
+        stat = os.stat(fixtures)
+        os.utime(fixtures, (stat.st_atime, stat.st_mtime + 10))
+
+        assert self.client.check(path, '[2](- "TEXT == value")')[
+            'status'] == 0
+
+    def test_unknown_command(self):
+        assert 'error' in self.client.request('foo')
+
+    def test_client_command(self):
+        path = self.write('doc.md', '[2](- "TEXT == 1 + 1")')
+        rc = main(['client', 'check', path, '-s', self.socket])
+        assert rc == 0
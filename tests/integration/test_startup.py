@@ -0,0 +1,66 @@
+import sys
+import unittest
+import tempfile
+import subprocess
+
+HEAVY_MODULES = ('lxml', 'markdown', 'jinja2', 'asyncio', 'uuid')
+
+
+def imported(code):
+    """Return the modules imported while running ``code``, as listed by
+    ``python -X importtime``.
+    """
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        check=True,
+    )
+    result = set()
+    for line in process.stderr.decode().splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        result.add(line.rsplit('|', 1)[1].strip())
+    return result
+
+
+def third_party(code):
+    """Return the modules that running ``code`` imports from installed
+    packages, other than livedoc.
+    """
+    process = subprocess.run(
+        [sys.executable, '-c',
+         'import sys\n'
+         'before = set(sys.modules)\n'
+         '%s\n'
+         'for name in sorted(set(sys.modules) - before):\n'
+         '    path = getattr(sys.modules[name], "__file__", None) or ""\n'
+         '    if "-packages" in path and name.split(".")[0] != "livedoc":\n'
+         '        print(name)\n' % code],
+        stdout=subprocess.PIPE,
+        check=True,
+    )
+    return process.stdout.decode().split()
+
+
+class StartupTest(unittest.TestCase):
+    def test_cli_does_not_import_heavy_dependencies(self):
+        modules = imported('import livedoc.__main__')
+        assert not [x for x in modules if x.split('.')[0] in HEAVY_MODULES]
+
+    def test_cli_imports_only_the_standard_library(self):
+        # what the CLI imports decides how long it takes to start, and
+        # installed packages are the expensive part
+        assert third_party('import livedoc.__main__') == []
+        assert 'lxml.etree' in third_party('import lxml.etree')
+
+    def test_html_files_do_not_import_markdown(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with open('%s/doc.html' % tmp, 'w') as fd:
+                fd.write('<a href="-" title="1 == 1">1</a>')
+            modules = imported(
+                'from livedoc import LiveDoc\n'
+                'LiveDoc().process("%s/doc.html", "%s/out")' % (tmp, tmp)
+            )
+        assert 'livedoc.processors.html' in modules
+        assert 'markdown' not in modules
@@ -0,0 +1,59 @@
+import os
+import unittest
+import tempfile
+from lxml import etree
+from livedoc.theme import Theme
+
+
+class ThemeTest(unittest.TestCase):
+    def test_classes_are_resolved(self):
+        sut = Theme()
+        assert sut.classes['failure_expected'] == 'failure-expected'
+        assert sut.get_classes('call_span') == 'call'
+
+    def test_unknown_classes_are_empty(self):
+        sut = Theme()
+        with self.assertLogs('livedoc.theme', 'WARNING'):
+            assert sut.get_classes('unknown') == ''
+
+    def test_loaded_styles_replace_classes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, 'themes', 'custom'))
+            filename = os.path.join(tmp, 'themes', 'custom', 'styles.conf')
+            with open(filename, 'w') as fd:
+                fd.write('success=ok\n')
+            sut = Theme()
+            sut.fragment('success')
+            sut.theme = 'custom'
+            cwd = os.getcwd()
+            os.chdir(tmp)
+            try:
+                sut.load()
+            finally:
+                os.chdir(cwd)
+
+        assert sut.get_classes('success') == 'ok'
+        assert sut.fragment('success').attrib['class'] == 'ok'
+
+    def test_fragments_are_copies(self):
+        sut = Theme()
+        first = sut.fragment('failure')
+        first[0].text = 'changed'
+
+        assert sut.fragment('failure')[0].text is None
+
+    def test_fragments(self):
+        sut = Theme()
+        assert etree.tostring(sut.fragment('plain')) == b'<span/>'
+        assert etree.tostring(sut.fragment('info')) == (
+            b'<span class="info"/>'
+        )
+        assert etree.tostring(sut.fragment('failure')) == (
+            b'<span class="failure"><span class="failure-expected"/>'
+            b'<span> </span><span class="failure-result"/></span>'
+        )
+        assert etree.tostring(sut.fragment('print')) == (
+            b'<span class="print"><span class="print-expression"/>'
+            b'<span class="print-separator"> </span>'
+            b'<span class="print-result"/></span>'
+        )
@@ -0,0 +1,127 @@
+import os
+import tempfile
+import threading
+import unittest
+from livedoc import LiveDoc
+from livedoc.__main__ import main
+from livedoc.reports import Report, Reporter, StoreReporter, JunitReporter
+from helpers import TreeTestCase
+
+FIXTURES = '''
+import threading
+
+with open(__file__ + '.log', 'a') as fd:
+    fd.write('loaded\\n')
+
+# only passed when both documents are processed at once
+barrier = threading.Barrier(2, timeout=10)
+
+def meet():
+    return barrier.wait() >= 0
+'''
+
+DOCUMENT = '''# Document %(n)d
+
+[True](- "str(meet()) == TEXT")
+[%(n)d](- "value = %(n)d")
+[%(n)d](- "str(value) == TEXT")
+'''
+
+
+def in_thread(func, *args):
+    thread = threading.Thread(target=func, args=args)
+    thread.start()
+    thread.join()
+
+
+class ThreadSafeReporterTest(unittest.TestCase):
+    def test_current_file_per_thread(self):
+        sut = Reporter()
+        seen = []
+
+        def work():
+            sut.change_file('other.md')
+            sut.change_test('other')
+            seen.append((sut.current_file, sut.current_test))
+
+        sut.change_file('doc.md')
+        in_thread(work)
+
+        assert seen == [('other.md', 'other')]
+        assert sut.current_file == 'doc.md'
+        assert sut.current_test == Reporter.DEFAULT_TESTNAME
+
+    def test_interleaved_results(self):
+        sut = StoreReporter()
+        report = Report()
+        report.register(sut)
+
+        report.test_file('a.md')
+        in_thread(self.other_file, report)
+        report.add_comparison('1 == 1', '1 == 1', True)
+        report.file_finish()
+
+        assert [(x.file, x.expression) for x in sut.store] == [
+            ('b.md', '2 == 2'),
+            ('a.md', '1 == 1'),
+        ]
+
+    def other_file(self, report):
+        report.test_file('b.md')
+        report.add_comparison('2 == 2', '2 == 2', True)
+        report.file_finish()
+
+    def test_junit_interleaved(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            sut = JunitReporter(tmp)
+            report = Report()
+            report.register(sut)
+
+            report.test_file('a.md')
+            report.add_comparison('1 == 1', '1 == 1', True)
+            in_thread(self.other_file, report)
+            report.add_comparison('3 == 3', '3 == 3', True)
+            report.file_finish()
+
+            with open(os.path.join(tmp, 'a.md.xml')) as fd:
+                content = fd.read()
+        assert 'tests="2"' in content
+        assert '2 == 2' not in content
+
+
+class ThreadsTest(TreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write('livedoc_fixtures.py', FIXTURES)
+        for n in (1, 2):
+            self.write('doc%d.md' % n, DOCUMENT % {'n': n})
+
+    def test_documents_processed_at_once(self):
+        results = StoreReporter()
+        report = Report()
+        report.register(results)
+        sut = LiveDoc(report=report, threads=2)
+
+        sut.process(self.source, self.output)
+
+        assert sut.status == LiveDoc.STATUS_SUCCESS
+        assert sorted((x.file, x.expression) for x in results.store) == [
+            (os.path.join(self.source, 'doc%d.md' % n), expression)
+            for n in (1, 2)
+            for expression in ('str(meet()) == TEXT', 'str(value) == TEXT')
+        ]
+        assert sorted(os.listdir(self.output))[:2] == [
+            'doc1.html', 'doc2.html',
+        ]
+
+    def test_directory_fixtures_loaded_once(self):
+        LiveDoc(threads=2).process(self.source, self.output)
+
+        log = os.path.join(self.source, 'livedoc_fixtures.py.log')
+        with open(log) as fd:
+            assert fd.read() == 'loaded\n'
+
+    def test_command_line(self):
+        status = main([self.source, '-o', self.output, '--threads', '2'])
+
+        assert status == LiveDoc.STATUS_SUCCESS
@@ -0,0 +1,137 @@
+import os
+import unittest
+import tempfile
+from unittest import mock
+from livedoc import LiveDoc
+from livedoc.context import Context
+from livedoc.processors.html import HtmlProcessor
+from livedoc.tracebacks import ExceptionFormatter
+
+
+def raise_exception():
+    try:
+        1 / 0
+    except Exception as e:
+        return e
+
+
+class ExceptionFormatterTest(unittest.TestCase):
+    def test_values_are_bounded(self):
+        sut = ExceptionFormatter(max_value=20, max_items=3)
+        result = sut.format_variables({
+            'text': 'x' * 1000,
+            'items': list(range(1000)),
+        })
+        assert len(result) < 100
+        assert '...' in result
+
+    def test_number_of_variables_is_bounded(self):
+        sut = ExceptionFormatter(max_variables=2)
+        result = sut.format_variables({'a': 1, 'b': 2, 'c': 3})
+        assert result == '\ta = 1\n\tb = 2\n\t... 1 more'
+
+    def test_private_variables_are_hidden(self):
+        sut = ExceptionFormatter()
+        assert sut.format_variables({'__builtins__': {}}) == ''
+
+    def test_full_context(self):
+        sut = ExceptionFormatter(max_value=5)
+        result = sut.format_variables({'text': 'x' * 100}, full=True)
+        assert 'x' * 100 in result
+
+    def test_traceback(self):
+        sut = ExceptionFormatter()
+        result = sut.format(raise_exception(), {'a': 1})
+        assert 'ZeroDivisionError' in result
+        assert '\ta = 1' in result
+
+
+class ExceptionContextTest(unittest.TestCase):
+    def test_page_keeps_bounded_context(self):
+        sut = HtmlProcessor(
+            report=mock.Mock(),
+            exceptions=ExceptionFormatter(max_value=50),
+        )
+        result, status = sut.process_stream(
+            '<a href="-" title="OUT = big[0] / 0"></a>',
+            {'big': [1] + ['x' * 100000] * 10},
+        )
+        assert status == HtmlProcessor.ERROR
+        assert len(result) < 5000
+
+    def test_identical_tracebacks_are_rendered_once(self):
+        sut = HtmlProcessor(report=mock.Mock())
+        result, status = sut.process_stream(
+            '<a href="-" title="OUT = 1 / 0"></a>'
+            '<a href="-" title="OUT = 1 / 0"></a>',
+            {},
+        )
+        assert result.count('Traceback (most recent call last)') == 1
+        assert result.count(
+            "toggle_visibility('livedoc-exception-0')") == 2
+
+    def test_variables_are_kept_for_every_anchor(self):
+        sut = HtmlProcessor(report=mock.Mock())
+        result, status = sut.process_stream(
+            '<a href="-" title="x = 1"></a>'
+            '<a href="-" title="OUT = x / 0"></a>'
+            '<a href="-" title="x = 2"></a>'
+            '<a href="-" title="OUT = x / 0"></a>',
+            {},
+        )
+        assert result.count('Traceback (most recent call last)') == 1
+        assert '\tx = 1' in result
+        assert '\tx = 2' in result
+        assert result.count(
+            "toggle_visibility('livedoc-exception-0')") == 2
+
+    def test_sidecar(self):
+        sut = HtmlProcessor(report=mock.Mock(), exception_sidecar=True)
+        context = Context()
+        result, status = sut.process_stream(
+            '<a href="-" title="OUT = 1 / 0"></a>',
+            {},
+            context,
+        )
+        assert 'Traceback' not in result
+        assert 'data-sidecar' in result
+        assert 'Traceback' in context.sidecar['livedoc-exception-0']
+
+    def test_sidecar_file_is_written(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, 'doc.md')
+            with open(source, 'w') as fd:
+                fd.write('[ ](- "OUT = 1 / 0")')
+
+            LiveDoc(exception_sidecar=True).process(
+                source, os.path.join(tmp, 'out', 'doc.html'))
+
+            sidecar = os.path.join(tmp, 'out', 'doc.exceptions.js')
+            with open(sidecar) as fd:
+                content = fd.read()
+            assert content.startswith('livedoc_exceptions({')
+            assert 'ZeroDivisionError' in content
+
+    def test_stale_sidecar_file_is_removed(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, 'doc.md')
+            target = os.path.join(tmp, 'out', 'doc.html')
+            with open(source, 'w') as fd:
+                fd.write('[ ](- "OUT = 1 / 0")')
+            LiveDoc(exception_sidecar=True).process(source, target)
+            with open(source, 'w') as fd:
+                fd.write('[ ](- "OUT = 1 / 1")')
+
+            LiveDoc(exception_sidecar=True).process(source, target)
+
+            assert os.path.exists(target)
+            assert not os.path.exists(
+                os.path.join(tmp, 'out', 'doc.exceptions.js'))
+
+    def test_sidecar_of_rendered_documents(self):
+        result, = LiveDoc(exception_sidecar=True).render([
+            ('doc.md', '[ ](- "OUT = 1 / 0")', None),
+        ])
+
+        assert 'data-sidecar' in result.html
+        assert 'ZeroDivisionError' in result.sidecar['livedoc-exception-0']
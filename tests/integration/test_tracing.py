@@ -0,0 +1,128 @@
+import os
+import json
+import tempfile
+import unittest
+from livedoc import LiveDoc, tracing
+from livedoc.__main__ import main
+from livedoc.distributed import Coordinator
+from livedoc.tracing import ChromeTracer, Tracer, span
+
+
+class TracerTest(unittest.TestCase):
+    def test_default_tracer_records_nothing(self):
+        assert type(tracing.get_tracer()) is Tracer
+        assert span('anything', a=1) is tracing.NULL_SPAN
+        assert tracing.attributes() == {}
+
+    def test_spans(self):
+        sut = ChromeTracer()
+
+        with sut.span('outer', document='a.md'):
+            with sut.span('inner', test='T'):
+                assert sut.attributes() == {'document': 'a.md', 'test': 'T'}
+
+        events = [x for x in sut.events if x['ph'] == 'X']
+        assert [x['name'] for x in events] == ['inner', 'outer']
+        assert events[0]['args'] == {'document': 'a.md', 'test': 'T'}
+        assert events[1]['args'] == {'document': 'a.md'}
+        assert events[0]['ts'] >= events[1]['ts']
+        assert events[0]['dur'] <= events[1]['dur']
+        assert events[0]['pid'] == os.getpid()
+
+    def test_drain(self):
+        sut = ChromeTracer()
+        with sut.span('a'):
+            pass
+
+        events = sut.drain()
+
+        assert 'a' in [x['name'] for x in events]
+        assert sut.events == []
+
+    def test_write(self):
+        sut = ChromeTracer()
+        with sut.span('a', value=object()):
+            pass
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'trace.json')
+
+            sut.write(path)
+
+            with open(path) as fd:
+                data = json.load(fd)
+        assert 'a' in [x['name'] for x in data['traceEvents']]
+
+
+class PipelineTracingTest(unittest.TestCase):
+    def setUp(self):
+        self.tracer = ChromeTracer()
+        previous = tracing.set_tracer(self.tracer)
+        self.addCleanup(tracing.set_tracer, previous)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def spans(self):
+        return [x for x in self.tracer.events if x['ph'] == 'X']
+
+    def test_stages(self):
+        source = os.path.join(self.tmp.name, 'doc.md')
+
+        LiveDoc().process_stream(source, '# T\n\n[1](- "TEXT == \'1\'")\n')
+
+        spans = self.spans()
+        names = [x['name'] for x in spans]
+        for name in ('document', 'fixtures', 'markdown', 'preprocess',
+                     'evaluate', 'render'):
+            assert name in names, name
+        evaluate = [x for x in spans if x['name'] == 'evaluate'][-1]
+        assert evaluate['args'] == {
+            'document': source,
+            'expression': "TEXT == '1'",
+            'test': 'T',
+        }
+
+    def test_parallel_sections_keep_the_document(self):
+        source = os.path.join(self.tmp.name, 'doc.html')
+
+        LiveDoc(parallel_sections=True).process_stream(
+            source,
+            '<h1>a</h1><a href="-" title="1">1</a>'
+            '<h1>b</h1><a href="-" title="2">2</a>',
+        )
+
+        sections = [x for x in self.spans() if x['name'] == 'section']
+        assert len(sections) == 2
+        assert all(x['args'] == {'document': source} for x in sections)
+
+    def test_coordinator_merges_worker_spans(self):
+        sut = Coordinator(
+            os.path.join(self.tmp.name, 'livedoc.sock'),
+            self.tmp.name,
+            os.path.join(self.tmp.name, 'output'),
+            trace=True,
+        )
+        self.addCleanup(sut.server_close)
+        event = {'name': 'evaluate', 'ph': 'X', 'pid': 1, 'tid': 1}
+
+        sut.add_result({'id': 0, 'trace': [event]})
+
+        assert event in self.tracer.events
+        assert sut.options['trace'] is True
+
+
+class CommandLineTest(unittest.TestCase):
+    def test_trace(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, 'docs')
+            os.mkdir(source)
+            with open(os.path.join(source, 'doc.md'), 'w') as fd:
+                fd.write('# Sum\n\n[2](- "TEXT == str(1 + 1)")\n')
+            path = os.path.join(tmp, 'trace.json')
+
+            main([source, '-o', os.path.join(tmp, 'out'), '--trace', path])
+
+            with open(path) as fd:
+                events = json.load(fd)['traceEvents']
+        names = {x['name'] for x in events}
+        assert {'discover', 'read', 'document', 'write', 'assets'} <= names
+        assert type(tracing.get_tracer()) is Tracer